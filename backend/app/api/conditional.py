@@ -0,0 +1,83 @@
+from fastapi import Response
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from app.core.metrics import metrics
+from app.services.response_cache import response_cache
+
+# Let browsers keep responses but revalidate them on every request
+CONDITIONAL_HEADERS = {"Cache-Control": "no-cache"}
+
+
+def make_etag(name: str, version: Optional[str]) -> Optional[str]:
+    """Strong ETag for a resource version, or None if the version is unknown."""
+    if version is None:
+        return None
+    return f'"{name}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """Whether an If-None-Match header matches the current ETag."""
+    if not if_none_match or etag is None:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # If-None-Match uses the weak comparison
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+def json_response(body: Union[str, bytes], etag: Optional[str]) -> Response:
+    """Pre-serialized JSON with its ETag."""
+    headers = dict(CONDITIONAL_HEADERS)
+    if etag is not None:
+        headers["ETag"] = etag
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def not_modified(name: str, etag: str) -> Response:
+    """304 for a client whose copy is current."""
+    metrics.inc(f"etag.{name.partition(':')[0]}.not_modified")
+    return Response(status_code=304, headers={**CONDITIONAL_HEADERS, "ETag": etag})
+
+
+async def cached_json(
+    name: str,
+    params: Dict[str, Any],
+    load: Callable[[], Awaitable[str]],
+    if_none_match: Optional[str],
+    replica: bool = False
+) -> Response:
+    """Conditional response served from the response cache.
+
+    The version is only read on its own when the client sent
+    If-None-Match; otherwise it comes with the cache lookup. Pass
+    ``replica`` if ``load`` reads from the read replica.
+    """
+    version = None
+    if if_none_match:
+        version = await response_cache.version(name, replica)
+        etag = make_etag(name, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(name, etag)
+
+    version, body = await response_cache.get_or_load(
+        name, params, load, version=version, replica=replica
+    )
+    return json_response(body, make_etag(name, version))
+
+
+async def conditional_json(
+    name: str,
+    load: Callable[[], Awaitable[Union[str, bytes]]],
+    if_none_match: Optional[str],
+    replica: bool = False
+) -> Response:
+    """Conditional response for an uncached resource with a version counter."""
+    version = await response_cache.version(name, replica)
+    etag = make_etag(name, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(name, etag)
+    return json_response(await load(), etag)
@@ -1,12 +1,99 @@
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
+from fastapi import HTTPException, Request
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.base import async_session_maker
+import asyncio
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.base import async_session_maker, read_session_maker, set_statement_timeout
+
+# Set on responses to writes; while present, the client reads from the primary
+READ_PRIMARY_COOKIE = "fp_read_primary"
+
+# Not a standard status; what proxies log for requests the client abandoned
+CLIENT_CLOSED_REQUEST = 499
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for getting async database sessions."""
     async with async_session_maker() as session:
+        set_statement_timeout(session, settings.DB_STATEMENT_TIMEOUT_MS)
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_ingest_db() -> AsyncGenerator[AsyncSession, None]:
+    """Session for telemetry ingest, which must stay fast under load."""
+    async with async_session_maker() as session:
+        set_statement_timeout(session, settings.DB_INGEST_STATEMENT_TIMEOUT_MS)
         try:
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints, on the replica if one is configured.
+
+    Clients that wrote within READ_YOUR_WRITES_SECONDS carry the
+    READ_PRIMARY_COOKIE and stay on the primary so they see their writes.
+    Queries are cancelled if the client disconnects while they run.
+    """
+    session_maker = async_session_maker if READ_PRIMARY_COOKIE in request.cookies else read_session_maker
+    async with session_maker() as session:
+        set_statement_timeout(session, settings.DB_READ_STATEMENT_TIMEOUT_MS)
+        try:
+            async with cancel_on_disconnect(request, session):
+                yield session
+        finally:
+            await session.close()
+
+
+@asynccontextmanager
+async def cancel_on_disconnect(request: Request, session: AsyncSession) -> AsyncIterator[None]:
+    """Cancel the request if its client goes away while a query is running.
+
+    Running queries poll for a disconnect every DB_DISCONNECT_POLL_SECONDS.
+    Cancelling the request task makes asyncpg ask the server to stop the
+    query, and the connection is discarded instead of waiting on a result
+    nobody will read. The request then ends with a 499.
+    """
+    task = asyncio.current_task()
+    running = 0
+    cancelled = False
+
+    @event.listens_for(session.sync_session, "do_orm_execute")
+    def track_query(state):
+        nonlocal running
+        running += 1
+        try:
+            return state.invoke_statement()
+        finally:
+            running -= 1
+
+    async def watch() -> None:
+        nonlocal cancelled
+        while True:
+            await asyncio.sleep(settings.DB_DISCONNECT_POLL_SECONDS)
+            # Once the response is sent the request also reads as disconnected,
+            # so only cancel while a query is still running
+            if running and await request.is_disconnected() and running:
+                cancelled = True
+                metrics.inc("db.cancelled_on_disconnect")
+                task.cancel()
+                return
+
+    watcher = asyncio.create_task(watch())
+    try:
+        yield
+    except asyncio.CancelledError:
+        if not cancelled:
+            raise
+        task.uncancel()
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request") from None
+    finally:
+        watcher.cancel()
@@ -1,13 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import List, Literal, Optional
+import csv
+import io
 
-from app.api.deps import get_db
-from app.domain.schemas import DeviceCreate, DeviceUpdate, DeviceResponse
-from app.services.device_service import DeviceService
+from app.api.conditional import cached_json, json_response
+from app.api.deps import get_db, get_read_db
+from app.core.config import settings
+from app.db.base import is_replica, read_session_maker, set_statement_timeout
+from app.domain.schemas import (
+    DeviceBulkError,
+    DeviceBulkResult,
+    DeviceCreate,
+    DeviceUpdate,
+    DeviceResponse,
+    DeviceListItem
+)
+from app.services.device_service import DeviceService, IMPORT_COLUMNS
+from app.services.response_cache import DEVICES
 
 router = APIRouter()
 
+device_list_adapter = TypeAdapter(List[DeviceListItem])
+
+DeviceSort = Literal[
+    "battery_pct", "-battery_pct", "speed_mps", "-speed_mps", "last_reading_at", "-last_reading_at"
+]
+OnConflict = Literal["skip", "update"]
+
+
+def check_import_size(num_rows: int) -> None:
+    if num_rows > settings.DEVICE_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.DEVICE_IMPORT_MAX_ROWS} devices per import"
+        )
+
 
 @router.post("", response_model=DeviceResponse, status_code=201)
 async def create_device(
@@ -23,18 +53,100 @@ async def create_device(
     return await DeviceService.create_device(db, device)
 
 
-@router.get("", response_model=List[DeviceResponse])
+@router.get("", response_model=List[DeviceListItem])
 async def list_devices(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     city: Optional[str] = None,
     status: Optional[str] = None,
-    battery_lt: Optional[int] = None,
+    battery_lt: Optional[int] = Query(None, ge=0, le=101),
+    moving: Optional[bool] = None,
+    stale_for: Optional[int] = Query(None, ge=0, description="Minutes since the last reading"),
+    sort: Optional[DeviceSort] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """List devices with their latest reading, with optional filters and sorting."""
+    params = dict(
+        skip=skip, limit=limit, city=city, status=status,
+        battery_lt=battery_lt, moving=moving, stale_for=stale_for, sort=sort
+    )
+
+    async def load() -> str:
+        devices = await DeviceService.get_devices(db, **params)
+        return device_list_adapter.dump_json(devices).decode()
+
+    if stale_for is not None:
+        # Staleness changes with the clock, not only on writes
+        return json_response(await load(), None)
+    return await cached_json(DEVICES, params, load, if_none_match, replica=is_replica(db))
+
+
+@router.post("/bulk", response_model=DeviceBulkResult)
+async def create_devices(
+    devices: List[DeviceCreate],
+    on_conflict: OnConflict = "skip",
     db: AsyncSession = Depends(get_db)
 ):
-    """List all devices with optional filters."""
-    return await DeviceService.get_devices(
-        db, skip=skip, limit=limit, city=city, status=status, battery_lt=battery_lt
+    """Create many devices in one statement; existing IDs are skipped or updated."""
+    check_import_size(len(devices))
+    return await DeviceService.import_devices(
+        db, list(enumerate(devices, start=1)), on_conflict=on_conflict
+    )
+
+
+@router.post("/import", response_model=DeviceBulkResult)
+async def import_devices_csv(
+    file: UploadFile = File(...),
+    on_conflict: OnConflict = "skip",
+    db: AsyncSession = Depends(get_db)
+):
+    """Create devices from a CSV with id, name, model, firmware_version and city columns."""
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+
+    reader = csv.DictReader(io.StringIO(content))
+    missing = {"id", "name", "model"} - set(reader.fieldnames or [])
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+    rows, errors = [], []
+    for number, record in enumerate(reader, start=1):
+        try:
+            # Empty cells are missing values
+            device = DeviceCreate(**{name: record.get(name) or None for name in IMPORT_COLUMNS})
+        except ValidationError as e:
+            error = e.errors()[0]
+            errors.append(DeviceBulkError(
+                row=number,
+                id=record.get("id") or None,
+                error=f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            ))
+            continue
+        rows.append((number, device))
+    check_import_size(len(rows) + len(errors))
+
+    return await DeviceService.import_devices(db, rows, errors, on_conflict=on_conflict)
+
+
+@router.get("/export")
+async def export_devices_csv():
+    """Stream the device registry as CSV."""
+    async def rows():
+        # The response outlives request dependencies, so use its own session.
+        # StreamingResponse cancels this generator, and so the query, if the
+        # client disconnects.
+        async with read_session_maker() as db:
+            set_statement_timeout(db, settings.DB_EXPORT_STATEMENT_TIMEOUT_MS)
+            async for chunk in DeviceService.export_devices_csv(db):
+                yield chunk
+
+    return StreamingResponse(
+        rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="devices.csv"'}
     )
 
 
@@ -1,14 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from uuid import UUID
 
-from app.api.deps import get_db
-from app.domain.schemas import EventResponse, EventAcknowledge
+from app.api.conditional import cached_json
+from app.api.deps import get_db, get_read_db
+from app.db.base import is_replica
+from app.domain.schemas import (
+    EventResponse,
+    EventAcknowledge,
+    EventBulkAcknowledge,
+    EventBulkAcknowledgeResponse
+)
 from app.services.event_service import EventService
+from app.services import realtime_bridge
+from app.services.response_cache import EVENTS
 
 router = APIRouter()
 
+event_list_adapter = TypeAdapter(List[EventResponse])
+
+
+async def cached_event_list(db: AsyncSession, if_none_match: Optional[str], **params) -> Response:
+    """Event list JSON for the given filters, served from the response cache."""
+    async def load() -> str:
+        events = await EventService.get_events(db, **params)
+        return event_list_adapter.dump_json(events).decode()
+
+    return await cached_json(EVENTS, params, load, if_none_match, replica=is_replica(db))
+
 
 @router.get("/", response_model=List[EventResponse])
 async def list_events(
@@ -18,11 +39,13 @@ async def list_events(
     acknowledged: Optional[bool] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all events with optional filters."""
-    return await EventService.get_events(
+    return await cached_event_list(
         db,
+        if_none_match,
         device_id=device_id,
         severity=severity,
         type=type,
@@ -44,6 +67,28 @@ async def get_event(
     return event
 
 
+@router.post("/acknowledge", response_model=EventBulkAcknowledgeResponse, response_model_exclude_none=True)
+async def acknowledge_events(
+    ack_data: EventBulkAcknowledge,
+    db: AsyncSession = Depends(get_db)
+):
+    """Acknowledge open events by ID or by filter."""
+    filters = ack_data.model_dump(include={"event_ids", "device_id", "type", "severity", "before"}, exclude_none=True)
+    if not filters:
+        raise HTTPException(status_code=400, detail="Specify event_ids or at least one filter")
+
+    count, rows = await EventService.acknowledge_events(
+        db, ack_data.acknowledged_by, return_rows=ack_data.return_rows, **filters
+    )
+    if count:
+        # Other clients refresh their event lists on this notice
+        await realtime_bridge.publish("events", {"type": "events_updated", "acknowledged": count})
+    return EventBulkAcknowledgeResponse(
+        acknowledged=count,
+        events=[EventResponse.model_validate(row) for row in rows] if ack_data.return_rows else None
+    )
+
+
 @router.post("/{event_id}/acknowledge", response_model=EventResponse)
 async def acknowledge_event(
     event_id: UUID,
@@ -54,6 +99,7 @@ async def acknowledge_event(
     event = await EventService.acknowledge_event(db, event_id, ack_data.acknowledged_by)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
+    await realtime_bridge.publish("events", {"type": "events_updated", "acknowledged": 1})
     return event
 
 
@@ -62,9 +108,10 @@ async def get_device_events(
     device_id: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: AsyncSession = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get events for a specific device."""
-    return await EventService.get_events(
-        db, device_id=device_id, skip=skip, limit=limit
+    return await cached_event_list(
+        db, if_none_match, device_id=device_id, skip=skip, limit=limit
     )
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, HTTPException
+
+from app.domain.schemas import FleetStatsResponse
+from app.services.fleet_stats import fleet_stats
+
+router = APIRouter()
+
+
+@router.get("/stats", response_model=FleetStatsResponse)
+async def get_fleet_stats():
+    """Device and open event counts for the dashboard cards."""
+    stats = await fleet_stats.get()
+    if stats is None:
+        raise HTTPException(status_code=503, detail="Fleet statistics unavailable")
+    return stats
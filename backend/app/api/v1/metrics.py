@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+from collections import defaultdict
+
+from app.core.metrics import metrics
+from app.core.redis import get_redis
+from app.services.response_cache import response_cache
+from app.services.websocket_manager import ws_manager
+
+router = APIRouter()
+
+# Written by app.worker.runtime; duplicated to keep Celery out of the API
+WORKER_TASK_METRICS_KEY = "metrics:worker_tasks"
+
+
+async def get_worker_task_timings() -> dict:
+    """Task durations accumulated by all Celery worker processes."""
+    try:
+        r = await get_redis()
+        raw = await r.hgetall(WORKER_TASK_METRICS_KEY)
+    except Exception:
+        return {}
+
+    totals = defaultdict(dict)
+    for field, value in raw.items():
+        name, _, stat = field.rpartition(":")
+        totals[name][stat] = float(value)
+
+    timings = {}
+    for name, stats in totals.items():
+        count = int(stats.get("count", 0))
+        total_ms = stats.get("total_ms", 0.0)
+        timings[name] = {
+            "count": count,
+            "total_ms": round(total_ms, 3),
+            "avg_ms": round(total_ms / count, 3) if count else 0.0,
+        }
+    return timings
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Counters, gauges and timers for this API process, plus worker task timings."""
+    snapshot = metrics.snapshot()
+    snapshot["websocket"] = ws_manager.stats()
+    snapshot["response_cache"] = response_cache.stats()
+    snapshot["worker_tasks"] = await get_worker_task_timings()
+    return snapshot
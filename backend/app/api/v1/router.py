@@ -1,9 +1,13 @@
 from fastapi import APIRouter
-from app.api.v1 import devices, telemetry, events, websocket
+from app.api.v1 import devices, telemetry, events, fleet, websocket, stream, rules, metrics
 
 api_router = APIRouter()
 
 api_router.include_router(devices.router, prefix="/devices", tags=["devices"])
 api_router.include_router(telemetry.router, tags=["telemetry"])
 api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(fleet.router, prefix="/fleet", tags=["fleet"])
 api_router.include_router(websocket.router, tags=["websocket"])
+api_router.include_router(stream.router, prefix="/stream", tags=["stream"])
+api_router.include_router(rules.router, prefix="/rules", tags=["rules"])
+api_router.include_router(metrics.router, tags=["metrics"])
@@ -0,0 +1,99 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.api.deps import get_db
+from app.domain.schemas import RuleCreate, RuleUpdate, RuleResponse, RuleStats
+from app.services.rule_service import RuleService
+from app.services.rules_compiler import RULE_FIELDS, rule_registry
+
+router = APIRouter()
+
+
+def validate_field(field: str) -> None:
+    """Reject rules on fields the compiler doesn't know."""
+    if field not in RULE_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown rule field '{field}'. Expected one of: {', '.join(RULE_FIELDS)}"
+        )
+
+
+@router.get("", response_model=List[RuleResponse])
+async def list_rules(db: AsyncSession = Depends(get_db)):
+    """List all rule definitions."""
+    return await RuleService.get_rules(db)
+
+
+@router.put("", response_model=List[RuleResponse])
+async def replace_rules(
+    rules: List[RuleCreate],
+    db: AsyncSession = Depends(get_db)
+):
+    """Replace the whole rule set, e.g. from a JSON rules file."""
+    for rule in rules:
+        validate_field(rule.field)
+    if len({rule.name for rule in rules}) != len(rules):
+        raise HTTPException(status_code=400, detail="Rule names must be unique")
+
+    return await RuleService.replace_rules(db, rules)
+
+
+@router.post("", response_model=RuleResponse, status_code=201)
+async def create_rule(
+    rule: RuleCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Create a new rule."""
+    validate_field(rule.field)
+    existing = await RuleService.get_rule_by_name(db, rule.name)
+    if existing:
+        raise HTTPException(status_code=400, detail="Rule already exists")
+
+    return await RuleService.create_rule(db, rule)
+
+
+@router.get("/stats", response_model=List[RuleStats])
+async def get_rule_stats(db: AsyncSession = Depends(get_db)):
+    """Per-rule evaluation time and hit counters for this process."""
+    await rule_registry.refresh(db)
+    return rule_registry.stats()
+
+
+@router.get("/{rule_id}", response_model=RuleResponse)
+async def get_rule(
+    rule_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a specific rule by ID."""
+    rule = await RuleService.get_rule(db, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return rule
+
+
+@router.patch("/{rule_id}", response_model=RuleResponse)
+async def update_rule(
+    rule_id: int,
+    rule_update: RuleUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Update a rule."""
+    if rule_update.field is not None:
+        validate_field(rule_update.field)
+
+    rule = await RuleService.update_rule(db, rule_id, rule_update)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return rule
+
+
+@router.delete("/{rule_id}", status_code=204)
+async def delete_rule(
+    rule_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a rule."""
+    deleted = await RuleService.delete_rule(db, rule_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Rule not found")
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+from app.services.sse_stream import event_stream, fleet_stream
+
+router = APIRouter()
+
+# Keep proxies from buffering or caching the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+@router.get("/events")
+async def stream_events(
+    severity: Optional[str] = None,
+    type: Optional[str] = None,
+    city: Optional[str] = None,
+    last_event_id: Optional[str] = Query(None, description="Resume point for clients that can't send Last-Event-ID"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Server-Sent Events feed of the events channel."""
+    filters = {
+        name: value
+        for name, value in (("severity", severity), ("type", type), ("city", city))
+        if value is not None
+    }
+    return StreamingResponse(
+        event_stream(last_event_id_header or last_event_id, filters),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.get("/fleet")
+async def stream_fleet(
+    city: Optional[str] = None,
+    last_event_id: Optional[str] = Query(None, description="Resume point for clients that can't send Last-Event-ID"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Server-Sent Events feed of fleet snapshots and deltas."""
+    return StreamingResponse(
+        fleet_stream(last_event_id_header or last_event_id, city),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -1,37 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-import redis.asyncio as redis
 
-from app.api.deps import get_db
+from app.api.conditional import conditional_json
+from app.api.deps import get_ingest_db, get_read_db
+from app.core.serialization import dump_rows
+from app.db.base import is_replica
 from app.domain.schemas import (
     TelemetryReadingCreate,
     TelemetryReadingResponse,
     IngestResponse
 )
-from app.services.telemetry_service import TelemetryService
+from app.services.telemetry_service import TelemetryService, READING_COLUMNS
 from app.services.device_service import DeviceService
-from app.core.config import settings
+from app.services.rules_engine import RulesEngine
+from app.services.response_cache import telemetry_resource
+from app.services.fleet_stats import fleet_stats
+from app.services import realtime_bridge
 
 router = APIRouter()
 
-# Redis client for pub/sub
-redis_client = None
-
-
-async def get_redis():
-    """Get Redis client."""
-    global redis_client
-    if redis_client is None:
-        redis_client = await redis.from_url(settings.REDIS_URL, decode_responses=True)
-    return redis_client
+latest_reading_adapter = TypeAdapter(Optional[TelemetryReadingResponse])
 
 
 @router.post("/ingest", response_model=IngestResponse)
 async def ingest_telemetry(
     reading: TelemetryReadingCreate,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_ingest_db)
 ):
     """Ingest a single telemetry reading."""
     # Verify device exists
@@ -44,13 +41,32 @@ async def ingest_telemetry(
 
     # Update device last_seen
     await DeviceService.update_last_seen(db, reading.device_id, reading.ts)
+    await fleet_stats.update_device(reading.device_id, status="online", battery=reading.battery_pct)
+
+    # Evaluate rules inline so incidents don't wait for the periodic pass
+    events = await RulesEngine.evaluate_reading(db, device, reading)
 
     # Publish to Redis for real-time updates
-    try:
-        r = await get_redis()
-        await r.publish("telemetry:new", f"{reading.device_id}")
-    except Exception as e:
-        print(f"Redis publish error: {e}")
+    await realtime_bridge.publish("telemetry", {
+        "type": "telemetry_update",
+        "data": {
+            **TelemetryReadingResponse.model_validate(db_reading).model_dump(mode="json"),
+            "city": device.city,
+        },
+    })
+    for event in events:
+        # ts and created_at are server defaults and not loaded after commit
+        await realtime_bridge.publish("events", {
+            "type": "event_created",
+            "data": {
+                "id": str(event.id),
+                "device_id": event.device_id,
+                "type": event.type,
+                "severity": event.severity,
+                "payload": event.payload,
+                "city": device.city,
+            },
+        })
 
     return IngestResponse(accepted=True, reading_id=db_reading.id)
 
@@ -61,27 +77,42 @@ async def get_device_telemetry(
     from_ts: Optional[datetime] = Query(None, alias="from"),
     to_ts: Optional[datetime] = Query(None, alias="to"),
     limit: int = Query(1000, ge=1, le=10000),
-    db: AsyncSession = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get telemetry readings for a specific device."""
-    # Verify device exists
-    device = await DeviceService.get_device(db, device_id)
-    if not device:
-        raise HTTPException(status_code=404, detail="Device not found")
-
-    return await TelemetryService.get_device_telemetry(
-        db, device_id, from_ts=from_ts, to_ts=to_ts, limit=limit
+    async def load() -> bytes:
+        # Verify device exists
+        device = await DeviceService.get_device(db, device_id)
+        if not device:
+            raise HTTPException(status_code=404, detail="Device not found")
+
+        # Up to 10k rows, so skip ORM objects and per-row Pydantic models
+        rows = await TelemetryService.get_device_telemetry_rows(
+            db, device_id, from_ts=from_ts, to_ts=to_ts, limit=limit
+        )
+        return dump_rows(READING_COLUMNS, rows)
+
+    return await conditional_json(
+        telemetry_resource(device_id), load, if_none_match, replica=is_replica(db)
     )
 
 
 @router.get("/devices/{device_id}/latest", response_model=Optional[TelemetryReadingResponse])
 async def get_latest_telemetry(
     device_id: str,
-    db: AsyncSession = Depends(get_db)
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get the latest telemetry reading for a device."""
-    device = await DeviceService.get_device(db, device_id)
-    if not device:
-        raise HTTPException(status_code=404, detail="Device not found")
+    async def load() -> str:
+        device = await DeviceService.get_device(db, device_id)
+        if not device:
+            raise HTTPException(status_code=404, detail="Device not found")
 
-    return await TelemetryService.get_latest_reading(db, device_id)
+        reading = await TelemetryService.get_latest_reading(db, device_id)
+        return latest_reading_adapter.dump_json(reading).decode()
+
+    return await conditional_json(
+        telemetry_resource(device_id), load, if_none_match, replica=is_replica(db)
+    )
@@ -1,46 +1,125 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.services.websocket_manager import ws_manager
-import json
+from app.services.websocket_manager import ENCODINGS, decode_message, ws_manager
+from app.services.live_fleet import live_fleet, FLEET_CHANNEL
+from app.services.viewport_index import viewport_index
+from app.services.realtime_bridge import realtime_bridge
+from app.services.ws_presence import presence_registry
 import uuid
 
 router = APIRouter()
 
 
+@router.get("/ws/presence")
+async def get_presence():
+    """WebSocket connections and subscriptions across all API workers."""
+    return await presence_registry.cluster()
+
+
 @router.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates."""
     client_id = str(uuid.uuid4())
-    await ws_manager.connect(client_id, websocket)
+
+    # Negotiate the wire format through the subprotocol, or ?encoding= for
+    # clients that can't set one
+    subprotocol = next((p for p in websocket.scope.get("subprotocols", []) if p in ENCODINGS), None)
+    encoding = subprotocol or websocket.query_params.get("encoding", "json")
+    if encoding not in ENCODINGS:
+        encoding = "json"
+    await ws_manager.connect(client_id, websocket, encoding, subprotocol)
 
     try:
         # Send connection confirmation
         await ws_manager.send_personal_message(
-            {"type": "connected", "client_id": client_id},
+            {"type": "connected", "client_id": client_id, "encoding": encoding},
             client_id
         )
 
         while True:
             # Receive messages from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            message = decode_message(
+                frame["bytes"] if frame.get("bytes") is not None else frame["text"]
+            )
 
             # Handle subscription requests
             if message.get("type") == "subscribe":
                 channels = message.get("channels", [])
                 await ws_manager.subscribe(client_id, channels)
+                # Current seqs let the client resume from here after a reconnect
                 await ws_manager.send_personal_message(
-                    {"type": "subscribed", "channels": channels},
+                    {
+                        "type": "subscribed",
+                        "channels": channels,
+                        "seq": {c: realtime_bridge.current_seq(c) for c in channels},
+                    },
                     client_id
                 )
+                if FLEET_CHANNEL in channels:
+                    await live_fleet.add_client(
+                        client_id, columnar=message.get("fleet_format") == "columnar"
+                    )
 
             elif message.get("type") == "unsubscribe":
                 channels = message.get("channels", [])
                 await ws_manager.unsubscribe(client_id, channels)
+                if FLEET_CHANNEL in channels:
+                    live_fleet.remove_client(client_id)
                 await ws_manager.send_personal_message(
                     {"type": "unsubscribed", "channels": channels},
                     client_id
                 )
 
+            elif message.get("type") == "viewport":
+                # bbox is [min_lon, min_lat, max_lon, max_lat]; null clears the viewport
+                bbox = message.get("bbox")
+                try:
+                    if bbox is None:
+                        viewport_index.remove(client_id)
+                    else:
+                        viewport_index.set_viewport(client_id, bbox, message.get("zoom", 0))
+                except (TypeError, ValueError) as e:
+                    await ws_manager.send_personal_message(
+                        {"type": "error", "message": f"Invalid viewport: {e}"},
+                        client_id
+                    )
+                    continue
+                # Newly visible devices need their current state
+                if client_id in live_fleet.clients:
+                    await live_fleet.add_client(client_id)
+
+            elif message.get("type") == "resume":
+                # last_seq maps channel -> last seq the client received
+                try:
+                    last_seqs = {
+                        str(channel): int(last_seq)
+                        for channel, last_seq in (message.get("last_seq") or {}).items()
+                    }
+                except (AttributeError, TypeError, ValueError) as e:
+                    await ws_manager.send_personal_message(
+                        {"type": "error", "message": f"Invalid resume: {e}"},
+                        client_id
+                    )
+                    continue
+                for channel, last_seq in last_seqs.items():
+                    await realtime_bridge.resume(client_id, channel, last_seq)
+
+            elif message.get("type") == "fleet_ack":
+                try:
+                    version = int(message.get("version", 0))
+                except (TypeError, ValueError) as e:
+                    await ws_manager.send_personal_message(
+                        {"type": "error", "message": f"Invalid fleet_ack: {e}"},
+                        client_id
+                    )
+                    continue
+                live_fleet.ack(client_id, version)
+
+            elif message.get("type") == "fleet_resync":
+                await live_fleet.add_client(client_id)
+
             elif message.get("type") == "ping":
                 await ws_manager.send_personal_message(
                     {"type": "pong"},
@@ -48,7 +127,10 @@ async def websocket_endpoint(websocket: WebSocket):
                 )
 
     except WebSocketDisconnect:
-        ws_manager.disconnect(client_id)
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
+    finally:
         ws_manager.disconnect(client_id)
+        live_fleet.remove_client(client_id)
+        viewport_index.remove(client_id)
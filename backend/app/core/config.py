@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import json
 
 
@@ -11,6 +11,22 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    DATABASE_READ_URL: Optional[str] = None  # Replica for read-only endpoints
+    DATABASE_READ_MAX_LAG_SECONDS: float = 2.0  # Replica reads aren't cached this soon after a write
+    READ_YOUR_WRITES_SECONDS: int = 5  # Clients read from the primary this long after a write
+    DB_ECHO: bool = False  # Log every SQL statement
+    DB_POOL_SIZE: int = 10  # Connections kept open per engine and process
+    DB_MAX_OVERFLOW: int = 20  # Extra connections opened under load
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # Wait for a free connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Reopen connections older than this; -1 never
+    DB_POOL_PRE_PING: bool = True  # Check connections before handing them out
+    DB_STATEMENT_CACHE_SIZE: int = 100  # Prepared statements cached per connection
+    DB_PGBOUNCER: bool = False  # Disable statement caching for PgBouncer transaction pooling
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # Default per statement for API requests; 0 uses the server's
+    DB_READ_STATEMENT_TIMEOUT_MS: int = 10000  # List, history and latest reads
+    DB_INGEST_STATEMENT_TIMEOUT_MS: int = 5000  # Telemetry ingest
+    DB_EXPORT_STATEMENT_TIMEOUT_MS: int = 300000  # CSV export
+    DB_DISCONNECT_POLL_SECONDS: float = 0.5  # Running reads check this often for a gone client
 
     # Redis
     REDIS_URL: str
@@ -29,6 +45,64 @@ class Settings(BaseSettings):
     LOW_BATTERY_THRESHOLD: int = 20
     STALE_DEVICE_THRESHOLD_MINUTES: int = 15
     IMPACT_THRESHOLD_G: float = 3.0
+    IMPACT_WINDOW_MINUTES: int = 5
+    MOVING_SPEED_THRESHOLD_MPS: float = 0.5
+
+    # Anomaly Detection
+    ANOMALY_EWMA_ALPHA: float = 0.1
+    ANOMALY_WARMUP_READINGS: int = 10
+    ANOMALY_BACKFILL_MINUTES: int = 15
+    TEMP_SPIKE_ZSCORE: float = 4.0
+    TEMP_MIN_STDDEV_C: float = 0.5
+    MAX_PLAUSIBLE_SPEED_MPS: float = 40.0
+    BATTERY_DRAIN_PCT_PER_MIN: float = 2.0
+    BATTERY_DRAIN_MIN_INTERVAL_SECONDS: int = 60
+
+    # Rules
+    RULES_RELOAD_INTERVAL_SECONDS: float = 10.0
+    EVENT_COOLDOWN_SECONDS: int = 300
+    RULES_SHARD_COUNT: int = 1  # >1 fans detect_incidents out over Celery workers
+    RULES_LOCK_TIMEOUT_SECONDS: int = 300
+
+    # Event Suppression
+    SUPPRESSION_BACKEND: str = "redis"  # "redis" or "memory" (per process)
+    SUPPRESSION_LOCAL_TTL_SECONDS: float = 5.0
+    SUPPRESSION_ACTIVE_TTL_SECONDS: int = 86400  # Guards against missed acks; refreshed while open
+
+    # Events
+    EVENT_ACK_BATCH_SIZE: int = 5000  # Rows per UPDATE in bulk acknowledgement
+
+    # Devices
+    DEVICE_IMPORT_MAX_ROWS: int = 50000  # Per bulk or CSV import request
+
+    # Response Cache
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+
+    # Fleet Statistics
+    FLEET_STATS_RECONCILE_SECONDS: float = 300.0  # Rebuild counters from SQL
+    FLEET_STATS_LOCAL_TTL_SECONDS: float = 1.0
+
+    # Realtime
+    REALTIME_TICK_MS: int = 250  # Redis -> WebSocket batching window
+    REALTIME_RECONNECT_SECONDS: float = 1.0
+    REALTIME_REPLAY_BUFFER_SIZE: int = 1000  # Messages kept per channel for resume
+    FLEET_TICK_SECONDS: float = 1.0  # Delta interval for the "fleet" channel
+    VIEWPORT_CELL_DEGREES: float = 0.05  # Spatial index grid size
+    VIEWPORT_MAX_CELLS: int = 4096  # Larger viewports receive every update
+    VIEWPORT_MIN_ZOOM: int = 8
+
+    # WebSocket
+    WS_SCALE_OUT: bool = False  # Subscribe to Redis only for channels local clients use
+    WS_PRESENCE_INTERVAL_SECONDS: float = 5.0
+    WS_SEND_QUEUE_SIZE: int = 256  # Outbound messages buffered per client
+    WS_SLOW_CONSUMER_POLICY: str = "drop_oldest"  # "drop_oldest", "coalesce" or "disconnect"
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0
+
+    # Server-Sent Events
+    SSE_QUEUE_SIZE: int = 64  # Tick batches buffered per stream before it is closed
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+    SSE_RETRY_MS: int = 1000  # Reconnect delay suggested to clients
 
     class Config:
         env_file = ".env"
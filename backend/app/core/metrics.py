@@ -0,0 +1,76 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Any
+import threading
+import time
+
+
+class Metrics:
+    """In-process counters, gauges and timers.
+
+    Values are kept per process; the API exposes them at ``/metrics``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        # name -> [count, total_seconds, max_seconds]
+        self._timers: Dict[str, list] = {}
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] += value
+
+    def set(self, name: str, value: float) -> None:
+        """Set a gauge to an absolute value."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a duration."""
+        with self._lock:
+            timer = self._timers.get(name)
+            if timer is None:
+                self._timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                timer[2] = max(timer[2], seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time the enclosed block and record it under ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def counter(self, name: str) -> float:
+        """Current value of a counter."""
+        return self._counters.get(name, 0.0)
+
+    def timing(self, name: str) -> Dict[str, float]:
+        """Summary of a timer."""
+        count, total, maximum = self._timers.get(name, (0, 0.0, 0.0))
+        return {
+            "count": count,
+            "total_ms": total * 1000,
+            "avg_ms": (total / count * 1000) if count else 0.0,
+            "max_ms": maximum * 1000,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timers": {name: self.timing(name) for name in self._timers},
+            }
+
+
+# Global metrics instance
+metrics = Metrics()
@@ -0,0 +1,18 @@
+import asyncio
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+# Redis client, bound to the event loop it was created on
+redis_client = None
+_client_loop = None
+
+
+async def get_redis() -> redis.Redis:
+    """Get the Redis client for the running event loop."""
+    global redis_client, _client_loop
+    loop = asyncio.get_running_loop()
+    if redis_client is None or _client_loop is not loop:
+        redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        _client_loop = loop
+    return redis_client
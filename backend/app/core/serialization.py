@@ -0,0 +1,14 @@
+from typing import Iterable, Sequence
+import orjson
+
+# Matches Pydantic's JSON output: UTC datetimes end in "Z"
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def dump_rows(keys: Sequence[str], rows: Iterable[Sequence]) -> bytes:
+    """Encode column tuples as a JSON array of objects.
+
+    For bulk reads that select plain columns, so no ORM objects or Pydantic
+    models are built per row.
+    """
+    return orjson.dumps([dict(zip(keys, row)) for row in rows], option=ORJSON_OPTIONS)
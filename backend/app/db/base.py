@@ -1,12 +1,52 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.db.pool import create_engine
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+engine = create_engine(settings.DATABASE_URL, "primary")
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# Optional read replica for query endpoints; falls back to the primary
+if settings.DATABASE_READ_URL:
+    read_engine = create_engine(settings.DATABASE_READ_URL, "replica")
+    read_session_maker = async_sessionmaker(
+        read_engine, class_=AsyncSession, expire_on_commit=False, info={"replica": True}
+    )
+else:
+    read_engine = engine
+    read_session_maker = async_session_maker
+
 Base = declarative_base()
 
+# SQLSTATE of a statement stopped by statement_timeout
+QUERY_CANCELED = "57014"
+
+
+def is_replica(session: AsyncSession) -> bool:
+    """Whether a session reads from the replica, which may lag the primary."""
+    return session.info.get("replica", False)
+
+
+def set_statement_timeout(session: AsyncSession, timeout_ms: int) -> None:
+    """Limit every statement the session runs to ``timeout_ms``; 0 keeps the server's.
+
+    SET LOCAL only lasts for one transaction, so it is issued again each
+    time the session begins one, and stays correct behind PgBouncer.
+    """
+    if timeout_ms <= 0:
+        return
+
+    @event.listens_for(session.sync_session, "after_begin")
+    def apply_timeout(sync_session, transaction, connection):
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def is_statement_timeout(exc: DBAPIError) -> bool:
+    """Whether a database error is a statement that ran out of time."""
+    return getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED
+
 
 async def get_db() -> AsyncSession:
     """Dependency for getting async database sessions."""
@@ -5,8 +5,20 @@ Run this to populate the database with sample devices.
 
 import asyncio
 from app.db.base import async_session_maker, engine, Base
-from app.domain.models import Device
+from app.domain.models import Device, Rule
+from app.services.rules_compiler import default_rule_definitions
+from app.services.response_cache import response_cache, DEVICES
 from datetime import datetime
+from sqlalchemy import text
+
+# Seed device_latest_state from each device's newest reading
+BACKFILL_LATEST_STATE_SQL = """
+INSERT INTO device_latest_state (device_id, ts, lat, lon, battery_pct, speed_mps, temp_c, accel_g)
+SELECT DISTINCT ON (device_id) device_id, ts, lat, lon, battery_pct, speed_mps, temp_c, accel_g
+FROM telemetry_readings
+ORDER BY device_id, ts DESC
+ON CONFLICT (device_id) DO NOTHING
+"""
 
 
 async def init_db():
@@ -14,6 +26,24 @@ async def init_db():
     # Create tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        result = await conn.execute(text(BACKFILL_LATEST_STATE_SQL))
+        if result.rowcount:
+            print(f"Backfilled latest state for {result.rowcount} devices.")
+
+    # Seed any missing default rules from the Settings thresholds
+    async with async_session_maker() as session:
+        from sqlalchemy import select
+        result = await session.execute(select(Rule.name))
+        existing = set(result.scalars().all())
+        rules = [
+            Rule(**rule.model_dump())
+            for rule in default_rule_definitions()
+            if rule.name not in existing
+        ]
+        if rules:
+            session.add_all(rules)
+            await session.commit()
+            print(f"Seeded {len(rules)} default rules.")
 
     # Seed sample devices
     async with async_session_maker() as session:
@@ -69,6 +99,7 @@ async def init_db():
 
         session.add_all(sample_devices)
         await session.commit()
+        await response_cache.bump(DEVICES)
         print(f"Seeded {len(sample_devices)} sample devices.")
 
 
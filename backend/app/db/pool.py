@@ -0,0 +1,80 @@
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import Any, Dict
+from uuid import uuid4
+import time
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that times checkouts under ``db.<name>.checkout``.
+
+    The name is the pool's logging name, which survives ``dispose()``.
+    A checkout includes waiting for a free connection, opening an overflow
+    one and the pre-ping.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.inc(f"db.{self.logging_name}.checkout_timeouts")
+            raise
+        finally:
+            metrics.observe(f"db.{self.logging_name}.checkout", time.perf_counter() - start)
+
+
+def connect_args() -> Dict[str, Any]:
+    """asyncpg arguments for the configured statement caching."""
+    if settings.DB_PGBOUNCER:
+        # Transaction pooling hands each transaction a different server
+        # connection, so prepared statements can't be cached or reuse names
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def instrument(engine: AsyncEngine, name: str) -> None:
+    """Report how many connections are checked out and in overflow."""
+    sync_engine = engine.sync_engine
+
+    def record(*args) -> None:
+        # Read the engine's current pool, which dispose() replaces
+        pool = sync_engine.pool
+        metrics.set(f"db.{name}.checked_out", pool.checkedout())
+        metrics.set(f"db.{name}.overflow", max(pool.overflow(), 0))
+
+    def opened(*args) -> None:
+        metrics.inc(f"db.{name}.connections_opened")
+
+    event.listen(sync_engine, "checkout", record)
+    event.listen(sync_engine, "checkin", record)
+    event.listen(sync_engine, "connect", opened)
+
+
+def create_engine(url: str, name: str) -> AsyncEngine:
+    """Async engine with the configured, instrumented connection pool."""
+    engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args(),
+    )
+    instrument(engine, name)
+    return engine
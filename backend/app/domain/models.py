@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, TIMESTAMP, Integer, Float, Text, CheckConstraint, Index, ForeignKey, SmallInteger
+from sqlalchemy import Column, String, TIMESTAMP, Integer, Float, Text, CheckConstraint, Index, ForeignKey, SmallInteger, Boolean
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -28,6 +28,9 @@ class Device(Base):
     # Relationships
     telemetry_readings = relationship("TelemetryReading", back_populates="device", cascade="all, delete-orphan")
     events = relationship("Event", back_populates="device", cascade="all, delete-orphan")
+    latest_state = relationship(
+        "DeviceLatestState", back_populates="device", uselist=False, cascade="all, delete-orphan"
+    )
 
     __table_args__ = (
         Index('idx_devices_city_status', 'city', 'status'),
@@ -57,6 +60,29 @@ class TelemetryReading(Base):
     )
 
 
+class DeviceLatestState(Base):
+    """Latest known reading values per device, maintained at ingest."""
+    __tablename__ = "device_latest_state"
+
+    device_id = Column(Text, ForeignKey('devices.id', ondelete='CASCADE'), primary_key=True)
+    ts = Column(TIMESTAMP(timezone=True), nullable=False)
+    lat = Column(Float)
+    lon = Column(Float)
+    battery_pct = Column(SmallInteger)
+    speed_mps = Column(Float)
+    temp_c = Column(Float)
+    accel_g = Column(Float)
+
+    # Relationship
+    device = relationship("Device", back_populates="latest_state")
+
+    __table_args__ = (
+        Index('idx_latest_battery', 'battery_pct'),
+        Index('idx_latest_speed', 'speed_mps'),
+        Index('idx_latest_ts', 'ts'),
+    )
+
+
 class Event(Base):
     __tablename__ = "events"
 
@@ -88,3 +114,29 @@ class Event(Base):
             postgresql_where=((acknowledged_at.is_(None)) & (severity.in_(['warning', 'critical'])))
         ),
     )
+
+
+class Rule(Base):
+    __tablename__ = "rules"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(Text, nullable=False, unique=True)
+    event_type = Column(Text, nullable=False)
+    field = Column(Text, nullable=False)
+    comparator = Column(
+        Text,
+        CheckConstraint("comparator IN ('<', '<=', '>', '>=', '==', '!=')"),
+        nullable=False
+    )
+    threshold = Column(Float, nullable=False)
+    severity = Column(
+        Text,
+        CheckConstraint("severity IN ('info', 'warning', 'critical')"),
+        nullable=False
+    )
+    city = Column(Text)
+    model = Column(Text)
+    cooldown_seconds = Column(Integer, nullable=False, default=0)
+    enabled = Column(Boolean, nullable=False, default=True)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
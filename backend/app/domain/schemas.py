@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, field_validator
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 from uuid import UUID
 
@@ -24,6 +24,18 @@ class DeviceUpdate(BaseModel):
     status: Optional[str] = None
 
 
+class DeviceBulkError(BaseModel):
+    row: int  # 1-based position in the request, excluding any CSV header
+    id: Optional[str] = None
+    error: str
+
+
+class DeviceBulkResult(BaseModel):
+    created: int
+    updated: int
+    errors: List[DeviceBulkError] = []
+
+
 class DeviceResponse(DeviceBase):
     model_config = ConfigDict(from_attributes=True)
 
@@ -34,6 +46,22 @@ class DeviceResponse(DeviceBase):
     device_metadata: Dict[str, Any] = {}
 
 
+class DeviceLatestStateResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    ts: datetime
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    battery_pct: Optional[int] = None
+    speed_mps: Optional[float] = None
+    temp_c: Optional[float] = None
+    accel_g: Optional[float] = None
+
+
+class DeviceListItem(DeviceResponse):
+    latest_state: Optional[DeviceLatestStateResponse] = None
+
+
 # Telemetry Schemas
 class TelemetryReadingCreate(BaseModel):
     device_id: str
@@ -91,6 +119,102 @@ class EventAcknowledge(BaseModel):
     acknowledged_by: str
 
 
+class EventBulkAcknowledge(BaseModel):
+    acknowledged_by: str
+    event_ids: Optional[List[UUID]] = Field(None, max_length=10000)
+    # Blank filters are rejected so they are never mistaken for no filter
+    device_id: Optional[str] = Field(None, min_length=1)
+    type: Optional[str] = Field(None, min_length=1)
+    severity: Optional[str] = Field(None, min_length=1)
+    before: Optional[datetime] = None
+    return_rows: bool = False
+
+
+class EventBulkAcknowledgeResponse(BaseModel):
+    acknowledged: int
+    events: Optional[List[EventResponse]] = None
+
+
+# Rule Schemas
+Comparator = Literal["<", "<=", ">", ">=", "==", "!="]
+Severity = Literal["info", "warning", "critical"]
+# Event types are upper-case identifiers such as LOW_BATTERY
+EVENT_TYPE_PATTERN = r"^[A-Z0-9_]+$"
+
+
+class RuleBase(BaseModel):
+    name: str
+    event_type: str
+    field: str
+    comparator: Comparator
+    threshold: float
+    severity: Severity
+    city: Optional[str] = None
+    model: Optional[str] = None
+    cooldown_seconds: int = Field(0, ge=0)
+    enabled: bool = True
+
+
+class RuleCreate(RuleBase):
+    event_type: str = Field(pattern=EVENT_TYPE_PATTERN, max_length=64)
+
+
+class RuleUpdate(BaseModel):
+    event_type: Optional[str] = Field(None, pattern=EVENT_TYPE_PATTERN, max_length=64)
+    field: Optional[str] = None
+    comparator: Optional[Comparator] = None
+    threshold: Optional[float] = None
+    severity: Optional[Severity] = None
+    city: Optional[str] = None
+    model: Optional[str] = None
+    cooldown_seconds: Optional[int] = Field(None, ge=0)
+    enabled: Optional[bool] = None
+
+    @field_validator(
+        "event_type", "field", "comparator", "threshold", "severity", "cooldown_seconds", "enabled"
+    )
+    @classmethod
+    def not_null(cls, value):
+        # Only city and model may be cleared; the other columns are NOT NULL
+        if value is None:
+            raise ValueError("may be omitted but not null")
+        return value
+
+
+class RuleResponse(RuleBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class RuleStats(BaseModel):
+    name: str
+    evaluations: int
+    hits: int
+    avg_ms: float
+    max_ms: float
+    total_ms: float
+
+
+# Fleet Statistics Schemas
+class UnacknowledgedEventStats(BaseModel):
+    total: int
+    by_severity: Dict[str, int]
+    by_type: Dict[str, int]
+
+
+class FleetStatsResponse(BaseModel):
+    total_devices: int
+    by_status: Dict[str, int]
+    by_city: Dict[str, int]
+    by_model: Dict[str, int]
+    battery_histogram: Dict[str, int]
+    unacknowledged_events: UnacknowledgedEventStats
+    reconciled_at: Optional[datetime] = None
+
+
 # WebSocket Message Schemas
 class WebSocketMessage(BaseModel):
     type: str
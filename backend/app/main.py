@@ -1,17 +1,61 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
 from app.core.config import settings
-from app.core.logging import setup_logging
+from app.core.logging import setup_logging, get_logger
+from app.core.metrics import metrics
 from app.api.v1.router import api_router
+from app.api.deps import READ_PRIMARY_COOKIE
+from app.db.base import async_session_maker, is_statement_timeout
+from app.services.suppression_cache import suppression_cache
+from app.services.fleet_stats import fleet_stats
+from app.services.realtime_bridge import realtime_bridge
+from app.services.live_fleet import live_fleet
+from app.services.ws_presence import presence_registry
 
 # Setup logging
 setup_logging()
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm caches and start relaying realtime messages."""
+    try:
+        async with async_session_maker() as db:
+            await suppression_cache.warm(db)
+    except Exception as e:
+        logger.warning("Could not warm suppression cache: %s", e)
+
+    try:
+        async with async_session_maker() as db:
+            await fleet_stats.ensure_reconciled(db)
+    except Exception as e:
+        logger.warning("Could not build fleet stats: %s", e)
+
+    try:
+        async with async_session_maker() as db:
+            await live_fleet.load(db)
+    except Exception as e:
+        logger.warning("Could not load live fleet state: %s", e)
+
+    realtime_bridge.start()
+    live_fleet.start()
+    presence_registry.start()
+    yield
+    await presence_registry.stop()
+    await live_fleet.stop()
+    await realtime_bridge.stop()
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -23,6 +67,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.DATABASE_READ_URL:
+    @app.middleware("http")
+    async def pin_writers_to_primary(request: Request, call_next):
+        """Keep clients that just wrote on the primary so they read their writes."""
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE, "1", max_age=settings.READ_YOUR_WRITES_SECONDS, httponly=True
+            )
+        return response
+
+
+@app.exception_handler(DBAPIError)
+async def database_error(request: Request, exc: DBAPIError):
+    """Report statements stopped by their timeout as overload, not a server bug."""
+    if not is_statement_timeout(exc):
+        raise exc
+    metrics.inc("db.statement_timeouts")
+    logger.warning("Statement timeout on %s %s", request.method, request.url.path)
+    return JSONResponse(status_code=503, content={"detail": "Database query timed out"}, headers={"Retry-After": "1"})
+
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
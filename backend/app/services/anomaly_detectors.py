@@ -0,0 +1,202 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+import math
+import numpy as np
+
+from app.core.config import settings
+from app.domain.models import TelemetryReading
+from app.services.fleet_state import shard_filter_sql
+
+EARTH_RADIUS_M = 6371000.0
+
+# Column layout of one device row in DeviceStatsStore
+TEMP_N, TEMP_MEAN, TEMP_VAR, TEMP_Z = 0, 1, 2, 3
+FIX_LAT, FIX_LON, FIX_TS, FIX_SPEED = 4, 5, 6, 7
+BATT_PCT, BATT_TS, BATT_DRAIN = 8, 9, 10
+LAST_TS = 11
+NUM_COLUMNS = 12
+
+# Derived values exposed to rules, and the store column holding each
+DERIVED_COLUMNS = {
+    "temp_zscore": TEMP_Z,
+    "fix_speed_mps": FIX_SPEED,
+    "battery_drain_pct_per_min": BATT_DRAIN,
+}
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two fixes in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+class DeviceStatsStore:
+    """Per-device streaming statistics in one flat array of doubles.
+
+    Each device owns a fixed-size row of NUM_COLUMNS floats, addressed by a
+    dense device index, so memory per device is constant no matter how many
+    readings it sends. Updates are a handful of float operations:
+
+    - temperature: EWMA mean/variance and the |z-score| of the latest reading
+    - position: haversine velocity between consecutive fixes
+    - battery: EWMA drain rate in percent per minute
+    """
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self._data = array("d")
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _row(self, device_id: str) -> int:
+        i = self.index.get(device_id)
+        if i is None:
+            i = len(self.index)
+            self.index[device_id] = i
+            self._data.extend([0.0] * 3 + [math.nan] * (NUM_COLUMNS - 3))
+        return i * NUM_COLUMNS
+
+    def update(
+        self,
+        device_id: str,
+        ts: float,
+        lat: Optional[float] = None,
+        lon: Optional[float] = None,
+        battery_pct: Optional[float] = None,
+        temp_c: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """Fold a reading into the device's statistics and return derived values."""
+        d = self._data
+        base = self._row(device_id)
+        derived: Dict[str, float] = {}
+
+        # Out-of-order or duplicate readings would corrupt rates
+        if ts <= d[base + LAST_TS]:
+            return derived
+        d[base + LAST_TS] = ts
+        alpha = settings.ANOMALY_EWMA_ALPHA
+
+        if temp_c is not None:
+            n = d[base + TEMP_N]
+            mean = d[base + TEMP_MEAN]
+            if n == 0:
+                d[base + TEMP_MEAN] = temp_c
+            else:
+                var = d[base + TEMP_VAR]
+                delta = temp_c - mean
+                if n >= settings.ANOMALY_WARMUP_READINGS:
+                    std = max(math.sqrt(var), settings.TEMP_MIN_STDDEV_C)
+                    d[base + TEMP_Z] = derived["temp_zscore"] = abs(delta) / std
+                d[base + TEMP_MEAN] = mean + alpha * delta
+                d[base + TEMP_VAR] = (1 - alpha) * (var + alpha * delta * delta)
+            d[base + TEMP_N] = n + 1
+
+        if lat is not None and lon is not None:
+            last_ts = d[base + FIX_TS]
+            if last_ts == last_ts:  # not NaN
+                distance = haversine_m(d[base + FIX_LAT], d[base + FIX_LON], lat, lon)
+                d[base + FIX_SPEED] = derived["fix_speed_mps"] = distance / (ts - last_ts)
+            d[base + FIX_LAT] = lat
+            d[base + FIX_LON] = lon
+            d[base + FIX_TS] = ts
+
+        if battery_pct is not None:
+            last_ts = d[base + BATT_TS]
+            if last_ts != last_ts:  # NaN: first reading
+                d[base + BATT_PCT] = battery_pct
+                d[base + BATT_TS] = ts
+            elif ts - last_ts >= settings.BATTERY_DRAIN_MIN_INTERVAL_SECONDS:
+                # Battery is reported in whole percent, so rates are only
+                # sampled over a minimum interval to smooth quantization
+                rate = (d[base + BATT_PCT] - battery_pct) / ((ts - last_ts) / 60)
+                drain = d[base + BATT_DRAIN]
+                if rate < 0:
+                    # Charging resets the drain estimate
+                    drain = 0.0
+                elif drain != drain:
+                    drain = rate
+                else:
+                    drain += alpha * (rate - drain)
+                d[base + BATT_DRAIN] = derived["battery_drain_pct_per_min"] = drain
+                d[base + BATT_PCT] = battery_pct
+                d[base + BATT_TS] = ts
+
+        return derived
+
+    def update_from_reading(self, reading) -> Dict[str, float]:
+        """Fold a telemetry reading (ORM or schema) into the store."""
+        ts = reading.ts
+        if ts.tzinfo is None:
+            # Naive ingest timestamps are UTC, like the stored ones catch_up reads
+            ts = ts.replace(tzinfo=timezone.utc)
+        return self.update(
+            reading.device_id,
+            ts.timestamp(),
+            lat=reading.lat,
+            lon=reading.lon,
+            battery_pct=reading.battery_pct,
+            temp_c=reading.temp_c,
+        )
+
+    def columns(self, device_ids: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Latest derived values aligned with ``device_ids``; NaN where unknown."""
+        rows = np.fromiter((self.index.get(d, -1) for d in device_ids), dtype=np.int64)
+        data = np.frombuffer(self._data, dtype=np.float64).reshape(-1, NUM_COLUMNS)
+        known = rows >= 0
+
+        result = {}
+        for name, column in DERIVED_COLUMNS.items():
+            values = np.full(len(rows), np.nan)
+            values[known] = data[rows[known], column]
+            result[name] = values
+        del data
+        return result
+
+
+class AnomalyService:
+    # Readings newer than these were already folded into anomaly_store,
+    # tracked per shard since any worker process may run any shard
+    watermarks: Dict[Optional[Tuple[int, int]], datetime] = {}
+
+    @staticmethod
+    async def catch_up(db: AsyncSession, shard: Optional[Tuple[int, int]] = None) -> int:
+        """Fold readings ingested since the last batch pass into ``anomaly_store``."""
+        since = AnomalyService.watermarks.get(shard) or (
+            datetime.utcnow() - timedelta(minutes=settings.ANOMALY_BACKFILL_MINUTES)
+        )
+        query = (
+            select(
+                TelemetryReading.device_id,
+                TelemetryReading.ts,
+                TelemetryReading.lat,
+                TelemetryReading.lon,
+                TelemetryReading.battery_pct,
+                TelemetryReading.temp_c,
+            )
+            .where(TelemetryReading.ts > since)
+            .order_by(TelemetryReading.ts)
+        )
+        if shard:
+            query = query.where(
+                text(shard_filter_sql("telemetry_readings.device_id"))
+                .bindparams(shard=shard[0], num_shards=shard[1])
+            )
+        result = await db.execute(query)
+
+        count = 0
+        for device_id, ts, lat, lon, battery_pct, temp_c in result:
+            anomaly_store.update(device_id, ts.timestamp(), lat, lon, battery_pct, temp_c)
+            AnomalyService.watermarks[shard] = ts
+            count += 1
+        return count
+
+
+# Global per-process statistics store
+anomaly_store = DeviceStatsStore()
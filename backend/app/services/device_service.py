@@ -1,11 +1,53 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, text
+from sqlalchemy.orm import contains_eager
 from sqlalchemy.sql import func
-from typing import Optional, List
-from datetime import datetime
+from typing import AsyncIterator, Optional, List, Tuple
+from datetime import datetime, timedelta, timezone
+import csv
+import io
 
-from app.domain.models import Device
-from app.domain.schemas import DeviceCreate, DeviceUpdate
+from app.core.config import settings
+from app.domain.models import Device, DeviceLatestState
+from app.domain.schemas import DeviceBulkError, DeviceBulkResult, DeviceCreate, DeviceUpdate
+from app.services.response_cache import response_cache, DEVICES, telemetry_resource
+from app.services.fleet_stats import fleet_stats
+
+# Columns staged by bulk imports, in COPY order
+IMPORT_COLUMNS = ("id", "name", "model", "firmware_version", "city")
+
+CREATE_IMPORT_TABLE_SQL = """
+CREATE TEMP TABLE device_import (
+    id text, name text, model text, firmware_version text, city text
+) ON COMMIT DROP
+"""
+
+# status and device_metadata have Python-side defaults, so set them here.
+# xmax is 0 for freshly inserted rows and non-zero for updated ones.
+UPSERT_IMPORT_SQL = """
+INSERT INTO devices (id, name, model, firmware_version, city, status, device_metadata)
+SELECT id, name, model, firmware_version, city, 'offline', '{{}}'::jsonb
+FROM device_import
+ON CONFLICT (id) DO {action}
+RETURNING id, xmax = 0 AS inserted
+"""
+
+UPSERT_IMPORT_UPDATE = """UPDATE SET
+    name = excluded.name,
+    model = excluded.model,
+    firmware_version = excluded.firmware_version,
+    city = excluded.city"""
+
+# Columns written by the CSV export; the import reads the first five
+EXPORT_COLUMNS = IMPORT_COLUMNS + ("status", "created_at", "last_seen_at")
+EXPORT_BATCH_SIZE = 1000
+
+# Sort keys accepted by get_devices; a leading "-" sorts descending
+DEVICE_SORT_COLUMNS = {
+    "battery_pct": DeviceLatestState.battery_pct,
+    "speed_mps": DeviceLatestState.speed_mps,
+    "last_reading_at": DeviceLatestState.ts,
+}
 
 
 class DeviceService:
@@ -16,8 +58,99 @@ class DeviceService:
         db.add(db_device)
         await db.commit()
         await db.refresh(db_device)
+        await response_cache.bump(DEVICES)
+        await fleet_stats.update_device(
+            db_device.id, create=True,
+            status=db_device.status, city=db_device.city, model=db_device.model
+        )
         return db_device
 
+    @staticmethod
+    async def import_devices(
+        db: AsyncSession,
+        rows: List[Tuple[int, DeviceCreate]],
+        errors: Optional[List[DeviceBulkError]] = None,
+        on_conflict: str = "skip"
+    ) -> DeviceBulkResult:
+        """Create, or with ``on_conflict="update"`` overwrite, many devices at once.
+
+        Rows are (row number, device). They are staged into a temporary
+        table with COPY and upserted in a single statement. Errors already
+        found by the caller are passed through. Repeated IDs and, when
+        skipping, existing devices are reported per row.
+        """
+        errors = list(errors or [])
+        devices = {}
+        for row, device in rows:
+            if device.id in devices:
+                errors.append(DeviceBulkError(row=row, id=device.id, error="Duplicate id in request"))
+            else:
+                devices[device.id] = (row, device)
+
+        if not devices:
+            return DeviceBulkResult(created=0, updated=0, errors=sorted(errors, key=lambda e: e.row))
+
+        await db.execute(text(CREATE_IMPORT_TABLE_SQL))
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "device_import",
+            records=[tuple(getattr(device, name) for name in IMPORT_COLUMNS) for _, device in devices.values()],
+            columns=IMPORT_COLUMNS,
+        )
+        action = UPSERT_IMPORT_UPDATE if on_conflict == "update" else "NOTHING"
+        result = await db.execute(text(UPSERT_IMPORT_SQL.format(action=action)))
+        written = {device_id: inserted for device_id, inserted in result}
+        await db.commit()
+
+        for device_id, (row, _) in devices.items():
+            if device_id not in written:
+                errors.append(DeviceBulkError(row=row, id=device_id, error="Device already exists"))
+
+        created = [device_id for device_id, inserted in written.items() if inserted]
+        updated = [device_id for device_id, inserted in written.items() if not inserted]
+        if written:
+            await response_cache.bump(DEVICES)
+            await fleet_stats.update_many(
+                [(device_id, {"status": "offline", "city": devices[device_id][1].city,
+                              "model": devices[device_id][1].model}) for device_id in created],
+                create=True
+            )
+            await fleet_stats.update_many(
+                (device_id, {"city": devices[device_id][1].city, "model": devices[device_id][1].model})
+                for device_id in updated
+            )
+
+        return DeviceBulkResult(
+            created=len(created),
+            updated=len(updated),
+            errors=sorted(errors, key=lambda e: e.row)
+        )
+
+    @staticmethod
+    async def export_devices_csv(db: AsyncSession) -> AsyncIterator[str]:
+        """Stream the device registry as CSV, a batch of rows at a time."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+
+        query = (
+            select(*(Device.__table__.c[name] for name in EXPORT_COLUMNS))
+            .order_by(Device.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            writer.writerows(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                for row in rows
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
     @staticmethod
     async def get_device(db: AsyncSession, device_id: str) -> Optional[Device]:
         """Get a device by ID."""
@@ -31,15 +164,41 @@ class DeviceService:
         limit: int = 100,
         city: Optional[str] = None,
         status: Optional[str] = None,
-        battery_lt: Optional[int] = None
+        battery_lt: Optional[int] = None,
+        moving: Optional[bool] = None,
+        stale_for: Optional[int] = None,
+        sort: Optional[str] = None
     ) -> List[Device]:
-        """Get all devices with optional filters."""
-        query = select(Device)
+        """Get all devices with optional filters, with their latest state loaded.
+
+        ``stale_for`` is in minutes since the last reading. Filters and sorts
+        on the latest state use the indexes on device_latest_state.
+        """
+        query = (
+            select(Device)
+            .outerjoin(Device.latest_state)
+            .options(contains_eager(Device.latest_state))
+        )
 
         if city:
             query = query.where(Device.city == city)
         if status:
             query = query.where(Device.status == status)
+        if battery_lt is not None:
+            query = query.where(DeviceLatestState.battery_pct < battery_lt)
+        if moving is not None:
+            threshold = settings.MOVING_SPEED_THRESHOLD_MPS
+            query = query.where(
+                DeviceLatestState.speed_mps >= threshold if moving
+                else DeviceLatestState.speed_mps < threshold
+            )
+        if stale_for is not None:
+            cutoff = datetime.now(timezone.utc) - timedelta(minutes=stale_for)
+            query = query.where(DeviceLatestState.ts < cutoff)
+        if sort:
+            column = DEVICE_SORT_COLUMNS[sort.lstrip("-")]
+            order = column.desc() if sort.startswith("-") else column.asc()
+            query = query.order_by(order.nulls_last(), Device.id)
 
         query = query.offset(skip).limit(limit)
         result = await db.execute(query)
@@ -64,6 +223,11 @@ class DeviceService:
         )
         result = await db.execute(stmt)
         await db.commit()
+        await response_cache.bump(DEVICES)
+        await fleet_stats.update_device(
+            device_id,
+            **{name: update_data[name] for name in ("status", "city", "model") if name in update_data}
+        )
         return result.scalar_one_or_none()
 
     @staticmethod
@@ -72,15 +236,28 @@ class DeviceService:
         stmt = delete(Device).where(Device.id == device_id)
         result = await db.execute(stmt)
         await db.commit()
+        await response_cache.bump(DEVICES, telemetry_resource(device_id))
+        await fleet_stats.remove_device(device_id)
         return result.rowcount > 0
 
     @staticmethod
     async def update_last_seen(db: AsyncSession, device_id: str, timestamp: datetime) -> None:
-        """Update the last_seen_at timestamp for a device."""
+        """Update the last_seen_at timestamp for a device.
+
+        Cached device lists are only invalidated when the device comes back
+        online; a newer last_seen_at alone waits for the cache TTL.
+        """
+        # Join the row to itself to read the status from before the update
+        previous = Device.__table__.alias("previous")
         stmt = (
             update(Device)
-            .where(Device.id == device_id)
+            .where(Device.id == device_id, previous.c.id == Device.id)
             .values(last_seen_at=timestamp, status='online')
+            .returning(previous.c.status)
+            .execution_options(synchronize_session=False)
         )
-        await db.execute(stmt)
+        result = await db.execute(stmt)
+        previous_status = result.scalar_one_or_none()
         await db.commit()
+        if previous_status is not None and previous_status != 'online':
+            await response_cache.bump(DEVICES)
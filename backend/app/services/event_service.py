@@ -1,11 +1,16 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime
 from uuid import UUID
 
+from app.core.config import settings
+
 from app.domain.models import Event
 from app.domain.schemas import EventCreate
+from app.services.suppression_cache import suppression_cache
+from app.services.response_cache import response_cache, EVENTS
+from app.services.fleet_stats import fleet_stats
 
 
 class EventService:
@@ -16,8 +21,23 @@ class EventService:
         db.add(db_event)
         await db.commit()
         await db.refresh(db_event)
+        await suppression_cache.mark_active([(db_event.device_id, db_event.type)])
+        await response_cache.bump(EVENTS)
+        await fleet_stats.events_created([(db_event.severity, db_event.type)])
         return db_event
 
+    @staticmethod
+    async def create_events(db: AsyncSession, events: List[EventCreate]) -> List[Event]:
+        """Create several events in a single transaction."""
+        db_events = [Event(**event.model_dump()) for event in events]
+        db.add_all(db_events)
+        await db.commit()
+        await suppression_cache.mark_active([(e.device_id, e.type) for e in db_events])
+        if db_events:
+            await response_cache.bump(EVENTS)
+            await fleet_stats.events_created([(e.severity, e.type) for e in db_events])
+        return db_events
+
     @staticmethod
     async def get_event(db: AsyncSession, event_id: UUID) -> Optional[Event]:
         """Get an event by ID."""
@@ -60,6 +80,12 @@ class EventService:
         acknowledged_by: str
     ) -> Optional[Event]:
         """Acknowledge an event."""
+        # Lock the row so only the first acknowledgement is counted
+        previous = await db.execute(
+            select(Event.acknowledged_at).where(Event.id == event_id).with_for_update()
+        )
+        was_acknowledged = previous.scalar_one_or_none() is not None
+
         stmt = (
             update(Event)
             .where(Event.id == event_id)
@@ -68,4 +94,66 @@ class EventService:
         )
         result = await db.execute(stmt)
         await db.commit()
-        return result.scalar_one_or_none()
+        event = result.scalar_one_or_none()
+        if event:
+            await suppression_cache.clear_active([(event.device_id, event.type)])
+            await response_cache.bump(EVENTS)
+            if not was_acknowledged:
+                await fleet_stats.events_acknowledged([(event.severity, event.type)])
+        return event
+
+    @staticmethod
+    async def acknowledge_events(
+        db: AsyncSession,
+        acknowledged_by: str,
+        event_ids: Optional[List[UUID]] = None,
+        device_id: Optional[str] = None,
+        type: Optional[str] = None,
+        severity: Optional[str] = None,
+        before: Optional[datetime] = None,
+        return_rows: bool = False
+    ) -> Tuple[int, list]:
+        """Acknowledge every open event matching the IDs and filters.
+
+        Runs set-based UPDATEs of up to EVENT_ACK_BATCH_SIZE rows, each in
+        its own transaction so locks stay short, then invalidates caches and
+        counters once. Returns the number acknowledged, and the updated rows
+        if ``return_rows`` is set.
+        """
+        table = Event.__table__
+        candidates = select(table.c.id).where(table.c.acknowledged_at.is_(None))
+        if event_ids is not None:
+            candidates = candidates.where(table.c.id.in_(event_ids))
+        if device_id is not None:
+            candidates = candidates.where(table.c.device_id == device_id)
+        if type is not None:
+            candidates = candidates.where(table.c.type == type)
+        if severity is not None:
+            candidates = candidates.where(table.c.severity == severity)
+        if before is not None:
+            candidates = candidates.where(table.c.ts < before)
+
+        batch_size = settings.EVENT_ACK_BATCH_SIZE
+        batch = candidates.limit(batch_size).with_for_update(skip_locked=True).scalar_subquery()
+        returning = list(table.c) if return_rows else [table.c.device_id, table.c.type, table.c.severity]
+        stmt = (
+            update(table)
+            .where(table.c.id.in_(batch))
+            .values(acknowledged_at=datetime.utcnow(), acknowledged_by=acknowledged_by)
+            .returning(*returning)
+        )
+
+        acknowledged = []
+        while True:
+            result = await db.execute(stmt)
+            rows = result.all()
+            await db.commit()
+            acknowledged.extend(rows)
+            if len(rows) < batch_size:
+                break
+
+        if acknowledged:
+            await suppression_cache.clear_active(list({(row.device_id, row.type) for row in acknowledged}))
+            await response_cache.bump(EVENTS)
+            await fleet_stats.events_acknowledged([(row.severity, row.type) for row in acknowledged])
+        return len(acknowledged), acknowledged if return_rows else []
@@ -0,0 +1,187 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import BigInteger, Text, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql import text
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+from app.core.config import settings
+
+
+# Bit flags for the open_events column. A set bit means the device already
+# has an active event of that type, so the rule must not fire again. Event
+# types introduced by declarative rules are assigned a bit on first use.
+EVENT_BITS = {
+    "LOW_BATTERY": 1 << 0,
+    "STALE": 1 << 1,
+    "IMPACT": 1 << 2,
+    "GEOFENCE": 1 << 3,
+}
+
+
+def event_bit(event_type: str) -> int:
+    """Return the open_events flag for an event type, assigning one if needed."""
+    if event_type not in EVENT_BITS:
+        if len(EVENT_BITS) >= 63:
+            raise ValueError("Too many distinct event types for the open-event bitmask")
+        EVENT_BITS[event_type] = 1 << len(EVENT_BITS)
+    return EVENT_BITS[event_type]
+
+
+@dataclass
+class FleetState:
+    """Columnar snapshot of the latest per-device state.
+
+    Every column is a NumPy array of the same length, indexed by device
+    position in ``device_ids``. Missing values are NaN, so threshold
+    comparisons against them are simply False.
+    """
+
+    device_ids: np.ndarray
+    city: np.ndarray
+    model: np.ndarray
+    online: np.ndarray
+    last_seen: np.ndarray
+    battery: np.ndarray
+    speed: np.ndarray
+    temp: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    accel: np.ndarray
+    accel_ts: np.ndarray
+    accel_lat: np.ndarray
+    accel_lon: np.ndarray
+    open_events: np.ndarray
+    # Streaming anomaly statistics aligned with device_ids, keyed by field name
+    derived: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.device_ids)
+
+    def derived_column(self, name: str) -> np.ndarray:
+        """A derived column, or all-NaN if the batch pass didn't provide it."""
+        column = self.derived.get(name)
+        if column is None:
+            column = np.full(len(self), np.nan)
+        return column
+
+    def has_open(self, event_type: str) -> np.ndarray:
+        """Boolean mask of devices with an active event of the given type."""
+        return (self.open_events & event_bit(event_type)) != 0
+
+    @classmethod
+    def from_columns(cls, columns) -> "FleetState":
+        """Build the state from the per-column lists returned by ``FleetStateService.load``."""
+        columns = [column or [] for column in columns]
+        return cls(
+            device_ids=np.array(columns[0], dtype=object),
+            city=np.array(columns[1], dtype=object),
+            model=np.array(columns[2], dtype=object),
+            online=np.array(columns[3], dtype=bool),
+            last_seen=np.array(columns[4], dtype=np.float64),
+            battery=np.array(columns[5], dtype=np.float32),
+            speed=np.array(columns[6], dtype=np.float64),
+            temp=np.array(columns[7], dtype=np.float64),
+            lat=np.array(columns[8], dtype=np.float64),
+            lon=np.array(columns[9], dtype=np.float64),
+            accel=np.array(columns[10], dtype=np.float64),
+            accel_ts=np.array(columns[11], dtype=np.float64),
+            accel_lat=np.array(columns[12], dtype=np.float64),
+            accel_lon=np.array(columns[13], dtype=np.float64),
+            open_events=np.array(columns[14], dtype=np.int64),
+        )
+
+
+def shard_filter_sql(column: str) -> str:
+    """Predicate selecting the rows whose device falls in shard :shard of :num_shards.
+
+    hashtext is stable across processes, unlike Python's salted hash().
+    """
+    return f"(hashtext({column})::bigint + 2147483648) % :num_shards = :shard"
+
+
+# Maps an event type to its EVENT_BITS flag. Types are bound as parameters,
+# never formatted into the SQL, since rules can introduce arbitrary names.
+OPEN_EVENTS_MASK_SQL = "COALESCE((:event_bits)[array_position(:event_types, type)], 0)"
+
+
+class FleetStateService:
+    @staticmethod
+    async def load(db: AsyncSession, shard: Optional[Tuple[int, int]] = None) -> FleetState:
+        """Load the latest state of every device in a single round trip.
+
+        ``shard`` is ``(index, count)`` and restricts the load to one
+        partition of the fleet.
+        """
+        shard_filter = f"WHERE {shard_filter_sql('d.id')}" if shard else ""
+        # Latest position/battery and the peak acceleration inside the impact
+        # window come from index-backed lateral lookups on idx_device_ts.
+        # Open events are folded into a bitmask per device. IMPACT counts as
+        # open if one was raised inside the window, acknowledged or not, so a
+        # single crash is only reported once. The outer array_agg returns one
+        # array per column, so no row-to-column transposition happens in Python.
+        query = text(f"""
+        WITH fleet AS (
+            SELECT
+                d.id,
+                d.city,
+                d.model,
+                d.status != 'offline' AS online,
+                EXTRACT(EPOCH FROM d.last_seen_at)::float8 AS last_seen,
+                latest.battery_pct,
+                latest.speed_mps,
+                latest.temp_c,
+                latest.lat,
+                latest.lon,
+                peak.accel_g,
+                EXTRACT(EPOCH FROM peak.ts)::float8 AS accel_ts,
+                peak.lat AS accel_lat,
+                peak.lon AS accel_lon,
+                COALESCE(open_events.mask, 0) AS open_events
+            FROM devices d
+            LEFT JOIN LATERAL (
+                SELECT battery_pct, speed_mps, temp_c, lat, lon
+                FROM telemetry_readings t
+                WHERE t.device_id = d.id AND t.battery_pct IS NOT NULL
+                ORDER BY t.ts DESC
+                LIMIT 1
+            ) latest ON true
+            LEFT JOIN LATERAL (
+                SELECT accel_g, ts, lat, lon
+                FROM telemetry_readings t
+                WHERE t.device_id = d.id AND t.ts >= :impact_since AND t.accel_g IS NOT NULL
+                ORDER BY t.accel_g DESC
+                LIMIT 1
+            ) peak ON true
+            LEFT JOIN (
+                SELECT device_id, bit_or({OPEN_EVENTS_MASK_SQL}) AS mask
+                FROM events
+                WHERE acknowledged_at IS NULL
+                   OR (type = 'IMPACT' AND ts >= :impact_since)
+                GROUP BY device_id
+            ) open_events ON open_events.device_id = d.id
+            {shard_filter}
+        )
+        SELECT
+            array_agg(id), array_agg(city), array_agg(model),
+            array_agg(online), array_agg(last_seen), array_agg(battery_pct),
+            array_agg(speed_mps), array_agg(temp_c), array_agg(lat), array_agg(lon),
+            array_agg(accel_g), array_agg(accel_ts), array_agg(accel_lat),
+            array_agg(accel_lon), array_agg(open_events)
+        FROM fleet
+        """).bindparams(
+            bindparam("event_types", type_=ARRAY(Text)),
+            bindparam("event_bits", type_=ARRAY(BigInteger)),
+        )
+
+        params = {
+            "impact_since": datetime.utcnow() - timedelta(minutes=settings.IMPACT_WINDOW_MINUTES),
+            "event_types": list(EVENT_BITS),
+            "event_bits": list(EVENT_BITS.values()),
+        }
+        if shard:
+            params.update(shard=shard[0], num_shards=shard[1])
+        result = await db.execute(query, params)
+        return FleetState.from_columns(result.one())
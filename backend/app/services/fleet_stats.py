@@ -0,0 +1,264 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, text
+from datetime import datetime, timezone
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import time
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.redis import get_redis
+from app.domain.models import Event
+
+logger = get_logger(__name__)
+
+# Aggregate counters, e.g. "status:online" or "events:severity:critical"
+COUNTS_KEY = "fleet:stats:counts"
+# device_id -> JSON of the status, city, model and battery it is counted under
+DEVICES_KEY = "fleet:stats:devices"
+RECONCILED_AT_KEY = "fleet:stats:reconciled_at"
+
+# Device dimensions, in the order they are reported
+DIMENSIONS = ("status", "city", "model", "battery")
+UNKNOWN = "unknown"
+BATTERY_BUCKET_PCT = 10
+
+# Moves one device between counters. ARGV[2] holds the changed dimensions
+# as JSON, or is empty to remove the device. Devices that aren't tracked
+# yet are only added when ARGV[3] is "1"; otherwise the next reconcile
+# picks them up with all their dimensions.
+UPDATE_DEVICE_SCRIPT = """
+local old = redis.call("HGET", KEYS[2], ARGV[1])
+if not old and ARGV[3] ~= "1" then
+    return 0
+end
+local current = old and cjson.decode(old) or {}
+local updated = {}
+if ARGV[2] ~= "" then
+    for k, v in pairs(current) do updated[k] = v end
+    for k, v in pairs(cjson.decode(ARGV[2])) do updated[k] = v end
+end
+for k, v in pairs(current) do
+    if updated[k] ~= v and redis.call("HINCRBY", KEYS[1], k .. ":" .. v, -1) <= 0 then
+        redis.call("HDEL", KEYS[1], k .. ":" .. v)
+    end
+end
+for k, v in pairs(updated) do
+    if current[k] ~= v then
+        redis.call("HINCRBY", KEYS[1], k .. ":" .. v, 1)
+    end
+end
+if ARGV[2] ~= "" then
+    redis.call("HSET", KEYS[2], ARGV[1], cjson.encode(updated))
+else
+    redis.call("HDEL", KEYS[2], ARGV[1])
+end
+return 1
+"""
+
+RECONCILE_DEVICES_SQL = """
+SELECT d.id, d.status, d.city, d.model, s.battery_pct
+FROM devices d
+LEFT JOIN device_latest_state s ON s.device_id = d.id
+"""
+
+
+def battery_bucket(battery_pct: Optional[int]) -> str:
+    """Histogram bucket label of a battery level, e.g. "20-29"."""
+    if battery_pct is None:
+        return UNKNOWN
+    low = min(int(battery_pct) // BATTERY_BUCKET_PCT * BATTERY_BUCKET_PCT, 100 - BATTERY_BUCKET_PCT)
+    high = 100 if low == 100 - BATTERY_BUCKET_PCT else low + BATTERY_BUCKET_PCT - 1
+    return f"{low}-{high}"
+
+
+BATTERY_BUCKETS = [battery_bucket(pct) for pct in range(0, 100, BATTERY_BUCKET_PCT)]
+
+
+def _event_fields(severity: str, type: str) -> Tuple[str, str]:
+    return f"events:severity:{severity}", f"events:type:{type}"
+
+
+class FleetStats:
+    """Fleet-wide counters for the dashboard, maintained incrementally.
+
+    Device counts by status, city, model and battery bucket, and open
+    events by severity and type, live in a Redis hash that ingest, device
+    writes, the offline sweep and event creation and acknowledgement
+    adjust as they happen. A second hash remembers which buckets each
+    device is counted in, so a change moves it between buckets atomically
+    in a Lua script. Reads cost a single round trip regardless of fleet
+    size, and each process keeps the result for FLEET_STATS_LOCAL_TTL_SECONDS.
+
+    Updates that fail, or that race a reconcile, can leave the counters
+    slightly off until the next periodic reconcile rebuilds them from SQL.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+
+    async def update_device(self, device_id: str, create: bool = False, **fields: Any) -> None:
+        """Recount a device after a write; None values leave a dimension as is."""
+        await self.update_devices([device_id], create=create, **fields)
+
+    async def update_devices(self, device_ids: Iterable[str], create: bool = False, **fields: Any) -> None:
+        """Apply the same change to several devices in one round trip."""
+        changes = self._changes(fields, create)
+        await self._run_updates([(device_id, changes, create) for device_id in device_ids])
+
+    async def update_many(self, updates: Iterable[Tuple[str, Dict[str, Any]]], create: bool = False) -> None:
+        """Apply a different change to each of several devices in one round trip."""
+        await self._run_updates([
+            (device_id, self._changes(fields, create), create) for device_id, fields in updates
+        ])
+
+    async def remove_device(self, device_id: str) -> None:
+        """Stop counting a deleted device."""
+        await self._run_updates([(device_id, "", False)])
+
+    @staticmethod
+    def _changes(fields: Dict[str, Any], create: bool) -> str:
+        fields = dict(fields)
+        if "battery" in fields:
+            fields["battery"] = battery_bucket(fields["battery"]) if fields["battery"] is not None else None
+        if create:
+            fields = {name: fields.get(name) or UNKNOWN for name in DIMENSIONS}
+        return json.dumps({name: value for name, value in fields.items() if value is not None})
+
+    async def _run_updates(self, updates: List[Tuple[str, str, bool]]) -> None:
+        if not updates:
+            return
+        try:
+            r = await get_redis()
+            script = r.register_script(UPDATE_DEVICE_SCRIPT)
+            pipe = r.pipeline(transaction=False)
+            for device_id, changes, create in updates:
+                await script(keys=[COUNTS_KEY, DEVICES_KEY], args=[device_id, changes, int(create)], client=pipe)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("Fleet stats device update failed: %s", e)
+
+    async def events_created(self, events: List[Tuple[str, str]]) -> None:
+        """Count new unacknowledged events, given as (severity, type)."""
+        await self._count_events(events, 1)
+
+    async def events_acknowledged(self, events: List[Tuple[str, str]]) -> None:
+        """Stop counting acknowledged events, given as (severity, type)."""
+        await self._count_events(events, -1)
+
+    async def _count_events(self, events: List[Tuple[str, str]], delta: int) -> None:
+        if not events:
+            return
+        # Bulk acknowledgements touch few distinct fields
+        fields = Counter(field for severity, type in events for field in _event_fields(severity, type))
+        try:
+            r = await get_redis()
+            pipe = r.pipeline(transaction=False)
+            for field, count in fields.items():
+                pipe.hincrby(COUNTS_KEY, field, delta * count)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("Fleet stats event update failed: %s", e)
+
+    async def reconcile(self, db: AsyncSession) -> int:
+        """Rebuild every counter from SQL; return the number of devices."""
+        counts: Dict[str, int] = {}
+        devices: Dict[str, str] = {}
+        with metrics.timer("fleet_stats.reconcile"):
+            result = await db.execute(text(RECONCILE_DEVICES_SQL))
+            for device_id, status, city, model, battery_pct in result:
+                dimensions = {
+                    "status": status or UNKNOWN,
+                    "city": city or UNKNOWN,
+                    "model": model or UNKNOWN,
+                    "battery": battery_bucket(battery_pct),
+                }
+                devices[device_id] = json.dumps(dimensions)
+                for name, value in dimensions.items():
+                    field = f"{name}:{value}"
+                    counts[field] = counts.get(field, 0) + 1
+
+            query = (
+                select(Event.severity, Event.type, func.count())
+                .where(Event.acknowledged_at.is_(None))
+                .group_by(Event.severity, Event.type)
+            )
+            for severity, type, count in await db.execute(query):
+                for field in _event_fields(severity, type):
+                    counts[field] = counts.get(field, 0) + count
+
+            r = await get_redis()
+            pipe = r.pipeline(transaction=True)
+            pipe.delete(COUNTS_KEY, DEVICES_KEY)
+            if counts:
+                pipe.hset(COUNTS_KEY, mapping=counts)
+            if devices:
+                pipe.hset(DEVICES_KEY, mapping=devices)
+            pipe.set(RECONCILED_AT_KEY, datetime.now(timezone.utc).isoformat())
+            await pipe.execute()
+
+        self._snapshot = None
+        logger.info("Fleet stats reconciled for %d devices", len(devices))
+        return len(devices)
+
+    async def ensure_reconciled(self, db: AsyncSession) -> None:
+        """Build the counters if they have never been built."""
+        r = await get_redis()
+        if not await r.exists(RECONCILED_AT_KEY):
+            await self.reconcile(db)
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """Current statistics, or the last known ones if Redis is unavailable."""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._fetched_at < settings.FLEET_STATS_LOCAL_TTL_SECONDS:
+            return self._snapshot
+
+        try:
+            r = await get_redis()
+            pipe = r.pipeline(transaction=False)
+            pipe.hgetall(COUNTS_KEY)
+            pipe.hlen(DEVICES_KEY)
+            pipe.get(RECONCILED_AT_KEY)
+            counts, total, reconciled_at = await pipe.execute()
+        except Exception as e:
+            logger.warning("Could not read fleet stats: %s", e)
+            return self._snapshot
+
+        self._snapshot = self._build(counts, total, reconciled_at)
+        self._fetched_at = now
+        return self._snapshot
+
+    @staticmethod
+    def _build(counts: Dict[str, str], total: int, reconciled_at: Optional[str]) -> Dict[str, Any]:
+        groups: Dict[str, Dict[str, int]] = {}
+        for field, value in counts.items():
+            # Values such as city names may themselves contain colons
+            parts = field.split(":", 2 if field.startswith("events:") else 1)
+            group, key = ":".join(parts[:-1]), parts[-1]
+            if int(value) > 0:
+                groups.setdefault(group, {})[key] = int(value)
+
+        battery = groups.get("battery", {})
+        histogram = {bucket: battery.get(bucket, 0) for bucket in BATTERY_BUCKETS}
+        histogram[UNKNOWN] = battery.get(UNKNOWN, 0)
+        by_severity = groups.get("events:severity", {})
+        return {
+            "total_devices": total,
+            "by_status": groups.get("status", {}),
+            "by_city": groups.get("city", {}),
+            "by_model": groups.get("model", {}),
+            "battery_histogram": histogram,
+            "unacknowledged_events": {
+                "total": sum(by_severity.values()),
+                "by_severity": by_severity,
+                "by_type": groups.get("events:type", {}),
+            },
+            "reconciled_at": reconciled_at,
+        }
+
+
+# Global fleet stats instance
+fleet_stats = FleetStats()
@@ -0,0 +1,326 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import uuid
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.services.websocket_manager import Payload, ws_manager
+from app.services.viewport_index import viewport_index
+
+logger = get_logger(__name__)
+
+FLEET_CHANNEL = "fleet"
+
+# Device fields tracked for the fleet channel
+FLEET_FIELDS = ("status", "last_seen_at", "lat", "lon", "battery_pct", "speed_mps", "temp_c", "city")
+
+# Columnar messages send coordinates as integer microdegrees
+MICRODEGREES = 1_000_000
+
+LOAD_FLEET_SQL = """
+SELECT d.id, d.status, d.last_seen_at, r.lat, r.lon, r.battery_pct, r.speed_mps, r.temp_c, d.city
+FROM devices d
+LEFT JOIN LATERAL (
+    SELECT lat, lon, battery_pct, speed_mps, temp_c
+    FROM telemetry_readings
+    WHERE device_id = d.id
+    ORDER BY ts DESC
+    LIMIT 1
+) r ON true
+"""
+
+
+@dataclass
+class FleetClient:
+    # Latest version the client confirmed it applied, or had nothing
+    # visible to apply up to
+    acked: int = 0
+    # Latest version already sent to the client
+    sent: int = 0
+    columnar: bool = False
+
+
+def _delta_encode(values: List[Optional[int]]) -> List[Optional[int]]:
+    """Replace each integer with its difference from the previous non-null one."""
+    encoded, previous = [], 0
+    for value in values:
+        if value is None:
+            encoded.append(None)
+        else:
+            encoded.append(value - previous)
+            previous = value
+    return encoded
+
+
+class LiveFleetState:
+    """Current fleet state with per-field versions for delta updates.
+
+    Every change bumps a global version and stamps the changed fields. Each
+    tick, subscribers of the ``fleet`` channel receive the fields changed
+    since the version they last acknowledged, so traffic scales with the
+    rate of change rather than fleet size. Deltas are cumulative from the
+    acked version, so a client may miss or drop any of them without
+    losing state; clients that have lost track send ``fleet_resync``.
+
+    Clients with a viewport only receive devices inside it, plus devices
+    that just left it so their markers move off the map.
+
+    Clients subscribing with ``"fleet_format": "columnar"`` get snapshots
+    and deltas as parallel arrays instead of per-device objects (see
+    ``columnar``).
+    """
+
+    def __init__(self):
+        # Versions are only comparable within one process's state
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self.field_versions: Dict[str, Dict[str, int]] = {}
+        # device_id -> version of its latest change, least recent first
+        self.changed: "OrderedDict[str, int]" = OrderedDict()
+        # device_id -> position before its latest move, least recent move
+        # first; pruned once every client has acked past the move
+        self.previous_positions: Dict[str, Tuple[float, float]] = {}
+        # Dense device index for columnar messages, and the version each
+        # device was indexed at, both in index order
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.index_versions: List[int] = []
+        self.clients: Dict[str, FleetClient] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self, db: AsyncSession) -> int:
+        """Seed the state with every device and its latest reading."""
+        result = await db.execute(text(LOAD_FLEET_SQL))
+        for row in result:
+            device_id, status, last_seen_at, *values = row
+            fields = dict(zip(FLEET_FIELDS[2:], values))
+            fields["status"] = status
+            fields["last_seen_at"] = last_seen_at.isoformat() if last_seen_at else None
+            self.apply(device_id, fields)
+        logger.info("Live fleet state loaded with %d devices", len(self.devices))
+        return len(self.devices)
+
+    def apply(self, device_id: str, fields: Dict[str, Any]) -> bool:
+        """Merge new field values for a device; return whether anything changed."""
+        current = self.devices.setdefault(device_id, {})
+        changed = [
+            name for name, value in fields.items()
+            if name in FLEET_FIELDS and value is not None and current.get(name) != value
+        ]
+        if not changed:
+            return False
+
+        if ("lat" in changed or "lon" in changed) and current.get("lat") is not None:
+            self.previous_positions.pop(device_id, None)
+            self.previous_positions[device_id] = (current["lat"], current["lon"])
+
+        self.version += 1
+        if device_id not in self.index:
+            self.index[device_id] = len(self.ids)
+            self.ids.append(device_id)
+            self.index_versions.append(self.version)
+        versions = self.field_versions.setdefault(device_id, {})
+        for name in changed:
+            current[name] = fields[name]
+            versions[name] = self.version
+        self.changed[device_id] = self.version
+        self.changed.move_to_end(device_id)
+        return True
+
+    def apply_reading(self, reading: Dict[str, Any]) -> bool:
+        """Merge a serialized telemetry reading."""
+        fields = {name: reading.get(name) for name in FLEET_FIELDS[2:]}
+        fields["status"] = "online"
+        fields["last_seen_at"] = reading.get("ts")
+        return self.apply(reading["device_id"], fields)
+
+    def position(self, device_id: str) -> Optional[Tuple[float, float]]:
+        """Latest known (lat, lon) of a device."""
+        current = self.devices.get(device_id)
+        if current is None or current.get("lat") is None or current.get("lon") is None:
+            return None
+        return current["lat"], current["lon"]
+
+    def _in_viewport(self, client_id: str, device_id: str) -> bool:
+        return viewport_index.visible(
+            client_id, (self.position(device_id), self.previous_positions.get(device_id))
+        )
+
+    def delta(self, since: int) -> Dict[str, Dict[str, Any]]:
+        """Fields changed after version ``since``, by device."""
+        devices = {}
+        for device_id in reversed(self.changed):
+            if self.changed[device_id] <= since:
+                break
+            current = self.devices[device_id]
+            devices[device_id] = {
+                name: current[name]
+                for name, version in self.field_versions[device_id].items()
+                if version > since
+            }
+        return devices
+
+    def columnar(self, devices: Dict[str, Dict[str, Any]], base: int) -> dict:
+        """Encode per-device fields as parallel arrays ordered by device index.
+
+        ``idx``, ``lat`` and ``lon`` are integers (coordinates in
+        microdegrees), each delta-encoded against the previous non-null
+        entry so they pack into a byte or two; null means the field did not
+        change. Devices indexed after ``base`` are listed in ``new_ids``,
+        starting at index ``ids_from``.
+        """
+        rows = sorted((self.index[device_id], fields) for device_id, fields in devices.items())
+        columns: Dict[str, List[Any]] = {"idx": _delta_encode([i for i, _ in rows])}
+        for name in ("lat", "lon"):
+            columns[name] = _delta_encode([
+                round(fields[name] * MICRODEGREES) if fields.get(name) is not None else None
+                for _, fields in rows
+            ])
+        for name in FLEET_FIELDS:
+            if name in columns:
+                continue
+            values = [fields.get(name) for _, fields in rows]
+            if any(v is not None for v in values):
+                columns[name] = values
+
+        ids_from = bisect_right(self.index_versions, base)
+        return {
+            "format": "columnar",
+            "ids_from": ids_from,
+            "new_ids": self.ids[ids_from:],
+            "columns": columns,
+        }
+
+    def snapshot(self, client_id: Optional[str] = None) -> dict:
+        """Full state message sent on subscribe, resync and viewport changes."""
+        devices = self.devices
+        if client_id is not None and viewport_index.is_scoped(client_id):
+            devices = {
+                device_id: fields for device_id, fields in devices.items()
+                if viewport_index.visible(client_id, (self.position(device_id),))
+            }
+        message = {"type": "fleet_snapshot", "version": self.version}
+        client = self.clients.get(client_id)
+        if client is not None and client.columnar:
+            message.update(self.columnar(devices, 0))
+        else:
+            message["devices"] = devices
+        return message
+
+    async def add_client(self, client_id: str, columnar: Optional[bool] = None) -> None:
+        """Start tracking a subscriber and send it a full snapshot."""
+        if columnar is None:
+            previous = self.clients.get(client_id)
+            columnar = previous is not None and previous.columnar
+        self.clients[client_id] = FleetClient(
+            acked=self.version, sent=self.version, columnar=columnar
+        )
+        await ws_manager.send_personal_message(self.snapshot(client_id), client_id)
+        metrics.inc("fleet.snapshots")
+
+    def remove_client(self, client_id: str) -> None:
+        """Stop tracking a subscriber."""
+        self.clients.pop(client_id, None)
+
+    def ack(self, client_id: str, version: int) -> None:
+        """Record that a client applied everything up to ``version``."""
+        client = self.clients.get(client_id)
+        if client is not None:
+            client.acked = max(client.acked, min(version, self.version))
+
+    def tick(self) -> int:
+        """Send pending deltas to every subscriber; return the number sent."""
+        # Clients acked at the same version in the same format share one
+        # payload, encoded once per wire format, unless a viewport narrows it
+        deltas: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        shared: Dict[Tuple[int, bool], Payload] = {}
+        sent = 0
+        for client_id, client in list(self.clients.items()):
+            if client_id not in ws_manager.active_connections:
+                del self.clients[client_id]
+                continue
+            if client.sent >= self.version:
+                continue
+
+            devices = deltas.get(client.acked)
+            if devices is None:
+                devices = deltas[client.acked] = self.delta(client.acked)
+
+            if viewport_index.is_scoped(client_id):
+                visible = {
+                    device_id: fields for device_id, fields in devices.items()
+                    if self._in_viewport(client_id, device_id)
+                }
+                client.sent = self.version
+                if not visible:
+                    # Nothing it can see changed since its ack, so it is up
+                    # to date and later deltas can start from here
+                    client.acked = self.version
+                    continue
+                payload = self._delta_payload(client.acked, visible, client.columnar)
+            else:
+                key = (client.acked, client.columnar)
+                payload = shared.get(key)
+                if payload is None:
+                    payload = shared[key] = self._delta_payload(client.acked, devices, client.columnar)
+                client.sent = self.version
+
+            ws_manager.send_payload(client_id, payload, f"{FLEET_CHANNEL}:fleet_delta")
+            sent += 1
+
+        self._prune_previous_positions()
+        metrics.inc("fleet.deltas", sent)
+        metrics.set("fleet.version", self.version)
+        return sent
+
+    def _prune_previous_positions(self) -> None:
+        """Forget positions from moves every client has acked past."""
+        floor = min((client.acked for client in self.clients.values()), default=self.version)
+        while self.previous_positions:
+            device_id = next(iter(self.previous_positions))
+            versions = self.field_versions[device_id]
+            if max(versions.get("lat", 0), versions.get("lon", 0)) > floor:
+                break
+            del self.previous_positions[device_id]
+
+    def _delta_payload(self, base: int, devices: Dict[str, Dict[str, Any]], columnar: bool) -> Payload:
+        message = {"type": "fleet_delta", "base": base, "version": self.version}
+        if columnar:
+            message.update(self.columnar(devices, base))
+        else:
+            message["devices"] = devices
+        return Payload(message)
+
+    def start(self) -> None:
+        """Start sending deltas every FLEET_TICK_SECONDS."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the delta tick."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.FLEET_TICK_SECONDS)
+            try:
+                self.tick()
+            except Exception as e:
+                logger.warning("Fleet delta tick failed: %s", e)
+
+
+# Global live fleet state instance
+live_fleet = LiveFleetState()
@@ -0,0 +1,428 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import json
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.redis import get_redis
+from app.db.base import async_session_maker
+from app.services.websocket_manager import ws_manager
+from app.services.live_fleet import live_fleet, FLEET_CHANNEL
+from app.services.viewport_index import viewport_index
+
+logger = get_logger(__name__)
+
+# WebSocket channels relayed from Redis
+REALTIME_CHANNELS = ["telemetry", "devices", "events"]
+REDIS_CHANNEL_PREFIX = "realtime:"
+
+# Channels the in-memory fleet state is maintained from
+FLEET_SOURCE_CHANNELS = {"telemetry", "devices"}
+
+# State updates where only the latest per device matters within a tick
+LATEST_ONLY_TYPES = {"telemetry_update"}
+
+# Map state, filtered by viewport for scoped clients. Everything else, such
+# as events, goes to every subscriber whatever its viewport.
+VIEWPORT_SCOPED_TYPES = {"telemetry_update", "device_status_updated"}
+
+# Number a message, keep it in the channel's log and publish it atomically.
+# Published payloads are "<seq>:<json>".
+PUBLISH_SCRIPT = """
+local seq = redis.call("INCR", KEYS[1])
+local payload = seq .. ":" .. ARGV[1]
+redis.call("LPUSH", KEYS[2], payload)
+redis.call("LTRIM", KEYS[2], 0, tonumber(ARGV[2]) - 1)
+redis.call("PUBLISH", KEYS[3], payload)
+return seq
+"""
+
+
+def redis_channel(channel: str) -> str:
+    """Redis pub/sub channel carrying messages for a WebSocket channel."""
+    return f"{REDIS_CHANNEL_PREFIX}{channel}"
+
+
+def _publish_args(channel: str, message: dict) -> tuple:
+    return (
+        PUBLISH_SCRIPT, 3,
+        f"{REDIS_CHANNEL_PREFIX}seq:{channel}",
+        f"{REDIS_CHANNEL_PREFIX}log:{channel}",
+        redis_channel(channel),
+        json.dumps(message, default=str),
+        settings.REALTIME_REPLAY_BUFFER_SIZE,
+    )
+
+
+async def publish(channel: str, message: dict) -> None:
+    """Publish a message for WebSocket subscribers of ``channel``.
+
+    Any process can publish; the API processes relay it to their clients.
+    Per-device messages carry ``device_id`` in ``data`` so the bridge can
+    batch them.
+    """
+    try:
+        r = await get_redis()
+        await r.eval(*_publish_args(channel, message))
+    except Exception as e:
+        logger.warning("Realtime publish to %s failed: %s", channel, e)
+
+
+async def publish_many(channel: str, messages: Iterable[dict]) -> None:
+    """Publish several messages for ``channel`` in one round trip."""
+    try:
+        r = await get_redis()
+        pipe = r.pipeline(transaction=False)
+        for message in messages:
+            pipe.eval(*_publish_args(channel, message))
+        await pipe.execute()
+    except Exception as e:
+        logger.warning("Realtime publish to %s failed: %s", channel, e)
+
+
+class StreamListener:
+    """Per-tick batches of (seq, message) for one SSE stream."""
+
+    def __init__(self):
+        self.queue: "asyncio.Queue[List[Tuple[int, dict]]]" = asyncio.Queue(
+            maxsize=settings.SSE_QUEUE_SIZE
+        )
+        # Set when a batch was dropped; the stream should end so the client
+        # reconnects with Last-Event-ID and replays the gap
+        self.overflowed = False
+
+    def push(self, batch: List[Tuple[int, dict]]) -> None:
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            metrics.inc("sse.overflows")
+
+
+class RealtimeBridge:
+    """Relays Redis pub/sub messages to WebSocket clients.
+
+    Messages are buffered for one tick. Within a tick, per-device messages of
+    the same type are batched into a single message whose ``data`` is a list,
+    grouped by device; state updates keep only the latest per device. Other
+    messages pass through in order.
+
+    Batches go whole to unscoped subscribers; subscribers with a viewport
+    get only the devices inside it for VIEWPORT_SCOPED_TYPES.
+
+    Messages are numbered per channel in Redis, so sequence numbers agree
+    across API processes and restarts. Outgoing messages carry ``channel``
+    and the highest ``seq`` they include. The last
+    REALTIME_REPLAY_BUFFER_SIZE messages per channel are kept in memory,
+    seeded from the Redis log on startup, so reconnecting clients can
+    resume from their last seq.
+
+    With WS_SCALE_OUT each process only subscribes to the Redis channels its
+    own clients need, reconciled every tick against the per-channel
+    subscriber counts in ``ws_manager``; otherwise it relays every channel.
+
+    Server-Sent Events streams register a ``StreamListener`` per channel and
+    receive each tick's messages as one batch.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        # (channel, type) -> device_id -> (seq, data) items, in arrival order
+        self._device_batches: Dict[Tuple[str, str], Dict[str, List[Tuple[int, dict]]]] = {}
+        self._passthrough: List[Tuple[str, int, dict]] = []
+        # channel -> recent (seq, message), oldest first
+        self._logs: Dict[str, Deque[Tuple[int, dict]]] = {}
+        self._received_seq: Dict[str, int] = {}
+        self._flushed_seq: Dict[str, int] = {}
+        # Redis channels currently subscribed, and ones dropped since startup
+        self.subscribed: Set[str] = set()
+        self._dropped: Set[str] = set()
+        # channel -> SSE streams listening to it
+        self.listeners: Dict[str, Set[StreamListener]] = {}
+
+    def start(self) -> None:
+        """Start relaying in a background task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop relaying and wait for the background task to exit."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                r = await get_redis()
+                pubsub = r.pubsub()
+                self.subscribed = set()
+                try:
+                    await self._consume(r, pubsub)
+                finally:
+                    await pubsub.reset()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Realtime bridge disconnected: %s", e)
+                await asyncio.sleep(settings.REALTIME_RECONNECT_SECONDS)
+
+    def wanted_channels(self) -> Set[str]:
+        """Redis channels this process needs to relay."""
+        if not settings.WS_SCALE_OUT:
+            return set(REALTIME_CHANNELS)
+        refcounts = ws_manager.channel_refcounts()
+        for channel, listeners in self.listeners.items():
+            refcounts[channel] = refcounts.get(channel, 0) + len(listeners)
+        wanted = {c for c in REALTIME_CHANNELS if refcounts.get(c)}
+        if refcounts.get(FLEET_CHANNEL):
+            wanted |= FLEET_SOURCE_CHANNELS
+        return wanted
+
+    async def _sync_subscriptions(self, r, pubsub) -> None:
+        wanted = self.wanted_channels()
+        added, removed = wanted - self.subscribed, self.subscribed - wanted
+
+        if added:
+            await pubsub.subscribe(*(redis_channel(c) for c in added))
+            await self._load_logs(r, sorted(added))
+            logger.info("Realtime bridge subscribed to %s", ", ".join(sorted(added)))
+            # The fleet state missed updates while its sources were dropped
+            if added & FLEET_SOURCE_CHANNELS & self._dropped:
+                asyncio.create_task(self._reload_fleet())
+                self._dropped -= FLEET_SOURCE_CHANNELS
+
+        if removed:
+            await pubsub.unsubscribe(*(redis_channel(c) for c in removed))
+            # Forget the stream position so a later subscribe starts fresh
+            for channel in removed:
+                self._logs.pop(channel, None)
+                self._received_seq.pop(channel, None)
+                self._flushed_seq.pop(channel, None)
+            self._dropped |= removed
+            logger.info("Realtime bridge unsubscribed from %s", ", ".join(sorted(removed)))
+
+        self.subscribed = wanted
+        metrics.set("realtime.subscribed_channels", len(wanted))
+
+    async def _reload_fleet(self) -> None:
+        try:
+            async with async_session_maker() as db:
+                await live_fleet.load(db)
+        except Exception as e:
+            logger.warning("Could not reload live fleet state: %s", e)
+
+    async def _load_logs(self, r, channels: List[str]) -> None:
+        """Read the Redis log of newly subscribed channels.
+
+        On first subscribe the log only seeds the replay buffer. After a
+        reconnect, entries published while disconnected are relayed like
+        live messages.
+        """
+        size = settings.REALTIME_REPLAY_BUFFER_SIZE
+        pipe = r.pipeline(transaction=False)
+        for channel in channels:
+            pipe.lrange(f"{REDIS_CHANNEL_PREFIX}log:{channel}", 0, size - 1)
+
+        for channel, entries in zip(channels, await pipe.execute()):
+            relay = channel in self._received_seq
+            for raw in reversed(entries):
+                if relay:
+                    self._buffer(redis_channel(channel), raw)
+                else:
+                    parsed = self._parse(raw)
+                    if parsed is not None:
+                        self._append_log(channel, *parsed)
+            if not relay:
+                self._flushed_seq[channel] = self._received_seq.setdefault(channel, 0)
+
+    async def _consume(self, r, pubsub) -> None:
+        loop = asyncio.get_running_loop()
+        tick = settings.REALTIME_TICK_MS / 1000
+        while True:
+            await self._sync_subscriptions(r, pubsub)
+            deadline = loop.time() + tick
+            if not self.subscribed:
+                await asyncio.sleep(tick)
+            while self.subscribed and (remaining := deadline - loop.time()) > 0:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=remaining
+                )
+                if message is not None:
+                    self._buffer(message["channel"], message["data"])
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Realtime broadcast failed: %s", e)
+
+    @staticmethod
+    def _parse(raw: str) -> Optional[Tuple[int, dict]]:
+        seq, _, body = raw.partition(":")
+        try:
+            return int(seq), json.loads(body)
+        except ValueError:
+            return None
+
+    def _append_log(self, channel: str, seq: int, message: dict) -> bool:
+        """Record a message in the replay buffer; return False for duplicates."""
+        last = self._received_seq.get(channel, 0)
+        if seq <= last:
+            # A sequence far behind means the Redis counter was reset
+            if last - seq <= settings.REALTIME_REPLAY_BUFFER_SIZE:
+                return False
+            self._logs.pop(channel, None)
+            self._flushed_seq[channel] = 0
+
+        log = self._logs.get(channel)
+        if log is None:
+            log = self._logs[channel] = deque(maxlen=settings.REALTIME_REPLAY_BUFFER_SIZE)
+        log.append((seq, message))
+        self._received_seq[channel] = seq
+        return True
+
+    def _buffer(self, redis_channel_name: str, raw: str) -> None:
+        channel = redis_channel_name[len(REDIS_CHANNEL_PREFIX):]
+        parsed = self._parse(raw)
+        if parsed is None:
+            logger.warning("Dropping malformed realtime message on %s", redis_channel_name)
+            return
+        seq, message = parsed
+        if not self._append_log(channel, seq, message):
+            return
+        metrics.inc("realtime.received")
+
+        data = message.get("data")
+        if isinstance(data, dict) and "device_id" in data:
+            message_type = message["type"]
+            if message_type == "telemetry_update":
+                live_fleet.apply_reading(data)
+            elif message_type == "device_status_updated":
+                live_fleet.apply(data["device_id"], {"status": data.get("status")})
+
+            batch = self._device_batches.setdefault((channel, message_type), {})
+            if message_type in LATEST_ONLY_TYPES:
+                batch[data["device_id"]] = [(seq, data)]
+            else:
+                batch.setdefault(data["device_id"], []).append((seq, data))
+        else:
+            self._passthrough.append((channel, seq, message))
+
+    async def flush(self) -> None:
+        """Send everything buffered during the current tick."""
+        passthrough, self._passthrough = self._passthrough, []
+        batches, self._device_batches = self._device_batches, {}
+        previous = dict(self._flushed_seq)
+        self._flushed_seq.update(self._received_seq)
+
+        for channel, listeners in self.listeners.items():
+            after = previous.get(channel, 0)
+            if listeners and self.current_seq(channel) > after:
+                batch = self.replay(channel, after) or []
+                for listener in listeners:
+                    listener.push(batch)
+
+        for channel, seq, message in passthrough:
+            await ws_manager.broadcast_to_channel({**message, "channel": channel, "seq": seq}, channel)
+            metrics.inc("realtime.sent")
+        for (channel, message_type), batch in batches.items():
+            items = [item for device_items in batch.values() for item in device_items]
+            self._send_batch(channel, message_type, items)
+            metrics.inc("realtime.sent")
+
+    @staticmethod
+    def _position(item: dict) -> Optional[Tuple[float, float]]:
+        if item.get("lat") is not None and item.get("lon") is not None:
+            return item["lat"], item["lon"]
+        return live_fleet.position(item["device_id"])
+
+    def _send_batch(self, channel: str, message_type: str, items: List[Tuple[int, dict]]) -> None:
+        subscribers = ws_manager.subscriptions.get(channel)
+        if not subscribers:
+            return
+        key = f"{channel}:{message_type}"
+        seq = max(s for s, _ in items)
+        data = [d for _, d in items]
+
+        def message(batch: List[dict]) -> dict:
+            return {"type": message_type, "channel": channel, "seq": seq, "data": batch}
+
+        if message_type not in VIEWPORT_SCOPED_TYPES:
+            ws_manager.send_to_clients(message(data), list(subscribers), key)
+            return
+
+        unscoped = [c for c in subscribers if not viewport_index.is_scoped(c)]
+        if unscoped:
+            ws_manager.send_to_clients(message(data), unscoped, key)
+
+        num_scoped = len(subscribers) - len(unscoped)
+        if num_scoped:
+            routed = 0
+            for client_id, client_items in viewport_index.route(data, self._position).items():
+                if client_id in subscribers:
+                    ws_manager.send_to_clients(message(client_items), [client_id], key)
+                    routed += len(client_items)
+            metrics.inc("viewport.routed", routed)
+            metrics.inc("viewport.filtered", len(data) * num_scoped - routed)
+
+    def listen(self, channel: str) -> "StreamListener":
+        """Register an SSE stream for a channel's messages from the next tick on."""
+        listener = StreamListener()
+        self.listeners.setdefault(channel, set()).add(listener)
+        metrics.set("sse.streams", sum(len(l) for l in self.listeners.values()))
+        return listener
+
+    def unlisten(self, channel: str, listener: "StreamListener") -> None:
+        """Unregister an SSE stream."""
+        listeners = self.listeners.get(channel)
+        if listeners is not None:
+            listeners.discard(listener)
+            if not listeners:
+                del self.listeners[channel]
+        metrics.set("sse.streams", sum(len(l) for l in self.listeners.values()))
+
+    def current_seq(self, channel: str) -> int:
+        """Highest seq already relayed on a channel."""
+        return self._flushed_seq.get(channel, 0)
+
+    def replay(self, channel: str, last_seq: int) -> Optional[List[Tuple[int, dict]]]:
+        """Relayed messages after ``last_seq``, or None if the gap is no longer buffered."""
+        flushed = self.current_seq(channel)
+        if last_seq >= flushed:
+            return []
+        log = self._logs.get(channel)
+        if not log or log[0][0] > last_seq + 1:
+            return None
+        return [(seq, m) for seq, m in log if last_seq < seq <= flushed]
+
+    async def resume(self, client_id: str, channel: str, last_seq: int) -> None:
+        """Replay what a reconnecting client missed, or tell it to resnapshot."""
+        missed = self.replay(channel, last_seq)
+        seq = self.current_seq(channel)
+        if missed is None:
+            metrics.inc("realtime.resnapshots")
+            await ws_manager.send_personal_message(
+                {"type": "resnapshot", "channel": channel, "seq": seq}, client_id
+            )
+            return
+
+        # One message, so a long gap can't overflow the client's send queue
+        metrics.inc("realtime.replayed", len(missed))
+        await ws_manager.send_personal_message({
+            "type": "replay",
+            "channel": channel,
+            "seq": seq,
+            "messages": [
+                {**message, "channel": channel, "seq": message_seq}
+                for message_seq, message in missed
+            ],
+        }, client_id)
+
+
+# Global realtime bridge instance
+realtime_bridge = RealtimeBridge()
@@ -0,0 +1,200 @@
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlencode
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.redis import get_redis
+
+logger = get_logger(__name__)
+
+# Cached resources; each has a version counter bumped on writes
+DEVICES = "devices"
+EVENTS = "events"
+
+
+def telemetry_resource(device_id: str) -> str:
+    """Versioned resource name for one device's telemetry."""
+    return f"telemetry:{device_id}"
+
+
+def _version_key(name: str) -> str:
+    return f"cache:version:{name}"
+
+
+def _unsettled_key(name: str) -> str:
+    return f"cache:unsettled:{name}"
+
+
+def _seed_version(pipe, name: str) -> None:
+    """Start a missing counter at the current time in milliseconds.
+
+    Versions are also used as ETags, so a counter lost with Redis must not
+    restart at a value an earlier counter already handed out.
+    """
+    pipe.set(_version_key(name), int(time.time() * 1000), nx=True)
+
+
+def cache_key(name: str, params: Dict[str, Any]) -> str:
+    """Cache key for a resource and its query parameters, ignoring unset ones."""
+    normalized = urlencode(sorted((k, str(v)) for k, v in params.items() if v is not None))
+    return f"cache:{name}:{normalized}"
+
+
+class ResponseCache:
+    """Read-through cache of serialized JSON responses in Redis.
+
+    Entries are stored as ``<version>:<json>`` and only served while the
+    resource's version counter still matches, so a write invalidates every
+    cached query for that resource with a single INCR. The counter and the
+    entry are read in one round trip. Concurrent misses for the same key in
+    a process share one load. Versions double as strong ETags.
+
+    With a read replica, a load shortly after a write may miss it, so for
+    DATABASE_READ_MAX_LAG_SECONDS after a bump replica loads are neither
+    stored nor given a version.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+    async def bump(self, *names: str) -> None:
+        """Invalidate every cached response of the given resources."""
+        try:
+            r = await get_redis()
+            pipe = r.pipeline(transaction=False)
+            for name in names:
+                _seed_version(pipe, name)
+                pipe.incr(_version_key(name))
+                if settings.DATABASE_READ_URL:
+                    pipe.set(_unsettled_key(name), 1, px=int(settings.DATABASE_READ_MAX_LAG_SECONDS * 1000))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("Could not bump cache version of %s: %s", ", ".join(names), e)
+
+    async def version(self, name: str, replica: bool = False) -> Optional[str]:
+        """Current version of a resource.
+
+        None if Redis is unavailable, or for ``replica`` reads while the
+        replica may not have caught up with the latest write.
+        """
+        try:
+            r = await get_redis()
+            pipe = r.pipeline(transaction=False)
+            _seed_version(pipe, name)
+            pipe.get(_version_key(name))
+            pipe.exists(_unsettled_key(name))
+            _, version, unsettled = await pipe.execute()
+            return None if replica and unsettled else version
+        except Exception as e:
+            logger.warning("Could not read cache version of %s: %s", name, e)
+            return None
+
+    async def get_or_load(
+        self,
+        name: str,
+        params: Dict[str, Any],
+        load: Callable[[], Awaitable[str]],
+        version: Optional[str] = None,
+        replica: bool = False
+    ) -> Tuple[Optional[str], str]:
+        """Version and cached JSON for a query, calling ``load`` on a miss.
+
+        Pass ``version`` if it was already read with ``version()``, e.g. to
+        check an ETag, and ``replica`` if ``load`` reads from the replica.
+        The version is None when Redis is unavailable or the replica may
+        be behind, and then the response must not be given an ETag.
+        """
+        if not settings.RESPONSE_CACHE_ENABLED:
+            if version is None:
+                version = await self.version(name, replica)
+            return version, await load()
+
+        key = cache_key(name, params)
+        try:
+            r = await get_redis()
+            pipe = r.pipeline(transaction=False)
+            if version is None:
+                _seed_version(pipe, name)
+                pipe.get(_version_key(name))
+                pipe.exists(_unsettled_key(name))
+            pipe.get(key)
+            results = await pipe.execute()
+        except Exception as e:
+            logger.warning("Response cache unavailable: %s", e)
+            return None, await load()
+
+        # The version is read before loading, so a write during the load
+        # leaves the stored entry already stale
+        unsettled = False
+        if version is None:
+            _, version, unsettled, entry = results
+            unsettled = replica and bool(unsettled)
+        else:
+            entry, = results
+        if entry is not None:
+            entry_version, _, body = entry.partition(":")
+            if entry_version == version:
+                self.hits[name] += 1
+                metrics.inc(f"cache.{name}.hits")
+                return version, body
+        self.misses[name] += 1
+        metrics.inc(f"cache.{name}.misses")
+
+        flight = f"{key}@{version}"
+        pending = self._inflight.get(flight)
+        if pending is not None:
+            metrics.inc(f"cache.{name}.collapsed")
+            try:
+                return None if unsettled else version, await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+            # The load was abandoned by its caller, so take it over
+            return await self.get_or_load(name, params, load, None if unsettled else version, replica)
+
+        future = self._inflight[flight] = asyncio.get_running_loop().create_future()
+        try:
+            body = await load()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a load nobody else waited on isn't logged twice
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled, e.g. because the client went away; waiters retry
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(flight, None)
+
+        future.set_result(body)
+        if unsettled:
+            metrics.inc(f"cache.{name}.unsettled")
+            return None, body
+        try:
+            await r.set(key, f"{version}:{body}", ex=settings.RESPONSE_CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning("Could not store cached response: %s", e)
+        return version, body
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Hits, misses and hit rate per resource for this process."""
+        stats = {}
+        for name in sorted(set(self.hits) | set(self.misses)):
+            hits, misses = self.hits[name], self.misses[name]
+            stats[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+            }
+        return stats
+
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,73 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete
+from typing import Optional, List
+
+from app.domain.models import Rule
+from app.domain.schemas import RuleCreate, RuleUpdate
+from app.services.rules_compiler import rule_registry
+
+
+class RuleService:
+    @staticmethod
+    async def create_rule(db: AsyncSession, rule: RuleCreate) -> Rule:
+        """Create a new rule."""
+        db_rule = Rule(**rule.model_dump())
+        db.add(db_rule)
+        await db.commit()
+        await db.refresh(db_rule)
+        rule_registry.invalidate()
+        return db_rule
+
+    @staticmethod
+    async def get_rule(db: AsyncSession, rule_id: int) -> Optional[Rule]:
+        """Get a rule by ID."""
+        result = await db.execute(select(Rule).where(Rule.id == rule_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_rule_by_name(db: AsyncSession, name: str) -> Optional[Rule]:
+        """Get a rule by name."""
+        result = await db.execute(select(Rule).where(Rule.name == name))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_rules(db: AsyncSession) -> List[Rule]:
+        """Get all rules."""
+        result = await db.execute(select(Rule).order_by(Rule.id))
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def update_rule(db: AsyncSession, rule_id: int, rule_update: RuleUpdate) -> Optional[Rule]:
+        """Update a rule."""
+        update_data = rule_update.model_dump(exclude_unset=True)
+        if not update_data:
+            return await RuleService.get_rule(db, rule_id)
+
+        stmt = (
+            update(Rule)
+            .where(Rule.id == rule_id)
+            .values(**update_data)
+            .returning(Rule)
+        )
+        result = await db.execute(stmt)
+        await db.commit()
+        rule_registry.invalidate()
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def delete_rule(db: AsyncSession, rule_id: int) -> bool:
+        """Delete a rule."""
+        stmt = delete(Rule).where(Rule.id == rule_id)
+        result = await db.execute(stmt)
+        await db.commit()
+        rule_registry.invalidate()
+        return result.rowcount > 0
+
+    @staticmethod
+    async def replace_rules(db: AsyncSession, rules: List[RuleCreate]) -> List[Rule]:
+        """Replace the whole rule set in one transaction."""
+        await db.execute(delete(Rule))
+        db.add_all([Rule(**rule.model_dump()) for rule in rules])
+        await db.commit()
+        rule_registry.invalidate()
+        return await RuleService.get_rules(db)
@@ -0,0 +1,279 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import math
+import operator
+import time
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.logging import get_logger
+from app.domain.models import Rule
+from app.domain.schemas import EventCreate, RuleCreate
+from app.services.fleet_state import FleetState, event_bit
+
+logger = get_logger(__name__)
+
+COMPARATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+SEVERITY_RANK = {"critical": 0, "warning": 1, "info": 2}
+
+
+@dataclass(frozen=True)
+class RuleField:
+    """A value a rule can compare against.
+
+    ``column`` reads the field for the whole fleet from a ``FleetState``;
+    ``reading`` reads it from a single incoming telemetry reading plus the
+    values the anomaly detectors derived from it, and is None for fields
+    that only make sense in the batch pass.
+    """
+
+    column: Callable[[FleetState, float], np.ndarray]
+    reading: Optional[Callable[[Any, Dict[str, float]], Optional[float]]] = None
+
+
+def _last_seen_mins_ago(state: FleetState, now: float) -> np.ndarray:
+    # Offline devices are never stale, so mask them out as NaN
+    return np.where(state.online, (now - state.last_seen) / 60, np.nan)
+
+
+def _derived_field(name: str) -> RuleField:
+    return RuleField(lambda s, now: s.derived_column(name), lambda r, derived: derived.get(name))
+
+
+RULE_FIELDS: Dict[str, RuleField] = {
+    "battery_pct": RuleField(lambda s, now: s.battery, lambda r, derived: r.battery_pct),
+    "speed_mps": RuleField(lambda s, now: s.speed, lambda r, derived: r.speed_mps),
+    "temp_c": RuleField(lambda s, now: s.temp, lambda r, derived: r.temp_c),
+    "accel_g": RuleField(lambda s, now: s.accel, lambda r, derived: r.accel_g),
+    "last_seen_mins_ago": RuleField(_last_seen_mins_ago),
+    # Streaming anomaly statistics from DeviceStatsStore
+    "temp_zscore": _derived_field("temp_zscore"),
+    "fix_speed_mps": _derived_field("fix_speed_mps"),
+    "battery_drain_pct_per_min": _derived_field("battery_drain_pct_per_min"),
+}
+
+
+def default_rule_definitions() -> List[RuleCreate]:
+    """Built-in rules derived from the Settings thresholds."""
+    return [
+        RuleCreate(
+            name="low_battery_critical", event_type="LOW_BATTERY", field="battery_pct",
+            comparator="<", threshold=10, severity="critical",
+        ),
+        RuleCreate(
+            name="low_battery", event_type="LOW_BATTERY", field="battery_pct",
+            comparator="<", threshold=settings.LOW_BATTERY_THRESHOLD, severity="warning",
+        ),
+        RuleCreate(
+            name="stale", event_type="STALE", field="last_seen_mins_ago",
+            comparator=">", threshold=settings.STALE_DEVICE_THRESHOLD_MINUTES, severity="warning",
+        ),
+        RuleCreate(
+            name="impact", event_type="IMPACT", field="accel_g",
+            comparator=">=", threshold=settings.IMPACT_THRESHOLD_G, severity="critical",
+        ),
+        RuleCreate(
+            name="temp_spike", event_type="TEMP_SPIKE", field="temp_zscore",
+            comparator=">", threshold=settings.TEMP_SPIKE_ZSCORE, severity="warning",
+        ),
+        RuleCreate(
+            name="teleport", event_type="TELEPORT", field="fix_speed_mps",
+            comparator=">", threshold=settings.MAX_PLAUSIBLE_SPEED_MPS, severity="warning",
+        ),
+        RuleCreate(
+            name="battery_drain", event_type="BATTERY_DRAIN", field="battery_drain_pct_per_min",
+            comparator=">", threshold=settings.BATTERY_DRAIN_PCT_PER_MIN, severity="warning",
+        ),
+    ]
+
+
+class CompiledRule:
+    """A rule definition compiled into a per-reading predicate and a fleet mask."""
+
+    def __init__(self, definition):
+        self.name = definition.name
+        self.event_type = definition.event_type
+        self.field = definition.field
+        self.threshold = definition.threshold
+        self.severity = definition.severity
+        self.city = definition.city
+        self.model = definition.model
+        # 0 means the default cooldown applies
+        self.cooldown_seconds = definition.cooldown_seconds or settings.EVENT_COOLDOWN_SECONDS
+        self.bit = event_bit(definition.event_type)
+
+        field = RULE_FIELDS[definition.field]
+        op = COMPARATORS[definition.comparator]
+        threshold = definition.threshold
+        city, model = definition.city, definition.model
+        column = field.column
+        read = field.reading
+
+        def mask(state: FleetState, now: float) -> np.ndarray:
+            values = column(state, now)
+            # A missing value never matches, not even for "!="
+            selected = op(values, threshold) & ~np.isnan(values)
+            if city is not None:
+                selected &= state.city == city
+            if model is not None:
+                selected &= state.model == model
+            return selected
+
+        self.mask = mask
+        self.predicate = None
+
+        if read is not None:
+            def predicate(reading, derived, device) -> bool:
+                value = read(reading, derived)
+                if value is None or math.isnan(value):
+                    return False
+                if city is not None and device.city != city:
+                    return False
+                if model is not None and device.model != model:
+                    return False
+                return op(value, threshold)
+
+            self.predicate = predicate
+
+    def _payload(self, value: float) -> Dict[str, Any]:
+        return {
+            self.field: int(value) if self.field == "battery_pct" else round(float(value), 2),
+            "threshold": self.threshold,
+            "rule": self.name,
+        }
+
+    def evaluate_state(self, state: FleetState, now: float, open_events: np.ndarray) -> List[EventCreate]:
+        """Evaluate the rule over the fleet, marking fired devices in ``open_events``."""
+        start = time.perf_counter()
+        mask = self.mask(state, now) & ((open_events & self.bit) == 0)
+        values = RULE_FIELDS[self.field].column(state, now)
+
+        events = []
+        for i in np.flatnonzero(mask):
+            open_events[i] |= self.bit
+            payload = self._payload(values[i])
+            if self.field == "accel_g":
+                payload.update({
+                    "lat": None if np.isnan(state.accel_lat[i]) else float(state.accel_lat[i]),
+                    "lon": None if np.isnan(state.accel_lon[i]) else float(state.accel_lon[i]),
+                    "ts": datetime.utcfromtimestamp(state.accel_ts[i]).isoformat(),
+                })
+            events.append(EventCreate(
+                device_id=state.device_ids[i],
+                type=self.event_type,
+                severity=self.severity,
+                payload=payload
+            ))
+
+        metrics.inc(f"rules.{self.name}.hits", len(events))
+        metrics.observe(f"rules.{self.name}.eval", time.perf_counter() - start)
+        return events
+
+    def evaluate_reading(
+        self,
+        reading,
+        derived: Dict[str, float],
+        device
+    ) -> Optional[EventCreate]:
+        """Evaluate the rule against a single incoming reading."""
+        if self.predicate is None:
+            return None
+
+        start = time.perf_counter()
+        try:
+            if not self.predicate(reading, derived, device):
+                return None
+            metrics.inc(f"rules.{self.name}.hits")
+
+            payload = self._payload(RULE_FIELDS[self.field].reading(reading, derived))
+            if self.field == "accel_g":
+                payload.update({"lat": reading.lat, "lon": reading.lon, "ts": reading.ts.isoformat()})
+            return EventCreate(
+                device_id=device.id,
+                type=self.event_type,
+                severity=self.severity,
+                payload=payload
+            )
+        finally:
+            metrics.observe(f"rules.{self.name}.eval", time.perf_counter() - start)
+
+
+class RuleRegistry:
+    """Compiled rule set, hot-reloaded when the ``rules`` table changes.
+
+    ``refresh`` compares a cheap fingerprint of the table (row count and
+    latest ``updated_at``) at most every RULES_RELOAD_INTERVAL_SECONDS and
+    only recompiles when it differs. An empty table falls back to the
+    defaults derived from Settings.
+    """
+
+    def __init__(self):
+        self.rules: List[CompiledRule] = []
+        self._fingerprint = None
+        self._checked_at = 0.0
+        self.load(default_rule_definitions())
+
+    def load(self, definitions) -> None:
+        """Compile rule definitions, highest severity first."""
+        definitions = sorted(definitions, key=lambda d: SEVERITY_RANK[d.severity])
+        self.rules = [CompiledRule(definition) for definition in definitions]
+        self._by_name = {rule.name: rule for rule in self.rules}
+
+    def cooldown_seconds(self, event: EventCreate) -> int:
+        """Cooldown of the rule that raised an event."""
+        rule = self._by_name.get(event.payload.get("rule"))
+        return rule.cooldown_seconds if rule else settings.EVENT_COOLDOWN_SECONDS
+
+    def invalidate(self) -> None:
+        """Force a reload on the next refresh."""
+        self._checked_at = 0.0
+        self._fingerprint = None
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Reload the rules if the table changed since the last check."""
+        now = time.monotonic()
+        if now - self._checked_at < settings.RULES_RELOAD_INTERVAL_SECONDS:
+            return
+        self._checked_at = now
+
+        result = await db.execute(select(func.count(Rule.id), func.max(Rule.updated_at)))
+        fingerprint = tuple(result.one())
+        if fingerprint == self._fingerprint:
+            return
+
+        result = await db.execute(select(Rule).where(Rule.enabled.is_(True)))
+        definitions = list(result.scalars().all())
+        self.load(definitions if fingerprint[0] else default_rule_definitions())
+        self._fingerprint = fingerprint
+        logger.info("Loaded %d rules", len(self.rules))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-rule evaluation time and hit counters."""
+        stats = []
+        for rule in self.rules:
+            timing = metrics.timing(f"rules.{rule.name}.eval")
+            stats.append({
+                "name": rule.name,
+                "evaluations": timing["count"],
+                "hits": int(metrics.counter(f"rules.{rule.name}.hits")),
+                "avg_ms": timing["avg_ms"],
+                "max_ms": timing["max_ms"],
+                "total_ms": timing["total_ms"],
+            })
+        return stats
+
+
+# Global rule registry instance
+rule_registry = RuleRegistry()
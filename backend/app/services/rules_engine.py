@@ -1,153 +1,98 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.sql import text
-from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional, Tuple
+import time
 
-from app.domain.models import Device, TelemetryReading, Event
-from app.domain.schemas import EventCreate
-from app.core.config import settings
+from app.domain.models import Device, Event
+from app.domain.schemas import EventCreate, TelemetryReadingCreate
 from app.services.event_service import EventService
+from app.services.anomaly_detectors import AnomalyService, anomaly_store
+from app.services.fleet_state import FleetState, FleetStateService
+from app.services.rules_compiler import CompiledRule, rule_registry
+from app.services.suppression_cache import suppression_cache
 
 
 class RulesEngine:
-    """Engine for evaluating incident detection rules."""
+    """Engine for evaluating incident detection rules.
 
-    @staticmethod
-    async def detect_low_battery(db: AsyncSession) -> List[EventCreate]:
-        """Detect devices with low battery."""
-        events = []
-
-        # Get latest readings for each device using SQLAlchemy
-        from sqlalchemy import select, func
-        from sqlalchemy.sql import text
-
-        # Use raw SQL with text() for distinct on
-        query = text("""
-        SELECT DISTINCT ON (device_id)
-            device_id, battery_pct, ts
-        FROM telemetry_readings
-        WHERE battery_pct IS NOT NULL
-        ORDER BY device_id, ts DESC
-        """)
-
-        result = await db.execute(query)
-        readings = result.fetchall()
-
-        for reading in readings:
-            device_id, battery_pct, ts = reading
-            if battery_pct < settings.LOW_BATTERY_THRESHOLD:
-                # Check if event already exists (not acknowledged)
-                existing = await db.execute(
-                    select(Event).where(
-                        Event.device_id == device_id,
-                        Event.type == "LOW_BATTERY",
-                        Event.acknowledged_at.is_(None)
-                    ).limit(1)
-                )
-                if not existing.scalar_one_or_none():
-                    events.append(EventCreate(
-                        device_id=device_id,
-                        type="LOW_BATTERY",
-                        severity="warning" if battery_pct >= 10 else "critical",
-                        payload={
-                            "battery_pct": battery_pct,
-                            "threshold": settings.LOW_BATTERY_THRESHOLD
-                        }
-                    ))
-
-        return events
+    Rules are declarative rows compiled by ``rule_registry``. The periodic
+    pass evaluates them as vectorized masks over a columnar ``FleetState``
+    snapshot; ingest evaluates them as predicates on the incoming reading.
+    Either way, triggers go through ``suppression_cache`` before reaching
+    the events table.
+    """
 
     @staticmethod
-    async def detect_stale_devices(db: AsyncSession) -> List[EventCreate]:
-        """Detect devices that haven't reported in a while."""
-        events = []
-        threshold_time = datetime.utcnow() - timedelta(
-            minutes=settings.STALE_DEVICE_THRESHOLD_MINUTES
-        )
-
-        # Find devices with last_seen_at older than threshold
-        query = select(Device).where(
-            Device.last_seen_at < threshold_time,
-            Device.status != 'offline'
-        )
-        result = await db.execute(query)
-        devices = result.scalars().all()
-
-        for device in devices:
-            # Check if event already exists (not acknowledged)
-            existing = await db.execute(
-                select(Event).where(
-                    Event.device_id == device.id,
-                    Event.type == "STALE",
-                    Event.acknowledged_at.is_(None)
-                ).limit(1)
-            )
-            if not existing.scalar_one_or_none():
-                minutes_ago = int((datetime.utcnow() - device.last_seen_at).total_seconds() / 60)
-                events.append(EventCreate(
-                    device_id=device.id,
-                    type="STALE",
-                    severity="warning",
-                    payload={
-                        "last_seen_mins_ago": minutes_ago,
-                        "threshold_mins": settings.STALE_DEVICE_THRESHOLD_MINUTES
-                    }
-                ))
+    def evaluate_state(
+        state: FleetState,
+        now: float,
+        rules: Optional[List[CompiledRule]] = None
+    ) -> List[EventCreate]:
+        """Evaluate all rules against a fleet snapshot."""
+        rules = rule_registry.rules if rules is None else rules
+        # Rules are ordered by severity, so once a device fires an event type
+        # the lower-severity rules for the same type skip it
+        open_events = state.open_events.copy()
 
+        events = []
+        for rule in rules:
+            events.extend(rule.evaluate_state(state, now, open_events))
         return events
 
     @staticmethod
-    async def detect_impacts(db: AsyncSession) -> List[EventCreate]:
-        """Detect impact events based on accelerometer readings."""
-        events = []
-
-        # Look for recent high acceleration events
-        since_time = datetime.utcnow() - timedelta(minutes=5)
-
-        query = select(TelemetryReading).where(
-            TelemetryReading.ts >= since_time,
-            TelemetryReading.accel_g >= settings.IMPACT_THRESHOLD_G
+    async def evaluate_all_rules(db: AsyncSession, shard: Optional[Tuple[int, int]] = None) -> int:
+        """Evaluate all rules and create events.
+
+        ``shard`` is ``(index, count)`` and limits the pass to one partition
+        of the fleet.
+        """
+        await rule_registry.refresh(db)
+        await suppression_cache.ensure_warm(db)
+        await AnomalyService.catch_up(db, shard)
+        state = await FleetStateService.load(db, shard)
+        state.derived = anomaly_store.columns(state.device_ids)
+        all_events = await RulesEngine.create_unsuppressed(
+            db, RulesEngine.evaluate_state(state, time.time())
         )
-        result = await db.execute(query)
-        readings = result.scalars().all()
-
-        for reading in readings:
-            # Check if event already exists for this timestamp
-            existing = await db.execute(
-                select(Event).where(
-                    Event.device_id == reading.device_id,
-                    Event.type == "IMPACT",
-                    Event.ts == reading.ts
-                ).limit(1)
-            )
-            if not existing.scalar_one_or_none():
-                events.append(EventCreate(
-                    device_id=reading.device_id,
-                    type="IMPACT",
-                    severity="critical",
-                    payload={
-                        "accel_g": reading.accel_g,
-                        "lat": reading.lat,
-                        "lon": reading.lon,
-                        "ts": reading.ts.isoformat()
-                    }
-                ))
-
-        return events
+        return len(all_events)
 
     @staticmethod
-    async def evaluate_all_rules(db: AsyncSession) -> int:
-        """Evaluate all rules and create events."""
-        all_events = []
-
-        # Run all detection rules
-        all_events.extend(await RulesEngine.detect_low_battery(db))
-        all_events.extend(await RulesEngine.detect_stale_devices(db))
-        all_events.extend(await RulesEngine.detect_impacts(db))
+    async def evaluate_reading(
+        db: AsyncSession,
+        device: Device,
+        reading: TelemetryReadingCreate
+    ) -> List[Event]:
+        """Evaluate all rules against a newly ingested reading and create events."""
+        await rule_registry.refresh(db)
+        derived = anomaly_store.update_from_reading(reading)
+
+        candidates = {}
+        for rule in rule_registry.rules:
+            if rule.event_type in candidates:
+                continue
+            event = rule.evaluate_reading(reading, derived, device)
+            if event:
+                candidates[rule.event_type] = event
+
+        # Only readings that trip a rule pay for the suppression lookup
+        if not candidates:
+            return []
+
+        await suppression_cache.ensure_warm(db)
+        return await RulesEngine.create_unsuppressed(db, list(candidates.values()))
 
-        # Create events
-        for event_data in all_events:
-            await EventService.create_event(db, event_data)
-
-        return len(all_events)
+    @staticmethod
+    async def create_unsuppressed(db: AsyncSession, events: List[EventCreate]) -> List[Event]:
+        """Create the events the suppression cache lets through and start their cooldowns."""
+        if not events:
+            return []
+
+        suppressed = await suppression_cache.suppressed((e.device_id, e.type) for e in events)
+        events = [e for e in events if (e.device_id, e.type) not in suppressed]
+        if not events:
+            return []
+
+        db_events = await EventService.create_events(db, events)
+        await suppression_cache.start_cooldown([
+            ((e.device_id, e.type), rule_registry.cooldown_seconds(e)) for e in events
+        ])
+        return db_events
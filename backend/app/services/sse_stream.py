@@ -0,0 +1,151 @@
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import json
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.live_fleet import live_fleet, FLEET_CHANNEL
+from app.services.realtime_bridge import realtime_bridge
+
+EVENTS_CHANNEL = "events"
+
+KEEPALIVE = ": keepalive\n\n"
+
+
+def format_event(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    """Serialize one Server-Sent Event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _matches(message: dict, filters: Dict[str, str]) -> bool:
+    """Whether a message passes the stream filters.
+
+    Filters apply to fields of per-item ``data``; notices without one, such
+    as ``events_updated``, always pass.
+    """
+    data = message.get("data")
+    if not isinstance(data, dict):
+        return True
+    return all(data.get(name) == value for name, value in filters.items())
+
+
+async def event_stream(
+    last_event_id: Optional[str],
+    filters: Dict[str, str]
+) -> AsyncIterator[str]:
+    """Relay the ``events`` channel as SSE, resuming after ``last_event_id``.
+
+    Event ids are channel seqs, so a client can reconnect to any API
+    process. If the gap is no longer buffered the stream starts with a
+    ``resnapshot`` event and the client should reload over REST. A stream
+    that falls SSE_QUEUE_SIZE ticks behind is closed, and the client's
+    automatic reconnect replays what it missed.
+    """
+    # Register before reading the replay buffer so nothing falls in between
+    listener = realtime_bridge.listen(EVENTS_CHANNEL)
+    try:
+        last_seq = None
+        if last_event_id is not None:
+            try:
+                last_seq = int(last_event_id)
+            except ValueError:
+                pass
+        pending = []
+        if last_seq is not None:
+            missed = realtime_bridge.replay(EVENTS_CHANNEL, last_seq)
+            if missed is None:
+                seq = realtime_bridge.current_seq(EVENTS_CHANNEL)
+                metrics.inc("realtime.resnapshots")
+                pending.append(format_event(
+                    "resnapshot", {"channel": EVENTS_CHANNEL, "seq": seq}, str(seq)
+                ))
+            else:
+                metrics.inc("realtime.replayed", len(missed))
+                pending.extend(
+                    format_event(message["type"], {**message, "channel": EVENTS_CHANNEL, "seq": seq}, str(seq))
+                    for seq, message in missed if _matches(message, filters)
+                )
+
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+        for chunk in pending:
+            yield chunk
+
+        while True:
+            try:
+                batch = await asyncio.wait_for(
+                    listener.queue.get(), timeout=settings.SSE_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield KEEPALIVE
+                continue
+            for seq, message in batch:
+                if _matches(message, filters):
+                    yield format_event(
+                        message["type"], {**message, "channel": EVENTS_CHANNEL, "seq": seq}, str(seq)
+                    )
+            if listener.overflowed and listener.queue.empty():
+                return
+    finally:
+        realtime_bridge.unlisten(EVENTS_CHANNEL, listener)
+
+
+def _fleet_devices(devices: Dict[str, Dict[str, Any]], city: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    if city is None:
+        return devices
+    return {
+        device_id: fields for device_id, fields in devices.items()
+        if live_fleet.devices.get(device_id, {}).get("city") == city
+    }
+
+
+async def fleet_stream(last_event_id: Optional[str], city: Optional[str]) -> AsyncIterator[str]:
+    """Stream fleet snapshots and deltas as SSE, resuming after ``last_event_id``.
+
+    Event ids are ``<epoch>-<version>`` of this process's fleet state.
+    Deltas are cumulative from any version, so resuming on the same process
+    needs no buffer; ids from another process or an older state get a
+    fresh snapshot.
+    """
+    # Keeps the fleet's source channels subscribed in scale-out mode
+    listener = realtime_bridge.listen(FLEET_CHANNEL)
+    loop = asyncio.get_running_loop()
+    try:
+        epoch, _, version = (last_event_id or "").partition("-")
+        since = int(version) if version.isdigit() else None
+        if epoch != live_fleet.epoch or since is None or since > live_fleet.version:
+            since = live_fleet.version
+            metrics.inc("fleet.snapshots")
+            first = format_event(
+                "fleet_snapshot",
+                {"version": since, "devices": _fleet_devices(live_fleet.devices, city)},
+                f"{live_fleet.epoch}-{since}",
+            )
+        else:
+            first = ""
+
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n" + first
+        last_write = loop.time()
+
+        while True:
+            await asyncio.sleep(settings.FLEET_TICK_SECONDS)
+            version = live_fleet.version
+            if version > since:
+                devices = _fleet_devices(live_fleet.delta(since), city)
+                if devices:
+                    yield format_event(
+                        "fleet_delta",
+                        {"base": since, "version": version, "devices": devices},
+                        f"{live_fleet.epoch}-{version}",
+                    )
+                    last_write = loop.time()
+                since = version
+            if loop.time() - last_write >= settings.SSE_KEEPALIVE_SECONDS:
+                yield KEEPALIVE
+                last_write = loop.time()
+    finally:
+        realtime_bridge.unlisten(FLEET_CHANNEL, listener)
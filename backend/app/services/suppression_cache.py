@@ -0,0 +1,159 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import time
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.core.redis import get_redis
+from app.domain.models import Event
+
+logger = get_logger(__name__)
+
+Key = Tuple[str, str]  # (device_id, event type)
+
+
+class SuppressionCache:
+    """Tracks which (device_id, event type) pairs must not raise a new event.
+
+    A pair is suppressed while it has an active (unacknowledged) event, and
+    for a cooldown window after any event is raised, so devices flapping
+    around a threshold don't flood the events table once acknowledged.
+
+    With the redis backend the state is shared across API and worker
+    processes, and a small local copy absorbs repeat lookups. With the
+    memory backend it is per process.
+
+    Active entries are removed when their events are acknowledged. Their
+    SUPPRESSION_ACTIVE_TTL_SECONDS expiry only guards against a missed
+    removal: every hit refreshes it, and each process reloads all open
+    events every half TTL, so an entry never expires while its event is open.
+    """
+
+    def __init__(self):
+        # key -> epoch seconds the entry is valid until
+        self._active: Dict[Key, float] = {}
+        self._cooldown: Dict[Key, float] = {}
+        self._warmed_at: Optional[float] = None
+
+    @property
+    def _use_redis(self) -> bool:
+        return settings.SUPPRESSION_BACKEND == "redis"
+
+    @staticmethod
+    def _active_key(key: Key) -> str:
+        return f"suppress:active:{key[0]}:{key[1]}"
+
+    @staticmethod
+    def _cooldown_key(key: Key) -> str:
+        return f"suppress:cooldown:{key[0]}:{key[1]}"
+
+    def _local_active_ttl(self) -> float:
+        # Acknowledgements in other processes only clear Redis, so the local
+        # copy of an active entry must expire quickly in redis mode
+        return settings.SUPPRESSION_LOCAL_TTL_SECONDS if self._use_redis else float("inf")
+
+    async def warm(self, db: AsyncSession) -> int:
+        """Load every unacknowledged event, via the idx_events_unacked partial index."""
+        query = select(Event.device_id, Event.type).where(Event.acknowledged_at.is_(None)).distinct()
+        result = await db.execute(query)
+        keys = [tuple(row) for row in result]
+
+        await self.mark_active(keys)
+        self._warmed_at = time.monotonic()
+        logger.info("Suppression cache warmed with %d active events", len(keys))
+        return len(keys)
+
+    async def ensure_warm(self, db: AsyncSession) -> None:
+        """Warm the cache, and rewarm it before active entries could expire."""
+        if self._warmed_at is None or time.monotonic() - self._warmed_at >= settings.SUPPRESSION_ACTIVE_TTL_SECONDS / 2:
+            await self.warm(db)
+
+    async def suppressed(self, keys: Iterable[Key]) -> Set[Key]:
+        """Return the subset of keys that must not raise a new event."""
+        now = time.time()
+        keys = list(keys)
+        result = set()
+        remote = []
+        for key in keys:
+            if self._active.get(key, 0) > now or self._cooldown.get(key, 0) > now:
+                result.add(key)
+            else:
+                self._active.pop(key, None)
+                self._cooldown.pop(key, None)
+                remote.append(key)
+
+        if remote and self._use_redis:
+            try:
+                r = await get_redis()
+                pipe = r.pipeline(transaction=False)
+                for key in remote:
+                    # EXPIRE doubles as the existence check and keeps open events suppressed
+                    pipe.expire(self._active_key(key), settings.SUPPRESSION_ACTIVE_TTL_SECONDS)
+                    pipe.exists(self._cooldown_key(key))
+                found = await pipe.execute()
+                for key, active, cooling_down in zip(remote, found[::2], found[1::2]):
+                    if active or cooling_down:
+                        result.add(key)
+                        self._active[key] = now + self._local_active_ttl()
+            except Exception as e:
+                logger.warning("Suppression cache lookup failed: %s", e)
+
+        metrics.inc("suppression.hits", len(result))
+        metrics.inc("suppression.misses", len(keys) - len(result))
+        return result
+
+    async def mark_active(self, keys: List[Key]) -> None:
+        """Record newly raised or already open events."""
+        if not keys:
+            return
+        until = time.time() + self._local_active_ttl()
+        for key in keys:
+            self._active[key] = until
+
+        if self._use_redis:
+            try:
+                r = await get_redis()
+                pipe = r.pipeline(transaction=False)
+                for key in keys:
+                    pipe.set(self._active_key(key), 1, ex=settings.SUPPRESSION_ACTIVE_TTL_SECONDS)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning("Suppression cache update failed: %s", e)
+
+    async def start_cooldown(self, cooldowns: List[Tuple[Key, int]]) -> None:
+        """Suppress each key for its cooldown window, regardless of acknowledgement."""
+        if not cooldowns:
+            return
+        now = time.time()
+        for key, seconds in cooldowns:
+            self._cooldown[key] = now + seconds
+
+        if self._use_redis:
+            try:
+                r = await get_redis()
+                pipe = r.pipeline(transaction=False)
+                for key, seconds in cooldowns:
+                    pipe.set(self._cooldown_key(key), 1, ex=seconds)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning("Suppression cache update failed: %s", e)
+
+    async def clear_active(self, keys: List[Key]) -> None:
+        """Invalidate active entries after events are acknowledged."""
+        if not keys:
+            return
+        for key in keys:
+            self._active.pop(key, None)
+
+        if self._use_redis:
+            try:
+                r = await get_redis()
+                await r.delete(*(self._active_key(key) for key in keys))
+            except Exception as e:
+                logger.warning("Suppression cache invalidation failed: %s", e)
+
+
+# Global suppression cache instance
+suppression_cache = SuppressionCache()
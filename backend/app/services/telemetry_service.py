@@ -1,10 +1,45 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import Optional, List
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
-from app.domain.models import TelemetryReading
+from app.domain.models import DeviceLatestState, TelemetryReading
 from app.domain.schemas import TelemetryReadingCreate
+from app.services.response_cache import response_cache, telemetry_resource
+
+# Columns of TelemetryReadingResponse, in order, for the bulk read path
+READING_COLUMNS = (
+    "id", "device_id", "ts", "lat", "lon", "battery_pct", "speed_mps", "temp_c", "accel_g"
+)
+
+# Reading fields denormalized onto DeviceLatestState
+LATEST_STATE_FIELDS = ("lat", "lon", "battery_pct", "speed_mps", "temp_c", "accel_g")
+
+
+def upsert_latest_state(values: Dict[str, Any]):
+    """Statement merging a reading into its device's latest state.
+
+    Readings older than the stored one are ignored, and fields a reading
+    leaves out keep their last known value.
+    """
+    stmt = insert(DeviceLatestState).values(
+        device_id=values["device_id"],
+        ts=values["ts"],
+        **{name: values.get(name) for name in LATEST_STATE_FIELDS}
+    )
+    table = DeviceLatestState.__table__
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.device_id],
+        set_={
+            "ts": stmt.excluded.ts,
+            **{
+                name: func.coalesce(stmt.excluded[name], table.c[name])
+                for name in LATEST_STATE_FIELDS
+            },
+        },
+        where=stmt.excluded.ts >= table.c.ts,
+    )
 
 
 class TelemetryService:
@@ -14,10 +49,13 @@ class TelemetryService:
         reading: TelemetryReadingCreate
     ) -> TelemetryReading:
         """Create a new telemetry reading."""
-        db_reading = TelemetryReading(**reading.model_dump())
+        values = reading.model_dump()
+        db_reading = TelemetryReading(**values)
         db.add(db_reading)
+        await db.execute(upsert_latest_state(values))
         await db.commit()
         await db.refresh(db_reading)
+        await response_cache.bump(telemetry_resource(db_reading.device_id))
         return db_reading
 
     @staticmethod
@@ -40,6 +78,30 @@ class TelemetryService:
         result = await db.execute(query)
         return list(result.scalars().all())
 
+    @staticmethod
+    async def get_device_telemetry_rows(
+        db: AsyncSession,
+        device_id: str,
+        from_ts: Optional[datetime] = None,
+        to_ts: Optional[datetime] = None,
+        limit: int = 1000
+    ) -> List[tuple]:
+        """Get telemetry readings for a device as tuples of READING_COLUMNS.
+
+        Selects plain columns with Core, skipping the ORM identity map.
+        """
+        table = TelemetryReading.__table__
+        query = select(*(table.c[name] for name in READING_COLUMNS)).where(table.c.device_id == device_id)
+
+        if from_ts:
+            query = query.where(table.c.ts >= from_ts)
+        if to_ts:
+            query = query.where(table.c.ts <= to_ts)
+
+        query = query.order_by(table.c.ts.desc()).limit(limit)
+        result = await db.execute(query)
+        return result.all()
+
     @staticmethod
     async def get_latest_reading(
         db: AsyncSession,
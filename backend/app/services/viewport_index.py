@@ -0,0 +1,120 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import math
+
+from app.core.config import settings
+
+Cell = Tuple[int, int]  # (lat index, lon index) on a VIEWPORT_CELL_DEGREES grid
+Position = Tuple[float, float]  # (lat, lon)
+
+
+@dataclass
+class Viewport:
+    min_lon: float
+    min_lat: float
+    max_lon: float
+    max_lat: float
+    zoom: int
+    # None when the viewport is too large to index and sees everything
+    cells: Optional[List[Cell]] = None
+
+    def contains(self, lat: float, lon: float) -> bool:
+        return self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon
+
+
+class ViewportIndex:
+    """Grid-cell spatial index from map area to the clients viewing it.
+
+    Clients without a viewport, zoomed out below VIEWPORT_MIN_ZOOM, or
+    covering more than VIEWPORT_MAX_CELLS cells are unscoped and receive
+    every device update.
+    """
+
+    def __init__(self):
+        self.cells: Dict[Cell, Set[str]] = {}
+        self.viewports: Dict[str, Viewport] = {}
+
+    @staticmethod
+    def cell_of(lat: float, lon: float) -> Cell:
+        size = settings.VIEWPORT_CELL_DEGREES
+        return math.floor(lat / size), math.floor(lon / size)
+
+    def set_viewport(self, client_id: str, bbox: List[float], zoom: int) -> Viewport:
+        """Replace a client's viewport; ``bbox`` is [min_lon, min_lat, max_lon, max_lat]."""
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox)
+        zoom = float(zoom)
+        # JSON clients can send Infinity and NaN, which would break the grid
+        if not all(math.isfinite(v) for v in (min_lon, min_lat, max_lon, max_lat, zoom)):
+            raise ValueError("bbox and zoom must be finite numbers")
+        if min_lon > max_lon or min_lat > max_lat:
+            raise ValueError("bbox must be [min_lon, min_lat, max_lon, max_lat]")
+        min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+        min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+
+        self.remove(client_id)
+        viewport = Viewport(min_lon, min_lat, max_lon, max_lat, int(zoom))
+        low, high = self.cell_of(min_lat, min_lon), self.cell_of(max_lat, max_lon)
+        num_cells = (high[0] - low[0] + 1) * (high[1] - low[1] + 1)
+
+        if viewport.zoom >= settings.VIEWPORT_MIN_ZOOM and num_cells <= settings.VIEWPORT_MAX_CELLS:
+            viewport.cells = [
+                (i, j)
+                for i in range(low[0], high[0] + 1)
+                for j in range(low[1], high[1] + 1)
+            ]
+            for cell in viewport.cells:
+                self.cells.setdefault(cell, set()).add(client_id)
+
+        self.viewports[client_id] = viewport
+        return viewport
+
+    def remove(self, client_id: str) -> None:
+        """Drop a client's viewport, making it unscoped again."""
+        viewport = self.viewports.pop(client_id, None)
+        if viewport is None or viewport.cells is None:
+            return
+        for cell in viewport.cells:
+            clients = self.cells.get(cell)
+            if clients is not None:
+                clients.discard(client_id)
+                if not clients:
+                    del self.cells[cell]
+
+    def is_scoped(self, client_id: str) -> bool:
+        """Whether updates to this client are filtered by its viewport."""
+        viewport = self.viewports.get(client_id)
+        return viewport is not None and viewport.cells is not None
+
+    def visible(self, client_id: str, positions: Iterable[Optional[Position]]) -> bool:
+        """Whether any of ``positions`` is inside the client's viewport."""
+        viewport = self.viewports.get(client_id)
+        if viewport is None or viewport.cells is None:
+            return True
+        return any(p is not None and viewport.contains(*p) for p in positions)
+
+    def clients_at(self, lat: float, lon: float) -> Set[str]:
+        """Scoped clients whose viewport contains the position."""
+        candidates = self.cells.get(self.cell_of(lat, lon))
+        if not candidates:
+            return set()
+        return {c for c in candidates if self.viewports[c].contains(lat, lon)}
+
+    def route(
+        self,
+        items: List[dict],
+        position: Callable[[dict], Optional[Position]]
+    ) -> Dict[str, List[dict]]:
+        """Split per-device items among the scoped clients that can see them."""
+        routed: Dict[str, List[dict]] = defaultdict(list)
+        for item in items:
+            p = position(item)
+            if p is None:
+                continue
+            for client_id in self.clients_at(*p):
+                routed[client_id].append(item)
+        return routed
+
+
+# Global viewport index instance
+viewport_index = ViewportIndex()
@@ -1,28 +1,169 @@
 from fastapi import WebSocket
-from typing import Dict, Set, List
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Set, List, Tuple, Union
+import asyncio
 import json
+import msgpack
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Close code sent to clients disconnected for falling behind (RFC 6455 "Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Wire formats a client can negotiate; msgpack is sent as binary frames
+ENCODINGS = ("json", "msgpack")
+
+Encoded = Union[str, bytes]
+
+# Keys whose newest message supersedes any queued one: fleet deltas are
+# cumulative from the acked version. Other batches hold different devices
+# or events, so replacing them would lose data.
+LATEST_STATE_KEYS = {"fleet:fleet_delta"}
+
+
+def encode_message(message: dict, encoding: str) -> Encoded:
+    """Serialize a message for one wire format."""
+    if encoding == "msgpack":
+        return msgpack.packb(message, default=str)
+    return json.dumps(message, default=str)
+
+
+def decode_message(data: Encoded) -> dict:
+    """Parse a client message from a text (JSON) or binary (msgpack) frame."""
+    if isinstance(data, bytes):
+        return msgpack.unpackb(data)
+    return json.loads(data)
+
+
+class Payload:
+    """A message encoded at most once per wire format, however many clients get it."""
+
+    __slots__ = ("message", "_encoded")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._encoded: Dict[str, Encoded] = {}
+
+    def encode(self, encoding: str) -> Encoded:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = encode_message(self.message, encoding)
+        return data
+
+
+class ClientConnection:
+    """A WebSocket client with a bounded outbound queue drained by its own task.
+
+    Broadcasts only enqueue, so one slow client never delays the others.
+    When the queue is full, WS_SLOW_CONSUMER_POLICY decides what happens:
+
+    - ``drop_oldest``: drop the oldest queued message
+    - ``coalesce``: for LATEST_STATE_KEYS, drop the queued message with the
+      same key as the new one; otherwise drop the oldest
+    - ``disconnect``: close the connection
+    """
+
+    def __init__(self, websocket: WebSocket, encoding: str = "json"):
+        self.websocket = websocket
+        self.encoding = encoding
+        # (coalesce key, serialized message)
+        self.queue: Deque[Tuple[Optional[str], Encoded]] = deque()
+        self.ready = asyncio.Event()
+        self.overflowed = False
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def enqueue(self, payload: Payload, key: Optional[str] = None) -> None:
+        """Queue a message in this client's encoding, applying the slow-consumer policy if full."""
+        if self.overflowed:
+            return
+
+        if len(self.queue) >= settings.WS_SEND_QUEUE_SIZE:
+            policy = settings.WS_SLOW_CONSUMER_POLICY
+            if policy == "disconnect":
+                self.overflowed = True
+                self.ready.set()
+                metrics.inc("ws.slow_consumer_disconnects")
+                return
+
+            if policy == "coalesce" and key in LATEST_STATE_KEYS:
+                for i, (queued_key, _) in enumerate(self.queue):
+                    if queued_key == key:
+                        del self.queue[i]
+                        break
+                else:
+                    self.queue.popleft()
+            else:
+                self.queue.popleft()
+            self.dropped += 1
+            metrics.inc("ws.dropped")
+
+        self.queue.append((key, payload.encode(self.encoding)))
+        self.ready.set()
+
+    async def run(self) -> None:
+        """Send queued messages until the connection closes or overflows."""
+        websocket = self.websocket
+        while True:
+            await self.ready.wait()
+            while self.queue and not self.overflowed:
+                _, data = self.queue.popleft()
+                send = websocket.send_bytes if isinstance(data, bytes) else websocket.send_text
+                await asyncio.wait_for(send(data), settings.WS_SEND_TIMEOUT_SECONDS)
+                metrics.inc("ws.sent")
+                metrics.inc(f"ws.bytes_sent.{self.encoding}", len(data))
+            if self.overflowed:
+                await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+                return
+            self.ready.clear()
 
 
 class WebSocketManager:
     def __init__(self):
         # Store active connections by client_id
-        self.active_connections: Dict[str, WebSocket] = {}
+        self.active_connections: Dict[str, ClientConnection] = {}
         # Store subscriptions: channel -> set of client_ids
         self.subscriptions: Dict[str, Set[str]] = {}
 
-    async def connect(self, client_id: str, websocket: WebSocket):
-        """Accept a new WebSocket connection."""
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
+    async def connect(
+        self,
+        client_id: str,
+        websocket: WebSocket,
+        encoding: str = "json",
+        subprotocol: Optional[str] = None
+    ):
+        """Accept a new WebSocket connection and start its sender."""
+        await websocket.accept(subprotocol=subprotocol)
+        connection = ClientConnection(websocket, encoding)
+        connection.task = asyncio.create_task(self._send_loop(client_id, connection))
+        self.active_connections[client_id] = connection
+        metrics.set("ws.connections", len(self.active_connections))
+
+    async def _send_loop(self, client_id: str, connection: ClientConnection):
+        try:
+            await connection.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info("Dropping WebSocket client %s: %s", client_id, e or type(e).__name__)
+        # Only remove the connection this task belongs to
+        if self.active_connections.get(client_id) is connection:
+            self.disconnect(client_id)
 
     def disconnect(self, client_id: str):
         """Remove a WebSocket connection."""
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
+        connection = self.active_connections.pop(client_id, None)
+        if connection is not None and connection.task is not asyncio.current_task():
+            connection.task.cancel()
 
         # Remove client from all subscriptions
         for channel_subs in self.subscriptions.values():
             channel_subs.discard(client_id)
+        metrics.set("ws.connections", len(self.active_connections))
 
     async def subscribe(self, client_id: str, channels: List[str]):
         """Subscribe a client to channels."""
@@ -39,20 +180,52 @@ class WebSocketManager:
 
     async def send_personal_message(self, message: dict, client_id: str):
         """Send a message to a specific client."""
-        if client_id in self.active_connections:
-            websocket = self.active_connections[client_id]
-            await websocket.send_json(message)
+        connection = self.active_connections.get(client_id)
+        if connection is not None:
+            connection.enqueue(Payload(message))
+
+    def send_payload(self, client_id: str, payload: Payload, key: Optional[str] = None):
+        """Queue a shared payload for a specific client."""
+        connection = self.active_connections.get(client_id)
+        if connection is not None:
+            connection.enqueue(payload, key)
+
+    def send_to_clients(self, message: dict, client_ids: Iterable[str], key: Optional[str] = None):
+        """Send one message to the given clients, serialized once."""
+        # Serialize once per encoding, then only enqueue per client
+        payload = Payload(message)
+        depth = 0
+        for client_id in client_ids:
+            connection = self.active_connections.get(client_id)
+            if connection is not None:
+                connection.enqueue(payload, key)
+                depth = max(depth, len(connection.queue))
+        metrics.set("ws.queue_depth_max", depth)
 
     async def broadcast_to_channel(self, message: dict, channel: str):
         """Broadcast a message to all subscribers of a channel."""
-        if channel in self.subscriptions:
-            for client_id in self.subscriptions[channel]:
-                await self.send_personal_message(message, client_id)
+        subscribers = self.subscriptions.get(channel)
+        if subscribers:
+            self.send_to_clients(message, list(subscribers), f"{channel}:{message.get('type')}")
 
     async def broadcast_all(self, message: dict):
         """Broadcast a message to all connected clients."""
-        for client_id in self.active_connections:
-            await self.send_personal_message(message, client_id)
+        self.send_to_clients(message, list(self.active_connections), message.get("type"))
+
+    def channel_refcounts(self) -> Dict[str, int]:
+        """Number of local subscribers per channel."""
+        return {channel: len(subs) for channel, subs in self.subscriptions.items() if subs}
+
+    def stats(self) -> dict:
+        """Connection count and outbound queue depths."""
+        depths = [len(c.queue) for c in self.active_connections.values()]
+        return {
+            "connections": len(depths),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "dropped": sum(c.dropped for c in self.active_connections.values()),
+            "channels": self.channel_refcounts(),
+        }
 
 
 # Global WebSocket manager instance
@@ -0,0 +1,127 @@
+from collections import Counter
+from typing import List, Optional
+import asyncio
+import json
+import os
+import socket
+import time
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.redis import get_redis
+from app.services.websocket_manager import ws_manager
+from app.services.realtime_bridge import realtime_bridge
+
+logger = get_logger(__name__)
+
+WORKERS_KEY = "realtime:presence:workers"
+
+
+def _worker_key(worker_id: str) -> str:
+    return f"realtime:presence:{worker_id}"
+
+
+class PresenceRegistry:
+    """Cluster-wide view of WebSocket connections.
+
+    Every API process heartbeats its connection count, channel subscriber
+    counts and Redis subscriptions to Redis. Entries expire after three
+    missed heartbeats, so crashed workers drop out on their own.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ttl(self) -> float:
+        return settings.WS_PRESENCE_INTERVAL_SECONDS * 3
+
+    def local(self) -> dict:
+        """This process's presence entry."""
+        stats = ws_manager.stats()
+        return {
+            "worker_id": self.worker_id,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "connections": stats["connections"],
+            "channels": stats["channels"],
+            "redis_channels": sorted(realtime_bridge.subscribed),
+            "updated_at": time.time(),
+        }
+
+    async def heartbeat(self) -> None:
+        """Publish this process's entry."""
+        r = await get_redis()
+        pipe = r.pipeline(transaction=False)
+        pipe.set(_worker_key(self.worker_id), json.dumps(self.local()), ex=int(self.ttl) + 1)
+        pipe.zadd(WORKERS_KEY, {self.worker_id: time.time()})
+        await pipe.execute()
+
+    async def workers(self) -> List[dict]:
+        """Live presence entries across the cluster."""
+        r = await get_redis()
+        cutoff = time.time() - self.ttl
+        await r.zremrangebyscore(WORKERS_KEY, "-inf", cutoff)
+        worker_ids = await r.zrangebyscore(WORKERS_KEY, cutoff, "+inf")
+        if not worker_ids:
+            return []
+        entries = await r.mget([_worker_key(w) for w in worker_ids])
+        return [json.loads(e) for e in entries if e is not None]
+
+    async def cluster(self) -> dict:
+        """Presence entries with cluster totals.
+
+        If Redis is unavailable, only this process's entry is returned,
+        with ``local_only`` set.
+        """
+        local_only = False
+        try:
+            workers = await self.workers()
+        except Exception as e:
+            logger.warning("Presence lookup failed, returning local presence only: %s", e)
+            workers = [self.local()]
+            local_only = True
+        channels = Counter()
+        for worker in workers:
+            channels.update(worker["channels"])
+        return {
+            "workers": workers,
+            "connections": sum(w["connections"] for w in workers),
+            "channels": dict(channels),
+            "local_only": local_only,
+        }
+
+    def start(self) -> None:
+        """Start heartbeating every WS_PRESENCE_INTERVAL_SECONDS."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop heartbeating and remove this process's entry."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            r = await get_redis()
+            await r.delete(_worker_key(self.worker_id))
+            await r.zrem(WORKERS_KEY, self.worker_id)
+        except Exception as e:
+            logger.warning("Could not remove presence entry: %s", e)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.warning("Presence heartbeat failed: %s", e)
+            await asyncio.sleep(settings.WS_PRESENCE_INTERVAL_SECONDS)
+
+
+# Global presence registry instance
+presence_registry = PresenceRegistry()
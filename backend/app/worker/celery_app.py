@@ -24,5 +24,9 @@ celery_app.conf.update(
             "task": "app.worker.tasks.update_device_status",
             "schedule": 60.0,
         },
+        "reconcile-fleet-stats": {
+            "task": "app.worker.tasks.reconcile_fleet_stats",
+            "schedule": settings.FLEET_STATS_RECONCILE_SECONDS,
+        },
     },
 )
@@ -0,0 +1,106 @@
+"""
+Per-process async runtime for Celery workers.
+
+Each worker process owns one event loop and one engine pool for its whole
+lifetime, so tasks reuse pooled connections instead of paying connection
+setup on every run. Tasks run their coroutines on that loop through run().
+"""
+
+from celery.signals import worker_process_init, worker_process_shutdown, task_prerun, task_postrun
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from typing import Any, Coroutine, Dict, Optional
+import asyncio
+import time
+import redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.db.pool import create_engine
+
+logger = get_logger(__name__)
+
+# Redis hash where every worker process accumulates task durations
+TASK_METRICS_KEY = "metrics:worker_tasks"
+
+loop: Optional[asyncio.AbstractEventLoop] = None
+engine: Optional[AsyncEngine] = None
+session_maker: Optional[async_sessionmaker] = None
+redis_client: Optional[redis.Redis] = None
+
+# task_id -> perf_counter() at task start
+_task_started: Dict[str, float] = {}
+
+
+def get_redis_client() -> redis.Redis:
+    """Get the synchronous Redis client used for task coordination."""
+    global redis_client
+    if redis_client is None:
+        redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return redis_client
+
+
+def init_runtime() -> None:
+    """Create this process's event loop and engine pool."""
+    global loop, engine, session_maker
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    engine = create_engine(settings.DATABASE_URL, "worker")
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def shutdown_runtime() -> None:
+    """Dispose the engine pool and close the event loop."""
+    global loop, engine, session_maker
+    if loop is None:
+        return
+    try:
+        loop.run_until_complete(engine.dispose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+        loop = engine = session_maker = None
+
+
+def run(coro: Coroutine) -> Any:
+    """Run a coroutine to completion on this process's event loop."""
+    # worker_process_init only fires for prefork children; the solo pool and
+    # eagerly executed tasks initialise on first use instead
+    if loop is None:
+        init_runtime()
+    return loop.run_until_complete(coro)
+
+
+@worker_process_init.connect
+def on_worker_process_init(**kwargs):
+    init_runtime()
+    logger.info("Worker process runtime initialised")
+
+
+@worker_process_shutdown.connect
+def on_worker_process_shutdown(**kwargs):
+    shutdown_runtime()
+    logger.info("Worker process runtime disposed")
+
+
+@task_prerun.connect
+def on_task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    metrics.observe(f"tasks.{task.name}.duration", duration)
+    logger.info("Task %s %s in %.1f ms", task.name, state, duration * 1000)
+
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.hincrby(TASK_METRICS_KEY, f"{task.name}:count", 1)
+        pipe.hincrbyfloat(TASK_METRICS_KEY, f"{task.name}:total_ms", duration * 1000)
+        pipe.execute()
+    except Exception as e:
+        logger.warning("Could not record task metrics: %s", e)
@@ -1,44 +1,118 @@
 from app.worker.celery_app import celery_app
+from app.worker import runtime
+from app.worker.runtime import get_redis_client
 from app.services.rules_engine import RulesEngine
-from app.services.websocket_manager import ws_manager
+from app.services import realtime_bridge
+from app.services.response_cache import response_cache, DEVICES
+from app.services.fleet_stats import fleet_stats
+from celery import chord
 from sqlalchemy import select, update
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.domain.models import Device
 from app.core.config import settings
 from datetime import datetime, timedelta
-import asyncio
+from typing import List, Optional, Tuple
+import uuid
 
+DETECT_INCIDENTS_LOCK = "lock:detect_incidents"
 
-def get_async_session():
-    """Create a new async session for each task to avoid event loop issues."""
-    engine = create_async_engine(settings.DATABASE_URL, echo=False)
-    async_session = async_sessionmaker(engine, expire_on_commit=False)
-    return async_session, engine
+# Delete the lock only if we still own it
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def acquire_lock(name: str, timeout: int) -> Optional[str]:
+    """Try to take a Redis lock; return its token, or None if it is held."""
+    token = str(uuid.uuid4())
+    if get_redis_client().set(name, token, nx=True, ex=timeout):
+        return token
+    return None
+
+
+def release_lock(name: str, token: str) -> None:
+    """Release a Redis lock taken with acquire_lock."""
+    get_redis_client().eval(RELEASE_LOCK_SCRIPT, 1, name, token)
+
+
+async def broadcast_events_updated(events_created: int):
+    """Notify WebSocket clients that new events were created."""
+    if events_created > 0:
+        await realtime_bridge.publish(
+            "events", {"type": "events_updated", "count": events_created}
+        )
+
+
+def evaluate_rules(shard: Optional[Tuple[int, int]] = None) -> int:
+    """Run the rules engine over the fleet, or one shard of it."""
+
+    async def run():
+        async with runtime.session_maker() as db:
+            return await RulesEngine.evaluate_all_rules(db, shard)
+
+    return runtime.run(run())
 
 
 @celery_app.task(name="app.worker.tasks.detect_incidents")
 def detect_incidents():
-    """Periodic task to detect incidents."""
+    """Periodic task to detect incidents.
+
+    With RULES_SHARD_COUNT > 1 this only coordinates: it fans out one
+    detect_incidents_shard per partition and a chord callback gathers the
+    counts. A Redis lock keeps overlapping beat runs from piling up.
+    """
+    token = acquire_lock(DETECT_INCIDENTS_LOCK, settings.RULES_LOCK_TIMEOUT_SECONDS)
+    if token is None:
+        print("Incident detection still running, skipping this run.")
+        return
+
+    num_shards = settings.RULES_SHARD_COUNT
+    if num_shards > 1:
+        try:
+            chord(
+                detect_incidents_shard.s(shard, num_shards) for shard in range(num_shards)
+            )(finish_incident_detection.s(token))
+        except Exception as e:
+            print(f"Error dispatching incident detection shards: {e}")
+            release_lock(DETECT_INCIDENTS_LOCK, token)
+        return
+
+    try:
+        events_created = evaluate_rules()
+        print(f"Incident detection completed. Created {events_created} events.")
+        runtime.run(broadcast_events_updated(events_created))
+    except Exception as e:
+        print(f"Error in incident detection: {e}")
+    finally:
+        release_lock(DETECT_INCIDENTS_LOCK, token)
+
+
+@celery_app.task(name="app.worker.tasks.detect_incidents_shard")
+def detect_incidents_shard(shard: int, num_shards: int) -> int:
+    """Evaluate the rules for the devices in one partition of the fleet."""
+    try:
+        return evaluate_rules((shard, num_shards))
+    except Exception as e:
+        print(f"Error in incident detection shard {shard}/{num_shards}: {e}")
+        return 0
 
-    async def run():
-        session_maker, engine = get_async_session()
-        async with session_maker() as db:
-            try:
-                events_created = await RulesEngine.evaluate_all_rules(db)
-                print(f"Incident detection completed. Created {events_created} events.")
-
-                # Broadcast to WebSocket clients
-                if events_created > 0:
-                    await ws_manager.broadcast_to_channel(
-                        {"type": "events_updated", "count": events_created},
-                        "events"
-                    )
-            except Exception as e:
-                print(f"Error in incident detection: {e}")
-            finally:
-                await engine.dispose()
 
-    asyncio.run(run())
+@celery_app.task(name="app.worker.tasks.finish_incident_detection")
+def finish_incident_detection(shard_counts: List[int], token: str):
+    """Gather shard results, broadcast one update and release the lock."""
+    try:
+        events_created = sum(shard_counts)
+        print(
+            f"Incident detection completed across {len(shard_counts)} shards. "
+            f"Created {events_created} events."
+        )
+        runtime.run(broadcast_events_updated(events_created))
+    except Exception as e:
+        print(f"Error finishing incident detection: {e}")
+    finally:
+        release_lock(DETECT_INCIDENTS_LOCK, token)
 
 
 @celery_app.task(name="app.worker.tasks.update_device_status")
@@ -46,8 +120,7 @@ def update_device_status():
     """Update device online/offline status based on last_seen_at."""
 
     async def run():
-        session_maker, engine = get_async_session()
-        async with session_maker() as db:
+        async with runtime.session_maker() as db:
             try:
                 threshold_time = datetime.utcnow() - timedelta(
                     minutes=15  # Consider device offline after 15 minutes
@@ -61,19 +134,39 @@ def update_device_status():
                         Device.status != 'offline'
                     )
                     .values(status='offline')
+                    .returning(Device.id)
                 )
                 result = await db.execute(stmt)
+                device_ids = result.scalars().all()
                 await db.commit()
 
-                if result.rowcount > 0:
-                    print(f"Updated {result.rowcount} devices to offline status.")
-                    await ws_manager.broadcast_to_channel(
-                        {"type": "device_status_updated"},
-                        "devices"
-                    )
+                if device_ids:
+                    print(f"Updated {len(device_ids)} devices to offline status.")
+                    await response_cache.bump(DEVICES)
+                    await fleet_stats.update_devices(device_ids, status="offline")
+                    await realtime_bridge.publish_many("devices", (
+                        {
+                            "type": "device_status_updated",
+                            "data": {"device_id": device_id, "status": "offline"},
+                        }
+                        for device_id in device_ids
+                    ))
             except Exception as e:
                 print(f"Error updating device status: {e}")
-            finally:
-                await engine.dispose()
 
-    asyncio.run(run())
+    runtime.run(run())
+
+
+@celery_app.task(name="app.worker.tasks.reconcile_fleet_stats")
+def reconcile_fleet_stats():
+    """Rebuild the fleet statistics counters from the database."""
+
+    async def run():
+        async with runtime.session_maker() as db:
+            return await fleet_stats.reconcile(db)
+
+    try:
+        num_devices = runtime.run(run())
+        print(f"Fleet stats reconciled for {num_devices} devices.")
+    except Exception as e:
+        print(f"Error reconciling fleet stats: {e}")
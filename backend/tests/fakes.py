@@ -0,0 +1,52 @@
+"""In-memory stand-ins for the async Redis client, enough for unit tests."""
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+    async def execute(self):
+        results = []
+        for name, args, kwargs in self.calls:
+            results.append(await getattr(self.redis, name)(*args, **kwargs))
+        self.calls = []
+        return results
+
+
+class FakeRedis:
+    """Strings only, with decode_responses semantics and no expiry."""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    async def expire(self, key, seconds):
+        return int(key in self.data)
+
+    async def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import math
+import time
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.anomaly_detectors import DeviceStatsStore, haversine_m
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.fixture
+def store():
+    return DeviceStatsStore()
+
+
+def test_haversine_one_degree_of_latitude():
+    assert haversine_m(0, 0, 1, 0) == pytest.approx(111195, rel=1e-3)
+
+
+def test_temp_zscore_only_after_warmup(store):
+    for i in range(settings.ANOMALY_WARMUP_READINGS):
+        derived = store.update("bike-001", T0 + i, temp_c=20.0)
+        assert "temp_zscore" not in derived
+
+    derived = store.update("bike-001", T0 + 100, temp_c=20.0 + 10 * settings.TEMP_MIN_STDDEV_C)
+    # A flat history falls back to the minimum standard deviation
+    assert derived["temp_zscore"] == pytest.approx(10)
+
+
+def test_fix_speed_between_consecutive_fixes(store):
+    store.update("bike-001", T0, lat=40.0, lon=-74.0)
+    derived = store.update("bike-001", T0 + 10, lat=40.001, lon=-74.0)
+
+    assert derived["fix_speed_mps"] == pytest.approx(haversine_m(40.0, -74.0, 40.001, -74.0) / 10)
+
+
+def test_battery_drain_is_sampled_over_the_minimum_interval(store):
+    interval = settings.BATTERY_DRAIN_MIN_INTERVAL_SECONDS
+    store.update("bike-001", T0, battery_pct=80)
+    assert "battery_drain_pct_per_min" not in store.update("bike-001", T0 + interval / 2, battery_pct=79)
+
+    derived = store.update("bike-001", T0 + interval, battery_pct=78)
+    assert derived["battery_drain_pct_per_min"] == pytest.approx(2 / (interval / 60))
+
+    derived = store.update("bike-001", T0 + 2 * interval, battery_pct=90)
+    assert derived["battery_drain_pct_per_min"] == 0.0
+
+
+def test_out_of_order_readings_are_ignored(store):
+    store.update("bike-001", T0, lat=40.0, lon=-74.0)
+    assert store.update("bike-001", T0 - 5, lat=41.0, lon=-74.0) == {}
+    assert store.update("bike-001", T0, lat=41.0, lon=-74.0) == {}
+
+
+def test_columns_align_with_device_ids(store):
+    store.update("bike-001", T0, lat=40.0, lon=-74.0)
+    store.update("bike-001", T0 + 10, lat=40.001, lon=-74.0)
+
+    columns = store.columns(["bike-002", "bike-001"])
+    assert math.isnan(columns["fix_speed_mps"][0])
+    assert columns["fix_speed_mps"][1] > 0
+    assert np.isnan(columns["temp_zscore"]).all()
+
+
+def test_naive_ingest_timestamps_are_utc(store, monkeypatch):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        aware = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+        # catch_up folds in the stored, timezone-aware reading first
+        store.update("bike-001", aware.timestamp(), lat=40.0, lon=-74.0)
+        reading = SimpleNamespace(
+            device_id="bike-001", ts=(aware + timedelta(seconds=10)).replace(tzinfo=None),
+            lat=40.001, lon=-74.0, battery_pct=None, temp_c=None,
+        )
+        derived = store.update_from_reading(reading)
+    finally:
+        monkeypatch.delenv("TZ")
+        time.tzset()
+
+    assert derived["fix_speed_mps"] == pytest.approx(haversine_m(40.0, -74.0, 40.001, -74.0) / 10)
@@ -0,0 +1,69 @@
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+import pytest
+
+from app.api.deps import get_db
+from app.domain.schemas import EventBulkAcknowledge
+from app.main import app
+from app.services.event_service import EventService
+
+
+class RecordingSession:
+    """Stands in for an AsyncSession and records the statements executed."""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return self
+
+    def all(self):
+        return []
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def client():
+    async def no_db():
+        yield RecordingSession()
+
+    app.dependency_overrides[get_db] = no_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.parametrize("field", ["device_id", "type", "severity"])
+def test_blank_filters_are_rejected(field):
+    with pytest.raises(ValidationError):
+        EventBulkAcknowledge(acknowledged_by="ops", **{field: ""})
+
+
+def test_blank_filter_does_not_acknowledge_everything(client):
+    response = client.post("/api/v1/events/acknowledge", json={"acknowledged_by": "ops", "device_id": ""})
+    assert response.status_code == 422
+
+
+def test_request_without_filters_is_rejected(client):
+    response = client.post("/api/v1/events/acknowledge", json={"acknowledged_by": "ops"})
+    assert response.status_code == 400
+
+
+async def test_empty_filter_values_still_filter():
+    db = RecordingSession()
+    await EventService.acknowledge_events(db, "ops", device_id="", type="", severity="")
+
+    sql = str(db.statements[0])
+    assert "events.device_id = :device_id_1" in sql
+    assert "events.type = :type_1" in sql
+    assert "events.severity = :severity_1" in sql
+
+
+async def test_filters_are_applied():
+    db = RecordingSession()
+    await EventService.acknowledge_events(db, "ops", device_id="bike-001")
+
+    compiled = db.statements[0].compile()
+    assert "bike-001" in compiled.params.values()
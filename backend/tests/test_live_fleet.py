@@ -0,0 +1,68 @@
+import pytest
+
+from app.core.config import settings
+from app.services import live_fleet as live_fleet_module
+from app.services.live_fleet import FleetClient, LiveFleetState
+from app.services.viewport_index import viewport_index
+
+# Viewport around (50.05, 10.05)
+VIEWPORT = [10.0, 50.0, 10.1, 50.1]
+INSIDE = {"lat": 50.05, "lon": 10.05}
+OUTSIDE = {"lat": -33.9, "lon": 151.2}
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    payloads = []
+    monkeypatch.setattr(live_fleet_module.ws_manager, "active_connections", {"client": object()})
+    monkeypatch.setattr(
+        live_fleet_module.ws_manager, "send_payload",
+        lambda client_id, payload, key=None: payloads.append((client_id, payload.message)),
+    )
+    return payloads
+
+
+@pytest.fixture
+def scoped():
+    viewport_index.set_viewport("client", VIEWPORT, settings.VIEWPORT_MIN_ZOOM)
+    yield
+    viewport_index.remove("client")
+
+
+@pytest.fixture
+def fleet():
+    state = LiveFleetState()
+    state.apply("bike-inside", INSIDE)
+    state.apply("bike-outside", OUTSIDE)
+    state.clients["client"] = FleetClient(acked=state.version, sent=state.version)
+    return state
+
+
+async def test_scoped_client_is_up_to_date_without_visible_changes(fleet, sent, scoped):
+    fleet.apply("bike-outside", {"battery_pct": 40})
+    fleet.tick()
+
+    assert sent == []
+    assert fleet.clients["client"].acked == fleet.version
+
+    # The next delta starts after the invisible change
+    fleet.apply("bike-inside", {"battery_pct": 80})
+    fleet.tick()
+    assert [(m["base"], list(m["devices"])) for _, m in sent] == [(fleet.version - 1, ["bike-inside"])]
+
+
+async def test_devices_leaving_the_viewport_are_sent(fleet, sent, scoped):
+    fleet.apply("bike-inside", OUTSIDE)
+    fleet.tick()
+
+    assert [list(m["devices"]) for _, m in sent] == [["bike-inside"]]
+
+
+async def test_previous_positions_are_pruned_once_acked(fleet, sent):
+    fleet.apply("bike-inside", OUTSIDE)
+    fleet.tick()
+    assert "bike-inside" in fleet.previous_positions
+
+    fleet.ack("client", fleet.version)
+    fleet.tick()
+    assert fleet.previous_positions == {}
@@ -0,0 +1,164 @@
+import json
+import pytest
+
+from app.core.config import settings
+from app.services import realtime_bridge as bridge_module
+from app.services.realtime_bridge import RealtimeBridge, redis_channel
+
+EVENTS = redis_channel("events")
+
+
+def raw(seq: int, message: dict) -> str:
+    """A payload as PUBLISH_SCRIPT publishes it."""
+    return f"{seq}:{json.dumps(message)}"
+
+
+def notice(n: int) -> dict:
+    return {"type": "events_updated", "count": n}
+
+
+@pytest.fixture
+def bridge():
+    return RealtimeBridge()
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    messages = []
+
+    async def send_personal_message(message, client_id):
+        messages.append((client_id, message))
+
+    monkeypatch.setattr(bridge_module.ws_manager, "send_personal_message", send_personal_message)
+    return messages
+
+
+async def test_seq_advances_only_when_flushed(bridge):
+    bridge._buffer(EVENTS, raw(1, notice(1)))
+    assert bridge.current_seq("events") == 0
+
+    await bridge.flush()
+    assert bridge.current_seq("events") == 1
+
+
+async def test_replay_returns_what_came_after_last_seq(bridge):
+    for seq in range(1, 6):
+        bridge._buffer(EVENTS, raw(seq, notice(seq)))
+    await bridge.flush()
+
+    assert [seq for seq, _ in bridge.replay("events", 2)] == [3, 4, 5]
+    assert bridge.replay("events", 5) == []
+
+
+async def test_unflushed_messages_are_not_replayed(bridge):
+    bridge._buffer(EVENTS, raw(1, notice(1)))
+    await bridge.flush()
+    bridge._buffer(EVENTS, raw(2, notice(2)))
+
+    assert [seq for seq, _ in bridge.replay("events", 0)] == [1]
+
+
+async def test_duplicates_are_dropped(bridge):
+    bridge._buffer(EVENTS, raw(1, notice(1)))
+    bridge._buffer(EVENTS, raw(1, notice(1)))
+
+    assert len(bridge._passthrough) == 1
+
+
+async def test_gap_older_than_the_buffer_needs_a_resnapshot(bridge, monkeypatch):
+    monkeypatch.setattr(settings, "REALTIME_REPLAY_BUFFER_SIZE", 3)
+    for seq in range(1, 8):
+        bridge._buffer(EVENTS, raw(seq, notice(seq)))
+    await bridge.flush()
+
+    assert bridge.replay("events", 1) is None
+    assert [seq for seq, _ in bridge.replay("events", 4)] == [5, 6, 7]
+
+
+async def test_counter_reset_restarts_the_log(bridge, monkeypatch):
+    monkeypatch.setattr(settings, "REALTIME_REPLAY_BUFFER_SIZE", 3)
+    for seq in range(100, 105):
+        bridge._buffer(EVENTS, raw(seq, notice(seq)))
+    await bridge.flush()
+
+    bridge._buffer(EVENTS, raw(1, notice(1)))
+    await bridge.flush()
+    assert bridge.current_seq("events") == 1
+    assert [seq for seq, _ in bridge.replay("events", 0)] == [1]
+
+
+async def test_malformed_payloads_are_dropped(bridge):
+    bridge._buffer(EVENTS, "not-a-seq:{}")
+    bridge._buffer(EVENTS, "1:{not json")
+
+    assert not bridge._passthrough
+    assert bridge.current_seq("events") == 0
+
+
+async def test_per_device_messages_are_batched_by_device(bridge):
+    for seq, device_id in enumerate(["bike-001", "bike-002", "bike-001"], start=1):
+        bridge._buffer(EVENTS, raw(seq, {"type": "event_created", "data": {"device_id": device_id}}))
+
+    batch = bridge._device_batches[("events", "event_created")]
+    assert {device_id: [seq for seq, _ in items] for device_id, items in batch.items()} == {
+        "bike-001": [1, 3],
+        "bike-002": [2],
+    }
+
+
+async def test_resume_replays_missed_messages(bridge, sent):
+    for seq in range(1, 4):
+        bridge._buffer(EVENTS, raw(seq, notice(seq)))
+    await bridge.flush()
+
+    await bridge.resume("client", "events", 1)
+
+    client_id, message = sent[0]
+    assert client_id == "client"
+    assert message["type"] == "replay"
+    assert message["seq"] == 3
+    assert [m["seq"] for m in message["messages"]] == [2, 3]
+    assert all(m["channel"] == "events" for m in message["messages"])
+
+
+async def test_resume_past_the_buffer_asks_for_a_resnapshot(bridge, sent, monkeypatch):
+    monkeypatch.setattr(settings, "REALTIME_REPLAY_BUFFER_SIZE", 2)
+    for seq in range(1, 6):
+        bridge._buffer(EVENTS, raw(seq, notice(seq)))
+    await bridge.flush()
+
+    await bridge.resume("client", "events", 0)
+
+    assert sent == [("client", {"type": "resnapshot", "channel": "events", "seq": 5})]
+
+
+@pytest.fixture
+def scoped_client(monkeypatch):
+    """A client subscribed to events and devices, looking at a small area."""
+    batches = []
+
+    def send_to_clients(message, client_ids, key=None):
+        batches.extend((client_id, message) for client_id in client_ids)
+
+    monkeypatch.setattr(bridge_module.ws_manager, "subscriptions", {"events": {"client"}, "devices": {"client"}})
+    monkeypatch.setattr(bridge_module.ws_manager, "send_to_clients", send_to_clients)
+    bridge_module.viewport_index.set_viewport("client", [10.0, 50.0, 10.1, 50.1], settings.VIEWPORT_MIN_ZOOM)
+    yield batches
+    bridge_module.viewport_index.remove("client")
+
+
+async def test_scoped_clients_get_events_for_off_screen_devices(bridge, scoped_client):
+    bridge._buffer(EVENTS, raw(1, {"type": "event_created", "data": {"device_id": "bike-off-screen"}}))
+    await bridge.flush()
+
+    assert [(client_id, m["type"]) for client_id, m in scoped_client] == [("client", "event_created")]
+    assert scoped_client[0][1]["data"] == [{"device_id": "bike-off-screen"}]
+
+
+async def test_scoped_clients_do_not_get_off_screen_map_state(bridge, scoped_client):
+    bridge._send_batch("devices", "device_status_updated", [
+        (1, {"device_id": "bike-inside", "lat": 50.05, "lon": 10.05}),
+        (2, {"device_id": "bike-outside", "lat": -33.9, "lon": 151.2}),
+    ])
+
+    assert [[d["device_id"] for d in m["data"]] for _, m in scoped_client] == [["bike-inside"]]
@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+
+from app.services import response_cache as response_cache_module
+from app.services.response_cache import ResponseCache, cache_key
+from tests.fakes import FakeRedis
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+
+    async def get_redis():
+        return fake
+
+    monkeypatch.setattr(response_cache_module, "get_redis", get_redis)
+    return fake
+
+
+def counting_load(body="[]", delay=0.0):
+    calls = []
+
+    async def load():
+        calls.append(None)
+        await asyncio.sleep(delay)
+        return body
+
+    return load, calls
+
+
+def test_cache_key_ignores_unset_params_and_order():
+    assert cache_key("devices", {"b": 1, "a": None, "c": "x"}) == cache_key("devices", {"c": "x", "b": 1})
+
+
+async def test_second_read_is_a_hit(redis):
+    cache = ResponseCache()
+    load, calls = counting_load('[{"id": 1}]')
+
+    first = await cache.get_or_load("devices", {}, load)
+    second = await cache.get_or_load("devices", {}, load)
+
+    assert first == second
+    assert second[1] == '[{"id": 1}]'
+    assert len(calls) == 1
+    assert cache.stats()["devices"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+async def test_bump_invalidates_and_changes_version(redis):
+    cache = ResponseCache()
+    load, calls = counting_load()
+
+    version, _ = await cache.get_or_load("devices", {}, load)
+    await cache.bump("devices")
+    new_version, _ = await cache.get_or_load("devices", {}, load)
+
+    assert len(calls) == 2
+    assert new_version != version
+
+
+async def test_concurrent_misses_share_one_load(redis):
+    cache = ResponseCache()
+    load, calls = counting_load(delay=0.05)
+
+    results = await asyncio.gather(*(cache.get_or_load("devices", {}, load) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert len(set(results)) == 1
+
+
+async def test_load_errors_reach_every_waiter(redis):
+    cache = ResponseCache()
+
+    async def load():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("db down")
+
+    results = await asyncio.gather(*(cache.get_or_load("events", {}, load) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not cache._inflight
+
+
+async def test_cancelled_leader_does_not_strand_waiters(redis):
+    cache = ResponseCache()
+    load, calls = counting_load("[1]", delay=0.05)
+
+    leader = asyncio.create_task(cache.get_or_load("devices", {}, load))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(cache.get_or_load("devices", {}, load))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    version, body = await asyncio.wait_for(follower, 1)
+    assert body == "[1]"
+    assert version is not None
+    assert leader.cancelled()
+    assert len(calls) == 2
+    assert not cache._inflight
+
+
+async def test_cancelled_waiter_leaves_the_load_running(redis):
+    cache = ResponseCache()
+    load, calls = counting_load("[1]", delay=0.05)
+
+    leader = asyncio.create_task(cache.get_or_load("devices", {}, load))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(cache.get_or_load("devices", {}, load))
+    await asyncio.sleep(0.01)
+    follower.cancel()
+
+    assert (await leader)[1] == "[1]"
+    assert follower.cancelled()
+    assert len(calls) == 1
+
+
+async def test_redis_outage_falls_back_to_load(monkeypatch):
+    async def get_redis():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(response_cache_module, "get_redis", get_redis)
+    load, calls = counting_load("[]")
+
+    assert await ResponseCache().get_or_load("devices", {}, load) == (None, "[]")
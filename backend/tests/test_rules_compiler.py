@@ -0,0 +1,162 @@
+from datetime import datetime
+from types import SimpleNamespace
+import time
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.domain.schemas import RuleCreate, RuleUpdate
+from app.services.fleet_state import EVENT_BITS, FleetState, FleetStateService, event_bit
+from app.services.rules_compiler import CompiledRule, RuleRegistry
+
+NOW = time.time()
+
+
+def make_state(**overrides) -> FleetState:
+    """Three devices: online and low, online with no readings, offline and low."""
+    columns = {
+        "device_ids": ["bike-001", "bike-002", "bike-003"],
+        "city": ["New York", "New York", "Boston"],
+        "model": ["Urban Cruiser v2", "Urban Cruiser v2", "Trail Blazer"],
+        "online": [True, True, False],
+        "last_seen": [NOW - 60, NOW - 3600, NOW - 7200],
+        "battery": [5, None, 8],
+        "speed": [1.0, None, 0.0],
+        "temp": [20.0, None, 21.0],
+        "lat": [40.7, None, 42.3],
+        "lon": [-74.0, None, -71.0],
+        "accel": [1.0, None, 1.0],
+        "accel_ts": [NOW, None, NOW],
+        "accel_lat": [40.7, None, 42.3],
+        "accel_lon": [-74.0, None, -71.0],
+        "open_events": [0, 0, 0],
+    }
+    columns.update(overrides)
+    return FleetState.from_columns(list(columns.values()))
+
+
+def rule(**fields) -> CompiledRule:
+    definition = dict(
+        name="test", event_type="LOW_BATTERY", field="battery_pct",
+        comparator="<", threshold=20, severity="warning",
+    )
+    definition.update(fields)
+    return CompiledRule(RuleCreate(**definition))
+
+
+def fired(compiled: CompiledRule, state: FleetState) -> list:
+    return list(state.device_ids[compiled.mask(state, NOW)])
+
+
+def test_threshold_mask_skips_missing_values():
+    assert fired(rule(), make_state()) == ["bike-001", "bike-003"]
+
+
+@pytest.mark.parametrize("comparator", ["!=", "<", ">=", "=="])
+def test_missing_values_never_match(comparator):
+    state = make_state(battery=[None, None, None])
+    assert fired(rule(comparator=comparator, threshold=50), state) == []
+
+
+def test_not_equal_skips_offline_devices_for_last_seen():
+    # last_seen_mins_ago is NaN for offline devices
+    compiled = rule(event_type="STALE", field="last_seen_mins_ago", comparator="!=", threshold=0)
+    assert fired(compiled, make_state()) == ["bike-001", "bike-002"]
+
+
+def test_city_and_model_scope_the_mask():
+    assert fired(rule(city="Boston"), make_state()) == ["bike-003"]
+    assert fired(rule(model="Urban Cruiser v2"), make_state()) == ["bike-001"]
+
+
+def test_evaluate_state_skips_open_events_and_marks_new_ones():
+    state = make_state()
+    compiled = rule()
+    open_events = np.array([0, 0, compiled.bit], dtype=np.int64)
+
+    events = compiled.evaluate_state(state, NOW, open_events)
+
+    assert [e.device_id for e in events] == ["bike-001"]
+    assert events[0].payload == {"battery_pct": 5, "threshold": 20, "rule": "test"}
+    assert open_events[0] & compiled.bit
+
+
+def device(city="New York", model="Urban Cruiser v2"):
+    return SimpleNamespace(id="bike-001", city=city, model=model)
+
+
+def reading(**fields):
+    values = dict(battery_pct=5, speed_mps=1.0, temp_c=20.0, accel_g=1.0, lat=40.7, lon=-74.0, ts=datetime.utcnow())
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+def test_reading_predicate():
+    compiled = rule()
+    assert compiled.evaluate_reading(reading(), {}, device()).type == "LOW_BATTERY"
+    assert compiled.evaluate_reading(reading(battery_pct=50), {}, device()) is None
+    assert compiled.evaluate_reading(reading(battery_pct=None), {}, device()) is None
+    assert rule(city="Boston").evaluate_reading(reading(), {}, device()) is None
+
+
+@pytest.mark.parametrize("derived", [{}, {"temp_zscore": float("nan")}])
+def test_reading_predicate_skips_missing_derived_values(derived):
+    compiled = rule(event_type="TEMP_SPIKE", field="temp_zscore", comparator="!=", threshold=0)
+    assert compiled.evaluate_reading(reading(), derived, device()) is None
+
+
+def test_batch_only_fields_have_no_reading_predicate():
+    compiled = rule(event_type="STALE", field="last_seen_mins_ago", comparator=">", threshold=15)
+    assert compiled.evaluate_reading(reading(), {}, device()) is None
+
+
+def test_registry_orders_rules_by_severity_and_applies_default_cooldown():
+    registry = RuleRegistry()
+    registry.load([
+        RuleCreate(name="info", event_type="A", field="battery_pct", comparator="<", threshold=1, severity="info"),
+        RuleCreate(name="crit", event_type="B", field="battery_pct", comparator="<", threshold=1,
+                   severity="critical", cooldown_seconds=60),
+    ])
+
+    assert [r.name for r in registry.rules] == ["crit", "info"]
+    assert registry.rules[0].cooldown_seconds == 60
+    assert registry.rules[1].cooldown_seconds == settings.EVENT_COOLDOWN_SECONDS
+
+
+@pytest.mark.parametrize("event_type", ["x' THEN 1 END; DROP TABLE events; --", "a:b", "low_battery"])
+def test_event_types_must_be_identifiers(event_type):
+    with pytest.raises(ValueError):
+        rule(event_type=event_type)
+
+
+@pytest.mark.parametrize("name", ["event_type", "field", "comparator", "threshold", "severity", "cooldown_seconds", "enabled"])
+def test_rule_updates_cannot_null_required_fields(name):
+    with pytest.raises(ValueError):
+        RuleUpdate(**{name: None})
+
+
+def test_rule_updates_can_clear_scope():
+    assert RuleUpdate(city=None, model=None).model_dump(exclude_unset=True) == {"city": None, "model": None}
+    assert RuleUpdate().model_dump(exclude_unset=True) == {}
+
+
+class RecordingSession:
+    def __init__(self):
+        self.calls = []
+
+    async def execute(self, query, params):
+        self.calls.append((query, params))
+        return SimpleNamespace(one=lambda: [None] * 15)
+
+
+async def test_event_types_are_bound_not_formatted_into_sql():
+    event_bit("CUSTOM_TYPE")
+    db = RecordingSession()
+
+    await FleetStateService.load(db)
+
+    query, params = db.calls[0]
+    assert "CUSTOM_TYPE" not in str(query)
+    assert params["event_types"] == list(EVENT_BITS)
+    assert params["event_bits"] == [EVENT_BITS[name] for name in params["event_types"]]
@@ -0,0 +1,88 @@
+import pytest
+
+from app.core.config import settings
+from app.services import suppression_cache as suppression_module
+from app.services.suppression_cache import SuppressionCache
+from tests.fakes import FakeRedis
+
+
+class OpenEvents:
+    """Session stub returning (device_id, type) rows of open events."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def execute(self, query):
+        self.queries.append(query)
+        return iter(self.rows)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+
+    async def get_redis():
+        return fake
+
+    monkeypatch.setattr(suppression_module, "get_redis", get_redis)
+    monkeypatch.setattr(settings, "SUPPRESSION_BACKEND", "redis")
+    return fake
+
+
+async def test_warm_loads_open_events_of_every_severity(redis):
+    cache = SuppressionCache()
+    db = OpenEvents([("bike-001", "TEMP_SPIKE"), ("bike-002", "LOW_BATTERY")])
+
+    assert await cache.warm(db) == 2
+    assert "severity" not in str(db.queries[0])
+    assert await cache.suppressed([("bike-001", "TEMP_SPIKE"), ("bike-003", "STALE")]) == {("bike-001", "TEMP_SPIKE")}
+
+
+async def test_ensure_warm_reloads_before_active_entries_expire(redis, monkeypatch):
+    cache = SuppressionCache()
+    db = OpenEvents([])
+    clock = [1000.0]
+    monkeypatch.setattr(suppression_module.time, "monotonic", lambda: clock[0])
+
+    await cache.ensure_warm(db)
+    clock[0] += settings.SUPPRESSION_ACTIVE_TTL_SECONDS / 4
+    await cache.ensure_warm(db)
+    assert len(db.queries) == 1
+
+    clock[0] += settings.SUPPRESSION_ACTIVE_TTL_SECONDS / 4
+    await cache.ensure_warm(db)
+    assert len(db.queries) == 2
+
+
+async def test_acknowledged_events_stop_suppressing(redis):
+    cache = SuppressionCache()
+    key = ("bike-001", "LOW_BATTERY")
+    await cache.mark_active([key])
+
+    await cache.clear_active([key])
+    assert await cache.suppressed([key]) == set()
+
+
+async def test_cooldown_suppresses_after_acknowledgement(redis):
+    cache = SuppressionCache()
+    key = ("bike-001", "LOW_BATTERY")
+    await cache.mark_active([key])
+    await cache.start_cooldown([(key, 300)])
+
+    await cache.clear_active([key])
+    assert await cache.suppressed([key]) == {key}
+
+
+async def test_other_processes_see_active_events_and_refresh_them(redis, monkeypatch):
+    key = ("bike-001", "LOW_BATTERY")
+    await SuppressionCache().mark_active([key])
+    refreshed = []
+
+    async def expire(name, seconds):
+        refreshed.append((name, seconds))
+        return int(name in redis.data)
+
+    monkeypatch.setattr(redis, "expire", expire)
+    assert await SuppressionCache().suppressed([key]) == {key}
+    assert refreshed == [("suppress:active:bike-001:LOW_BATTERY", settings.SUPPRESSION_ACTIVE_TTL_SECONDS)]
@@ -0,0 +1,77 @@
+import pytest
+
+from app.core.config import settings
+from app.services.viewport_index import ViewportIndex
+
+# [min_lon, min_lat, max_lon, max_lat] around lower Manhattan
+MANHATTAN = [-74.02, 40.70, -73.97, 40.75]
+
+
+@pytest.fixture
+def index():
+    return ViewportIndex()
+
+
+def test_scoped_viewport_routes_only_visible_devices(index):
+    index.set_viewport("a", MANHATTAN, settings.VIEWPORT_MIN_ZOOM)
+
+    assert index.is_scoped("a")
+    assert index.clients_at(40.72, -74.0) == {"a"}
+    assert index.clients_at(51.5, -0.12) == set()
+    routed = index.route(
+        [{"id": 1, "lat": 40.72, "lon": -74.0}, {"id": 2, "lat": 51.5, "lon": -0.12}],
+        lambda item: (item["lat"], item["lon"]),
+    )
+    assert routed == {"a": [{"id": 1, "lat": 40.72, "lon": -74.0}]}
+
+
+def test_zoomed_out_viewport_is_unscoped(index):
+    index.set_viewport("a", MANHATTAN, settings.VIEWPORT_MIN_ZOOM - 1)
+
+    assert not index.is_scoped("a")
+    assert index.visible("a", [(51.5, -0.12)])
+    assert not index.cells
+
+
+def test_replacing_and_removing_a_viewport_frees_its_cells(index):
+    index.set_viewport("a", MANHATTAN, settings.VIEWPORT_MIN_ZOOM)
+    index.set_viewport("a", [2.30, 48.84, 2.36, 48.88], settings.VIEWPORT_MIN_ZOOM)
+
+    assert index.clients_at(40.72, -74.0) == set()
+    assert index.clients_at(48.86, 2.33) == {"a"}
+
+    index.remove("a")
+    assert not index.cells
+    assert not index.is_scoped("a")
+
+
+@pytest.mark.parametrize("bbox", [
+    [float("-inf"), 40.70, -73.97, 40.75],
+    [-74.02, 40.70, float("inf"), 40.75],
+    [float("nan"), 40.70, -73.97, 40.75],
+    [-74.02, float("nan"), -73.97, float("nan")],
+])
+def test_non_finite_bbox_is_rejected_and_keeps_old_viewport(index, bbox):
+    index.set_viewport("a", MANHATTAN, settings.VIEWPORT_MIN_ZOOM)
+
+    with pytest.raises(ValueError):
+        index.set_viewport("a", bbox, settings.VIEWPORT_MIN_ZOOM)
+    assert index.clients_at(40.72, -74.0) == {"a"}
+
+
+@pytest.mark.parametrize("bbox", [[-73.97, 40.70, -74.02, 40.75], [1, 2, 3], ["a", 0, 1, 1]])
+def test_malformed_bbox_is_rejected(index, bbox):
+    with pytest.raises(ValueError):
+        index.set_viewport("a", bbox, settings.VIEWPORT_MIN_ZOOM)
+
+
+def test_non_finite_zoom_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.set_viewport("a", MANHATTAN, float("inf"))
+
+
+def test_bbox_is_clamped_to_the_globe(index):
+    viewport = index.set_viewport("a", [-500, -100, 500, 100], 0)
+
+    assert (viewport.min_lon, viewport.min_lat, viewport.max_lon, viewport.max_lat) == (-180, -90, 180, 90)
+    assert index.visible("a", [(89.9, 179.9)])
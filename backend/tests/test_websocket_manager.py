@@ -0,0 +1,61 @@
+import pytest
+
+from app.core.config import settings
+from app.services.websocket_manager import ClientConnection, Payload, encode_message
+
+
+def queued(connection: ClientConnection) -> list:
+    return [data for _, data in connection.queue]
+
+
+def message(type_: str, n: int) -> dict:
+    return {"type": type_, "n": n}
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    monkeypatch.setattr(settings, "WS_SEND_QUEUE_SIZE", 3)
+    return ClientConnection(websocket=None)
+
+
+async def test_drop_oldest_drops_the_oldest_message(connection, monkeypatch):
+    monkeypatch.setattr(settings, "WS_SLOW_CONSUMER_POLICY", "drop_oldest")
+    for n in range(4):
+        connection.enqueue(Payload(message("event_created", n)), "events:event_created")
+
+    assert queued(connection) == [encode_message(message("event_created", n), "json") for n in (1, 2, 3)]
+    assert connection.dropped == 1
+
+
+async def test_coalesce_replaces_queued_latest_state(connection, monkeypatch):
+    monkeypatch.setattr(settings, "WS_SLOW_CONSUMER_POLICY", "coalesce")
+    connection.enqueue(Payload(message("event_created", 0)), "events:event_created")
+    connection.enqueue(Payload(message("fleet_delta", 1)), "fleet:fleet_delta")
+    connection.enqueue(Payload(message("event_created", 2)), "events:event_created")
+    connection.enqueue(Payload(message("fleet_delta", 3)), "fleet:fleet_delta")
+
+    assert queued(connection) == [
+        encode_message(message("event_created", 0), "json"),
+        encode_message(message("event_created", 2), "json"),
+        encode_message(message("fleet_delta", 3), "json"),
+    ]
+
+
+async def test_coalesce_keeps_other_batches_and_drops_the_oldest(connection, monkeypatch):
+    monkeypatch.setattr(settings, "WS_SLOW_CONSUMER_POLICY", "coalesce")
+    connection.enqueue(Payload(message("fleet_delta", 0)), "fleet:fleet_delta")
+    for n in range(1, 4):
+        connection.enqueue(Payload(message("event_created", n)), "events:event_created")
+
+    # Every event batch survives; only the oldest message went
+    assert queued(connection) == [encode_message(message("event_created", n), "json") for n in (1, 2, 3)]
+
+
+async def test_disconnect_stops_queueing(connection, monkeypatch):
+    monkeypatch.setattr(settings, "WS_SLOW_CONSUMER_POLICY", "disconnect")
+    for n in range(5):
+        connection.enqueue(Payload(message("event_created", n)), "events:event_created")
+
+    assert connection.overflowed
+    assert len(connection.queue) == 3
+    assert connection.ready.is_set()
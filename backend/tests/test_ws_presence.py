@@ -0,0 +1,22 @@
+from app.services import ws_presence
+from app.services.ws_presence import PresenceRegistry
+from tests.fakes import FakeRedis
+
+
+class DownRedis(FakeRedis):
+    async def zremrangebyscore(self, *args):
+        raise ConnectionError("Redis is down")
+
+
+async def test_presence_falls_back_to_this_worker_without_redis(monkeypatch):
+    async def get_redis():
+        return DownRedis()
+
+    monkeypatch.setattr(ws_presence, "get_redis", get_redis)
+    registry = PresenceRegistry()
+
+    presence = await registry.cluster()
+
+    assert presence["local_only"] is True
+    assert [w["worker_id"] for w in presence["workers"]] == [registry.worker_id]
+    assert presence["connections"] == presence["workers"][0]["connections"]
@@ -4,7 +4,7 @@ import { useCallback } from 'react';
 import { Dashboard } from './pages/Dashboard';
 import { Events } from './pages/Events';
 import { Navigation } from './components/Navigation';
-import { useWebSocket } from './hooks/useWebSocket';
+import { useWebSocket, WebSocketContext } from './hooks/useWebSocket';
 import type { WebSocketMessage } from './types';
 
 const queryClient = new QueryClient({
@@ -21,6 +21,16 @@ function AppContent() {
   const handleWebSocketMessage = useCallback((message: WebSocketMessage) => {
     console.log('WebSocket message:', message);
 
+    // The gap since we disconnected is too old to replay, so reload the channel
+    if (message.type === 'resnapshot') {
+      if (message.channel === 'events') {
+        queryClient.invalidateQueries({ queryKey: ['events'] });
+      } else {
+        queryClient.invalidateQueries({ queryKey: ['devices'] });
+        queryClient.invalidateQueries({ queryKey: ['all-telemetry'] });
+      }
+    }
+
     // Invalidate queries on relevant WebSocket messages
     if (message.type === 'telemetry_update' || message.type === 'device_status_updated') {
       queryClient.invalidateQueries({ queryKey: ['devices'] });
@@ -32,20 +42,22 @@ function AppContent() {
     }
   }, []);
 
-  const { isConnected } = useWebSocket({
+  const { isConnected, sendMessage } = useWebSocket({
     onMessage: handleWebSocketMessage,
   });
 
   return (
-    <BrowserRouter>
-      <div className="min-h-screen bg-gray-50">
-        <Navigation isConnected={isConnected} />
-        <Routes>
-          <Route path="/" element={<Dashboard />} />
-          <Route path="/events" element={<Events />} />
-        </Routes>
-      </div>
-    </BrowserRouter>
+    <WebSocketContext.Provider value={{ isConnected, sendMessage }}>
+      <BrowserRouter>
+        <div className="min-h-screen bg-gray-50">
+          <Navigation isConnected={isConnected} />
+          <Routes>
+            <Route path="/" element={<Dashboard />} />
+            <Route path="/events" element={<Events />} />
+          </Routes>
+        </div>
+      </BrowserRouter>
+    </WebSocketContext.Provider>
   );
 }
 
@@ -1,4 +1,4 @@
-import type { Device, TelemetryReading, Event } from '../types';
+import type { Device, TelemetryReading, Event, FleetStats } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api/v1';
 
@@ -11,6 +11,8 @@ class APIClient {
 
   private async request<T>(endpoint: string, options?: RequestInit): Promise<T> {
     const response = await fetch(`${this.baseURL}${endpoint}`, {
+      // Carries the read-your-writes cookie to a cross-origin API
+      credentials: 'include',
       headers: {
         'Content-Type': 'application/json',
         ...options?.headers,
@@ -34,6 +36,11 @@ class APIClient {
     return this.request<Device>(`/devices/${deviceId}`);
   }
 
+  // Fleet
+  async getFleetStats(): Promise<FleetStats> {
+    return this.request<FleetStats>('/fleet/stats');
+  }
+
   // Telemetry
   async getTelemetry(params: {
     device_id: string;
@@ -1,9 +1,10 @@
-import { useEffect, useRef } from 'react';
+import { useContext, useEffect, useRef } from 'react';
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
 import { useQuery } from '@tanstack/react-query';
 import { apiClient } from '../api/client';
-import type { Device } from '../types';
+import { WebSocketContext } from '../hooks/useWebSocket';
+import type { Device, WebSocketMessage } from '../types';
 
 // Fix Leaflet's default icon issue
 delete (L.Icon.Default.prototype as any)._getIconUrl;
@@ -19,11 +20,23 @@ interface DeviceMapProps {
   onDeviceSelect?: (deviceId: string) => void;
 }
 
+function sendViewport(map: L.Map, sendMessage?: (message: WebSocketMessage) => void) {
+  const bounds = map.getBounds();
+  sendMessage?.({
+    type: 'viewport',
+    bbox: [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()],
+    zoom: map.getZoom(),
+  });
+}
+
 export function DeviceMap({ devices, selectedDeviceId, onDeviceSelect }: DeviceMapProps) {
   const mapRef = useRef<L.Map | null>(null);
   const markersRef = useRef<Map<string, L.Marker>>(new Map());
   const mapContainerRef = useRef<HTMLDivElement>(null);
   const hasInitializedBounds = useRef(false);
+  const ws = useContext(WebSocketContext);
+  const wsRef = useRef(ws);
+  wsRef.current = ws;
 
   // Fetch latest telemetry for all devices
   const { data: allTelemetry = [] } = useQuery({
@@ -60,6 +73,9 @@ export function DeviceMap({ devices, selectedDeviceId, onDeviceSelect }: DeviceM
         maxZoom: 19,
       }).addTo(map);
 
+      // Only receive device updates for the visible area
+      map.on('moveend', () => sendViewport(map, wsRef.current?.sendMessage));
+
       mapRef.current = map;
       console.log('Map initialized successfully');
     } catch (error) {
@@ -71,9 +87,18 @@ export function DeviceMap({ devices, selectedDeviceId, onDeviceSelect }: DeviceM
         mapRef.current.remove();
         mapRef.current = null;
       }
+      // The socket outlives the map, so stop scoping its updates
+      wsRef.current?.sendMessage({ type: 'viewport', bbox: null });
     };
   }, []);
 
+  // Viewports are per connection, so resend after reconnecting
+  useEffect(() => {
+    if (mapRef.current && ws?.isConnected) {
+      sendViewport(mapRef.current, ws.sendMessage);
+    }
+  }, [ws?.isConnected]);
+
   // Update markers when devices or telemetry changes
   useEffect(() => {
     if (!mapRef.current || !allTelemetry.length) return;
@@ -1,18 +1,17 @@
 import { Activity, AlertTriangle, Battery, Wifi } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
-import type { Device, Event } from '../types';
+import type { FleetStats } from '../types';
 
 interface StatsCardsProps {
-  devices: Device[];
-  events: Event[];
+  stats?: FleetStats;
 }
 
-export function StatsCards({ devices, events }: StatsCardsProps) {
+export function StatsCards({ stats: fleetStats }: StatsCardsProps) {
   const navigate = useNavigate();
-  const onlineDevices = devices.filter((d) => d.status === 'online').length;
-  const criticalEvents = events.filter((e) => e.severity === 'critical').length;
-  const warningEvents = events.filter((e) => e.severity === 'warning').length;
-  const totalDevices = devices.length;
+  const totalDevices = fleetStats?.total_devices ?? 0;
+  const onlineDevices = fleetStats?.by_status.online ?? 0;
+  const criticalEvents = fleetStats?.unacknowledged_events.by_severity.critical ?? 0;
+  const warningEvents = fleetStats?.unacknowledged_events.by_severity.warning ?? 0;
   const onlinePercentage = totalDevices > 0 ? Math.round((onlineDevices / totalDevices) * 100) : 0;
 
   const scrollToFleetOverview = () => {
@@ -34,7 +33,7 @@ export function StatsCards({ devices, events }: StatsCardsProps) {
   const stats = [
     {
       label: 'Total Devices',
-      value: devices.length,
+      value: totalDevices,
       icon: Activity,
       color: 'blue',
       bgGradient: 'from-blue-500 to-blue-600',
@@ -1,8 +1,16 @@
-import { useEffect, useRef, useState, useCallback } from 'react';
+import { createContext, useEffect, useRef, useState, useCallback } from 'react';
 import type { WebSocketMessage } from '../types';
 
 const WS_URL = import.meta.env.VITE_WS_URL || 'ws://localhost:8000/api/v1/ws';
 
+interface WebSocketContextValue {
+  isConnected: boolean;
+  sendMessage: (message: WebSocketMessage) => void;
+}
+
+// Shares the app-wide connection with components that send messages
+export const WebSocketContext = createContext<WebSocketContextValue | null>(null);
+
 interface UseWebSocketOptions {
   onMessage?: (message: WebSocketMessage) => void;
   onConnect?: () => void;
@@ -21,6 +29,8 @@ export function useWebSocket(options: UseWebSocketOptions = {}) {
   const wsRef = useRef<WebSocket | null>(null);
   const [isConnected, setIsConnected] = useState(false);
   const reconnectTimeoutRef = useRef<NodeJS.Timeout>();
+  // Last seq received per channel, kept across reconnects
+  const lastSeqRef = useRef<Record<string, number>>({});
 
   const connect = useCallback(() => {
     try {
@@ -36,12 +46,39 @@ export function useWebSocket(options: UseWebSocketOptions = {}) {
           type: 'subscribe',
           channels: ['telemetry', 'devices', 'events'],
         }));
+
+        // Ask the server to replay whatever was missed while disconnected
+        if (Object.keys(lastSeqRef.current).length > 0) {
+          ws.send(JSON.stringify({ type: 'resume', last_seq: lastSeqRef.current }));
+        }
       };
 
       ws.onmessage = (event) => {
         try {
-          const message: WebSocketMessage = JSON.parse(event.data);
-          onMessage?.(message);
+          const message = JSON.parse(event.data);
+
+          if (message.type === 'subscribed') {
+            // Starting point for channels we have no seq for yet
+            for (const [channel, seq] of Object.entries(message.seq ?? {})) {
+              lastSeqRef.current[channel] ??= seq as number;
+            }
+          } else if (typeof message.seq === 'number' && message.channel) {
+            lastSeqRef.current[message.channel] = Math.max(
+              lastSeqRef.current[message.channel] ?? 0,
+              message.seq,
+            );
+          }
+
+          if (message.type === 'replay') {
+            message.messages.forEach((replayed: WebSocketMessage) => onMessage?.(replayed));
+          } else {
+            onMessage?.(message);
+          }
+
+          // Fleet deltas are sent relative to the last acknowledged version
+          if (message.type === 'fleet_snapshot' || message.type === 'fleet_delta') {
+            ws.send(JSON.stringify({ type: 'fleet_ack', version: message.version }));
+          }
         } catch (error) {
           console.error('Failed to parse WebSocket message:', error);
         }
@@ -15,11 +15,11 @@ export function Dashboard() {
     refetchInterval: 10000, // Refetch every 10 seconds
   });
 
-  // Fetch events for stats only
-  const { data: events = [] } = useQuery({
-    queryKey: ['events'],
-    queryFn: () => apiClient.getEvents({ acknowledged: false, limit: 50 }),
-    refetchInterval: 5000,
+  // Counts for the stats cards, maintained server-side
+  const { data: fleetStats } = useQuery({
+    queryKey: ['fleet-stats'],
+    queryFn: () => apiClient.getFleetStats(),
+    refetchInterval: 10000,
   });
 
   return (
@@ -27,7 +27,7 @@ export function Dashboard() {
       {/* Main Content */}
       <main className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-8">
         {/* Stats Cards */}
-        <StatsCards devices={devices} events={events} />
+        <StatsCards stats={fleetStats} />
 
         {/* Map - Full Width */}
         <section>
@@ -21,7 +21,6 @@ export function Events() {
       if (!showAcknowledged) params.acknowledged = false;
       return apiClient.getEvents(params);
     },
-    refetchInterval: 5000,
   });
 
   const eventTypes = ['all', 'LOW_BATTERY', 'STALE', 'IMPACT', 'GEOFENCE'];
@@ -8,6 +8,17 @@ export interface Device {
   created_at: string;
   last_seen_at?: string;
   device_metadata: Record<string, any>;
+  latest_state?: DeviceLatestState | null;
+}
+
+export interface DeviceLatestState {
+  ts: string;
+  lat?: number;
+  lon?: number;
+  battery_pct?: number;
+  speed_mps?: number;
+  temp_c?: number;
+  accel_g?: number;
 }
 
 export interface TelemetryReading {
@@ -34,7 +45,22 @@ export interface Event {
   created_at: string;
 }
 
+export interface FleetStats {
+  total_devices: number;
+  by_status: Record<string, number>;
+  by_city: Record<string, number>;
+  by_model: Record<string, number>;
+  battery_histogram: Record<string, number>;
+  unacknowledged_events: {
+    total: number;
+    by_severity: Record<string, number>;
+    by_type: Record<string, number>;
+  };
+  reconciled_at?: string;
+}
+
 export interface WebSocketMessage {
   type: string;
   data?: any;
+  [key: string]: any;
 }
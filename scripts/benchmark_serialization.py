@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Bulk Read Serialization Benchmark for FleetPulse
+Compares the ORM + Pydantic + json path FastAPI takes for a response_model
+against the column tuple + orjson fast path used by the telemetry history
+endpoint. With --device-id, also times both queries against the database.
+Run from the backend directory so app settings resolve from .env.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.core.serialization import dump_rows  # noqa: E402
+from app.domain.models import TelemetryReading  # noqa: E402
+from app.domain.schemas import TelemetryReadingResponse  # noqa: E402
+from app.services.telemetry_service import READING_COLUMNS, TelemetryService  # noqa: E402
+
+reading_list_adapter = TypeAdapter(List[TelemetryReadingResponse])
+
+
+def generate_rows(num_rows: int) -> list:
+    """Generate synthetic rows shaped like get_device_telemetry_rows results."""
+    now = datetime.now(timezone.utc)
+    return [
+        (
+            i,
+            "bike-001",
+            now - timedelta(seconds=5 * i),
+            40.7128 + random.uniform(-0.05, 0.05),
+            -74.0060 + random.uniform(-0.05, 0.05),
+            random.randint(0, 100),
+            random.uniform(0, 8),
+            random.uniform(15, 35),
+            random.uniform(0.8, 1.2),
+        )
+        for i in range(num_rows)
+    ]
+
+
+def orm_path(rows: list) -> bytes:
+    """Build ORM objects, then validate and encode them as FastAPI does."""
+    readings = [TelemetryReading(**dict(zip(READING_COLUMNS, row))) for row in rows]
+    content = reading_list_adapter.dump_python(reading_list_adapter.validate_python(readings), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def fast_path(rows: list) -> bytes:
+    return dump_rows(READING_COLUMNS, rows)
+
+
+def best_of(fn, repeat: int) -> float:
+    """Return the fastest wall time of `repeat` runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+async def best_of_async(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+async def benchmark_queries(device_id: str, sizes: List[int], repeat: int):
+    """Time the ORM query against the Core column query for one device."""
+    from app.db.base import async_session_maker, engine
+
+    print(f"\n{'limit':>10} {'rows':>8} {'orm ms':>10} {'core ms':>10} {'speedup':>8}")
+    async with async_session_maker() as db:
+        for limit in sizes:
+            async def orm_query():
+                readings = await TelemetryService.get_device_telemetry(db, device_id, limit=limit)
+                # A fresh identity map per run, as each request has its own session
+                db.expunge_all()
+                return readings
+
+            async def core_query():
+                return await TelemetryService.get_device_telemetry_rows(db, device_id, limit=limit)
+
+            num_rows = len(await core_query())
+            orm_ms = await best_of_async(orm_query, repeat)
+            core_ms = await best_of_async(core_query, repeat)
+            print(f"{limit:>10} {num_rows:>8} {orm_ms:>10.2f} {core_ms:>10.2f} {orm_ms / core_ms:>7.1f}x")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FleetPulse Bulk Serialization Benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Result sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    parser.add_argument("--device-id", help="Also time both queries for this device's telemetry")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'orm+pydantic ms':>16} {'orjson ms':>10} {'speedup':>8}")
+    for num_rows in args.rows:
+        rows = generate_rows(num_rows)
+        assert json.loads(orm_path(rows)) == json.loads(fast_path(rows)), "encodings differ"
+
+        orm_ms = best_of(lambda: orm_path(rows), args.repeat)
+        fast_ms = best_of(lambda: fast_path(rows), args.repeat)
+        print(f"{num_rows:>10} {orm_ms:>16.2f} {fast_ms:>10.2f} {orm_ms / fast_ms:>7.1f}x")
+
+    if args.device_id:
+        asyncio.run(benchmark_queries(args.device_id, args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+WebSocket Scalability Benchmark for FleetPulse
+Opens thousands of WebSocket clients against /ws while the device simulator
+drives ingest, then reports connect rate, ingest-to-client latency, server
+memory per connection and dropped messages as JSON.
+Starts its own API process unless --api-url is given; run from the backend
+directory so app settings resolve from .env. PostgreSQL and Redis must be
+running, plus a Celery worker if device status updates should flow.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+from simulate_devices import FleetSimulator
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+# Server counters diffed over the run
+DROP_COUNTERS = ("ws.dropped", "ws.slow_consumer_disconnects", "ws.sent")
+
+
+def log(message: str):
+    """Progress goes to stderr so stdout stays valid JSON."""
+    print(message, file=sys.stderr, flush=True)
+
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def parse_mix(spec: str) -> List[str]:
+    """Expand "telemetry:5,fleet:2" into a weighted list of channels."""
+    channels = []
+    for part in spec.split(","):
+        name, _, weight = part.partition(":")
+        channels.extend([name.strip()] * int(weight or 1))
+    return channels
+
+
+def parse_ts(value: str) -> float:
+    ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def at(p: float) -> float:
+        return round(ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": at(50),
+        "p95_ms": at(95),
+        "p99_ms": at(99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def server_rss_bytes(pid: Optional[int]) -> Optional[int]:
+    """Resident set size of the API process (Linux only)."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class BenchClient:
+    """A WebSocket client subscribed to one channel, recording latencies."""
+
+    def __init__(self, ws_url: str, channel: str):
+        self.ws_url = ws_url
+        self.channel = channel
+        self.latencies: List[float] = []
+        self.messages = 0
+        self.close_code: Optional[int] = None
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.ws_url, max_size=None)
+        await self.ws.send(json.dumps({"type": "subscribe", "channels": [self.channel]}))
+
+    async def listen(self):
+        try:
+            async for raw in self.ws:
+                received_at = time.time()
+                message = json.loads(raw)
+                message_type = message.get("type")
+                self.messages += 1
+                if message_type == "telemetry_update":
+                    for item in message["data"]:
+                        self.latencies.append(received_at - parse_ts(item["ts"]))
+                elif message_type == "fleet_delta":
+                    for fields in message.get("devices", {}).values():
+                        if fields.get("last_seen_at"):
+                            self.latencies.append(received_at - parse_ts(fields["last_seen_at"]))
+                    await self.ws.send(json.dumps({"type": "fleet_ack", "version": message["version"]}))
+        except websockets.ConnectionClosed as e:
+            self.close_code = e.code
+
+
+def client_process(ws_url: str, channels: List[str], concurrency: int, ready, stop, results):
+    """Connect a share of the clients, listen until ``stop`` is set, report stats."""
+    raise_fd_limit()
+
+    async def run():
+        clients = [BenchClient(ws_url, channel) for channel in channels]
+        semaphore = asyncio.Semaphore(concurrency)
+        connect_times: List[float] = []
+
+        async def connect(client: BenchClient) -> bool:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await client.connect()
+                except Exception:
+                    return False
+                connect_times.append(time.perf_counter() - started)
+                return True
+
+        started = time.perf_counter()
+        connected = await asyncio.gather(*(connect(c) for c in clients))
+        connect_seconds = time.perf_counter() - started
+        clients = [c for c, ok in zip(clients, connected) if ok]
+        listeners = [asyncio.create_task(c.listen()) for c in clients]
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, ready.wait)
+        await loop.run_in_executor(None, stop.wait)
+
+        for task in listeners:
+            task.cancel()
+        await asyncio.gather(*(c.ws.close() for c in clients), return_exceptions=True)
+
+        latencies: Dict[str, List[float]] = {}
+        for c in clients:
+            latencies.setdefault(c.channel, []).extend(c.latencies)
+        results.put({
+            "attempted": len(channels),
+            "connected": len(clients),
+            "connect_seconds": connect_seconds,
+            "connect_times": connect_times,
+            "latencies": latencies,
+            "messages": sum(c.messages for c in clients),
+            "closed_by_server": dict(Counter(c.close_code for c in clients if c.close_code is not None)),
+        })
+
+    asyncio.run(run())
+
+
+async def wait_healthy(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"API at {base_url} did not become healthy")
+            await asyncio.sleep(0.2)
+
+
+async def server_counters(api_url: str) -> Dict[str, float]:
+    async with httpx.AsyncClient() as client:
+        counters = (await client.get(f"{api_url}/metrics")).json()["counters"]
+    return {name: counters.get(name, 0) for name in DROP_COUNTERS}
+
+
+def run_benchmark(args, api_url: str, server_pid: Optional[int]) -> dict:
+    base_url = api_url.rsplit("/api/", 1)[0]
+    ws_url = base_url.replace("http", "ws", 1) + "/api/v1/ws"
+    asyncio.run(wait_healthy(base_url))
+
+    simulator = FleetSimulator(args.devices, api_url, args.speed)
+    with contextlib.redirect_stdout(sys.stderr):
+        asyncio.run(simulator.register_devices())
+
+    mix = parse_mix(args.mix)
+    channels = [mix[i % len(mix)] for i in range(args.clients)]
+    shares = [channels[i::args.client_procs] for i in range(args.client_procs)]
+
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Barrier(args.client_procs + 1)
+    stop = ctx.Event()
+    results = ctx.Queue()
+    rss_before = server_rss_bytes(server_pid)
+    procs = [
+        ctx.Process(
+            target=client_process,
+            args=(ws_url, share, max(1, args.connect_concurrency // args.client_procs), ready, stop, results),
+        )
+        for share in shares
+    ]
+    log(f"Connecting {args.clients} clients from {args.client_procs} processes...")
+    for proc in procs:
+        proc.start()
+    ready.wait(timeout=args.connect_timeout)
+    rss_after = server_rss_bytes(server_pid)
+
+    counters_before = asyncio.run(server_counters(api_url))
+    log(f"Driving ingest from {args.devices} devices for {args.duration}s...")
+    with contextlib.redirect_stdout(sys.stderr):
+        asyncio.run(simulator.run(args.duration))
+    # Let the last tick reach the clients
+    time.sleep(2.0)
+    counters_after = asyncio.run(server_counters(api_url))
+
+    stop.set()
+    reports = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+
+    connected = sum(r["connected"] for r in reports)
+    connect_seconds = max(r["connect_seconds"] for r in reports)
+    latencies: Dict[str, List[float]] = {}
+    for report in reports:
+        for channel, values in report["latencies"].items():
+            latencies.setdefault(channel, []).extend(values)
+    closed = Counter()
+    for report in reports:
+        closed.update(report["closed_by_server"])
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "clients": args.clients,
+            "client_procs": args.client_procs,
+            "mix": args.mix,
+            "devices": args.devices,
+            "duration_seconds": args.duration,
+        },
+        "connect": {
+            "attempted": args.clients,
+            "connected": connected,
+            "failed": args.clients - connected,
+            "seconds": round(connect_seconds, 3),
+            "per_second": round(connected / connect_seconds, 1) if connect_seconds else None,
+            "latency": percentiles([t for r in reports for t in r["connect_times"]]),
+        },
+        "fanout_latency": {
+            channel: percentiles(values)
+            for channel, values in sorted(latencies.items())
+        },
+        "messages_received": sum(r["messages"] for r in reports),
+        "server": {
+            "rss_before_bytes": rss_before,
+            "rss_after_connect_bytes": rss_after,
+            "bytes_per_connection": (
+                round((rss_after - rss_before) / connected)
+                if rss_before is not None and rss_after is not None and connected else None
+            ),
+            "sent": counters_after["ws.sent"] - counters_before["ws.sent"],
+            "dropped": counters_after["ws.dropped"] - counters_before["ws.dropped"],
+            "slow_consumer_disconnects": (
+                counters_after["ws.slow_consumer_disconnects"]
+                - counters_before["ws.slow_consumer_disconnects"]
+            ),
+        },
+        "closed_by_server": dict(closed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FleetPulse WebSocket Scalability Benchmark")
+    parser.add_argument("--clients", type=int, default=2000, help="WebSocket clients")
+    parser.add_argument("--client-procs", type=int, default=4,
+                        help="Processes the clients are spread across")
+    parser.add_argument("--connect-concurrency", type=int, default=200,
+                        help="Connection attempts in flight at once")
+    parser.add_argument("--connect-timeout", type=float, default=300.0,
+                        help="Seconds to wait for every client process to finish connecting")
+    parser.add_argument("--mix", default="telemetry:5,fleet:2,events:2,devices:1",
+                        help="Channel weights for client subscriptions")
+    parser.add_argument("--devices", type=int, default=200, help="Simulated devices driving ingest")
+    parser.add_argument("--speed", type=float, default=1.0, help="Simulation speed multiplier")
+    parser.add_argument("--duration", type=int, default=30, help="Seconds of ingest")
+    parser.add_argument("--api-url", help="Benchmark a running API instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="PID of a running API, for memory figures")
+    parser.add_argument("--port", type=int, default=8200, help="Port for the API this script starts")
+    parser.add_argument("--output", help="Write the JSON report to a file instead of stdout")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    server = None
+    api_url, server_pid = args.api_url, args.server_pid
+    if api_url is None:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--port", str(args.port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+        )
+        api_url, server_pid = f"http://localhost:{args.port}/api/v1", server.pid
+
+    try:
+        report = run_benchmark(args, api_url, server_pid)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        log(f"Report written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -144,33 +144,36 @@ class FleetSimulator:
             self.devices.append(device)
 
     async def register_devices(self):
-        """Register all devices with the API."""
+        """Register all devices with the API in one bulk request."""
         print(f"Registering {len(self.devices)} devices...")
 
+        devices_data = [
+            {
+                "id": device.device_id,
+                "name": f"{device.city} {device.device_id.split('-')[0].title()} {device.device_id.split('-')[2]}",
+                "model": "Urban Cruiser v2" if "bike" in device.device_id else "ZipZap X1",
+                "firmware_version": "2.1.0",
+                "city": device.city
+            }
+            for device in self.devices
+        ]
+
         async with httpx.AsyncClient() as client:
-            for device in self.devices:
-                device_data = {
-                    "id": device.device_id,
-                    "name": f"{device.city} {device.device_id.split('-')[0].title()} {device.device_id.split('-')[2]}",
-                    "model": "Urban Cruiser v2" if "bike" in device.device_id else "ZipZap X1",
-                    "firmware_version": "2.1.0",
-                    "city": device.city
-                }
-
-                try:
-                    response = await client.post(
-                        f"{self.api_url}/devices",
-                        json=device_data,
-                        timeout=5.0
-                    )
-                    if response.status_code == 201:
-                        print(f"✓ Registered {device.device_id}")
-                    elif response.status_code == 400:
-                        print(f"- {device.device_id} already exists")
-                    else:
-                        print(f"✗ Failed to register {device.device_id}: {response.status_code}")
-                except Exception as e:
-                    print(f"✗ Error registering {device.device_id}: {e}")
+            try:
+                response = await client.post(
+                    f"{self.api_url}/devices/bulk",
+                    json=devices_data,
+                    timeout=60.0
+                )
+                if response.status_code == 200:
+                    result = response.json()
+                    print(f"✓ Registered {result['created']} devices")
+                    if result["errors"]:
+                        print(f"- {len(result['errors'])} already exist or were rejected")
+                else:
+                    print(f"✗ Failed to register devices: {response.status_code}")
+            except Exception as e:
+                print(f"✗ Error registering devices: {e}")
 
     async def send_telemetry(self, reading: dict):
         """Send a telemetry reading to the API."""
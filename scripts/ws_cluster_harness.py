@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+WebSocket Scale-out Harness for FleetPulse
+Starts several API workers in scale-out mode, spreads WebSocket clients across
+them, publishes messages through Redis and checks every client receives them.
+Run from the backend directory so app settings resolve from .env; PostgreSQL
+and Redis must be running.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+import websockets
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.realtime_bridge import publish  # noqa: E402
+
+
+def start_workers(num_workers: int, base_port: int) -> List[subprocess.Popen]:
+    """Start one uvicorn process per port, each standing in for a worker or node."""
+    env = dict(os.environ, WS_SCALE_OUT="true", WS_PRESENCE_INTERVAL_SECONDS="1")
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--port", str(base_port + i), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        for i in range(num_workers)
+    ]
+
+
+async def wait_healthy(ports: List[int], timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        for port in ports:
+            while True:
+                try:
+                    if (await client.get(f"http://localhost:{port}/health")).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Worker on port {port} did not become healthy")
+                await asyncio.sleep(0.2)
+
+
+class HarnessClient:
+    """A WebSocket client recording the harness messages it receives."""
+
+    def __init__(self, port: int, channel: str):
+        self.port = port
+        self.channel = channel
+        self.latencies: List[float] = []
+        self.received: Dict[int, int] = Counter()
+
+    async def connect(self):
+        self.ws = await websockets.connect(f"ws://localhost:{self.port}/api/v1/ws")
+        await self.ws.send(json.dumps({"type": "subscribe", "channels": [self.channel]}))
+        while json.loads(await self.ws.recv())["type"] != "subscribed":
+            pass
+
+    async def listen(self):
+        async for raw in self.ws:
+            message = json.loads(raw)
+            if message.get("type") == "harness":
+                self.received[message["n"]] += 1
+                self.latencies.append(time.time() - message["sent_at"])
+
+
+async def wait_presence(port: int, num_workers: int, num_clients: int, timeout: float = 15.0) -> dict:
+    """Poll the cluster registry until every worker reports its clients."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            presence = (await client.get(f"http://localhost:{port}/api/v1/ws/presence")).json()
+            if len(presence["workers"]) >= num_workers and presence["connections"] >= num_clients:
+                return presence
+            if time.monotonic() > deadline:
+                return presence
+            await asyncio.sleep(0.5)
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)] if ordered else 0.0
+
+
+async def run(args):
+    ports = [args.base_port + i for i in range(args.workers)]
+    await wait_healthy(ports)
+
+    clients = [HarnessClient(ports[i % len(ports)], args.channel) for i in range(args.clients)]
+    await asyncio.gather(*(c.connect() for c in clients))
+    listeners = [asyncio.create_task(c.listen()) for c in clients]
+    print(f"Connected {len(clients)} clients across {len(ports)} workers")
+
+    presence = await wait_presence(ports[0], args.workers, args.clients)
+    print(f"\nPresence: {presence['connections']} connections, channels {presence['channels']}")
+    for worker in sorted(presence["workers"], key=lambda w: w["pid"]):
+        print(f"  {worker['worker_id']:<30} {worker['connections']:>5} connections, "
+              f"redis channels {worker['redis_channels']}")
+
+    for n in range(args.messages):
+        await publish(args.channel, {"type": "harness", "n": n, "sent_at": time.time()})
+        await asyncio.sleep(args.interval)
+    await asyncio.sleep(1.0)
+
+    for task in listeners:
+        task.cancel()
+    await asyncio.gather(*(c.ws.close() for c in clients), return_exceptions=True)
+
+    complete = sum(1 for c in clients if len(c.received) == args.messages)
+    duplicates = sum(1 for c in clients for count in c.received.values() if count > 1)
+    latencies = [l for c in clients for l in c.latencies]
+    print(f"\nPublished {args.messages} messages to '{args.channel}'")
+    print(f"Clients with every message: {complete}/{len(clients)}")
+    print(f"Duplicate deliveries:       {duplicates}")
+    print(f"Delivery latency ms:        p50 {percentile(latencies, 50) * 1000:.1f}  "
+          f"p95 {percentile(latencies, 95) * 1000:.1f}  p99 {percentile(latencies, 99) * 1000:.1f}")
+    return complete == len(clients)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FleetPulse WebSocket Scale-out Harness")
+    parser.add_argument("--workers", type=int, default=4, help="Number of API processes")
+    parser.add_argument("--base-port", type=int, default=8101, help="Port of the first worker")
+    parser.add_argument("--clients", type=int, default=200, help="WebSocket clients")
+    parser.add_argument("--messages", type=int, default=20, help="Messages to publish")
+    parser.add_argument("--interval", type=float, default=0.05, help="Seconds between messages")
+    parser.add_argument("--channel", default="events", help="Channel to subscribe and publish to")
+    args = parser.parse_args()
+
+    workers = start_workers(args.workers, args.base_port)
+    try:
+        ok = asyncio.run(run(args))
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()